@@ -0,0 +1,3 @@
+"""
+Benchmarks for pynetworking. Every module can be executed as a script, e.g. `python benchmarks/bench_latency.py`.
+"""
@@ -0,0 +1,53 @@
+"""
+:module: benchmarks.bench_ciphers
+:synopsis: Throughput of the ciphers of the Cryptographer, alone and end to end.
+:author: Julian Sobott
+
+usage: python benchmarks/bench_ciphers.py
+
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import running_server, report_throughput
+from pynetworking.Cryptography import Cryptographer, CIPHERS
+
+MB = 1000 * 1000
+TOTAL_BYTES = 200 * MB
+
+
+def cryptographer_throughput(cipher: str, message_size: int) -> None:
+    client, server = Cryptographer(), Cryptographer()
+    key = Cryptographer.generate_communication_key(cipher)
+    client.set_communication_key(key, cipher)
+    server.set_communication_key(key, cipher, is_server=True)
+    message = os.urandom(message_size)
+    repeat = max(1, TOTAL_BYTES // message_size)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        server.decrypt(client.encrypt(message))
+    seconds = time.perf_counter() - start
+    record_size = len(client.encrypt(message))
+    report_throughput(f"{cipher} {message_size // 1000} KB (+{record_size - message_size} B)",
+                      repeat * message_size, seconds)
+
+
+def main():
+    for cipher in CIPHERS:
+        for message_size in (4 * 1000, 64 * 1000, MB):
+            cryptographer_throughput(cipher, message_size)
+    for cipher in CIPHERS:
+        with running_server(encrypted=True, cipher=cipher) as server:
+            payload = b"x" * (10 * MB)
+            server.echo(payload)    # warm up
+            start = time.perf_counter()
+            for _ in range(5):
+                server.echo(payload)
+            report_throughput(f"echo 10 MB, {cipher}", 5 * 2 * len(payload), time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
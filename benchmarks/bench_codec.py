@@ -0,0 +1,48 @@
+"""
+:module: benchmarks.bench_codec
+:synopsis: Packing and unpacking typical payloads with the binary codec and with dill.
+:author: Julian Sobott
+
+For every payload the size of the packed bytes and the number of pack + unpack round trips per second are printed.
+The payloads are the arguments of small function calls, a large list of numbers and a large bytes value.
+
+usage: python benchmarks/bench_codec.py
+
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pynetworking.Data import general_pack, general_unpack, ByteStream, DILL, BINARY
+
+PAYLOADS = {
+    "small call": ("add", (1, 2), {}),
+    "mixed call": ("store", ("user", 42, 3.14, True, None), {"tags": ["a", "b"], "meta": {"x": 1}}),
+    "10k ints": (list(range(10000)),),
+    "1 MB bytes": (b"x" * 1000 * 1000,),
+}
+
+
+def round_trips_per_second(args: tuple, codec: str, min_seconds: float = 0.5) -> float:
+    num = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        for _ in range(10):
+            general_unpack(ByteStream(general_pack(*args, codec=codec)))
+        num += 10
+    return num / (time.perf_counter() - start)
+
+
+def main():
+    for name, args in PAYLOADS.items():
+        for codec in (DILL, BINARY):
+            num_bytes = len(general_pack(*args, codec=codec))
+            per_second = round_trips_per_second(args, codec)
+            print(f"{name + ', ' + codec:<30} {num_bytes:>10} bytes  {per_second:12.0f} round trips/s  "
+                  f"{num_bytes * per_second / 1e6:10.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
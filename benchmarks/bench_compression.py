@@ -0,0 +1,82 @@
+"""
+:module: benchmarks.bench_compression
+:synopsis: Bytes on the wire and duration of small packets and files, with and without compression.
+:author: Julian Sobott
+
+Small JSON like dicts are echoed one after another, a log file and a random file are downloaded. The bytes, that the
+client sends and the server sends back, are counted at :func:`pynetworking.Data.send_segments`. Fernet inflates the
+messages by base64, AES-GCM only adds a tag.
+
+usage: python benchmarks/bench_compression.py [file size in MB, default 100]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import running_server
+import pynetworking.Communication_general
+from pynetworking.Compression import ZLIB
+from pynetworking.Cryptography import FERNET, AES_GCM
+
+MB = 1000 * 1000
+NUM_PACKETS = 2000
+
+sent_bytes = [0]
+send_segments = pynetworking.Communication_general.send_segments
+
+
+def counted_send_segments(sock, segments) -> None:
+    sent_bytes[0] += sum(len(segment) for segment in segments)
+    send_segments(sock, segments)
+
+
+def write_files(directory: str, size: int) -> None:
+    with open(os.path.join(directory, "log.txt"), "wb") as f:
+        line = 0
+        while f.tell() < size:
+            f.write("".join(f"2024-05-01 12:{line % 60:02d}:{line * 7 % 60:02d} INFO worker-{line % 8} request "
+                            f"/api/items/{line * 31 % 1000} took {line % 97} ms\n"
+                            for line in range(line, line + 10000)).encode())
+            line += 10000
+    with open(os.path.join(directory, "random.bin"), "wb") as f:
+        for _ in range(size // MB):
+            f.write(os.urandom(MB))
+
+
+def measure(name: str, func) -> None:
+    sent_bytes[0] = 0
+    start = time.perf_counter()
+    func()
+    duration = time.perf_counter() - start
+    print(f"{name:<50} {duration:8.3f} s  {sent_bytes[0] / MB:10.3f} MB sent")
+
+
+def main():
+    size = int(sys.argv[1]) * MB if len(sys.argv) > 1 else 100 * MB
+    pynetworking.Communication_general.send_segments = counted_send_segments
+    packet = {"user": "john.miller", "action": "login", "success": True, "client": "pynetworking",
+              "address": "192.168.178.20", "duration": 12}
+    with tempfile.TemporaryDirectory() as directory:
+        write_files(directory, size)
+        for cipher in (FERNET, AES_GCM):
+            for compressions in ([], [ZLIB]):
+                pynetworking.Communication_general.set_compressions(compressions)
+                try:
+                    with running_server(True, cipher) as server:
+                        name = f"{cipher}, {compressions[0] if compressions else 'uncompressed'}"
+                        measure(f"{NUM_PACKETS} small packets, {name}",
+                                lambda: [server.echo(dict(packet, session=i)) for i in range(NUM_PACKETS)])
+                        for file_name in ("log.txt", "random.bin"):
+                            measure(f"{size // MB} MB {file_name}, {name}",
+                                    lambda: server.get_file(os.path.join(directory, file_name),
+                                                            os.path.join(directory, "dst")))
+                finally:
+                    pynetworking.Communication_general.set_compressions([])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+:module: benchmarks.bench_delta_sync
+:synopsis: Downloading a slightly changed file again, as whole file and as delta file.
+:author: Julian Sobott
+
+The receiver already has the old file at the destination. The new file differs by a few small edits and one
+insertion. For both modes the duration and the file bytes, that are sent, are printed. The delta file is hashed
+for its manifest by the sender, hashed for its signature by the receiver and verified after the copies.
+
+usage: python benchmarks/bench_delta_sync.py [size in MB, default 1000]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import running_server
+from pynetworking.Communication_general import Communicator
+from pynetworking.Cryptography import AES_GCM
+
+MB = 1000 * 1000
+
+
+def write_files(directory: str, size: int) -> None:
+    old_path, src_path = os.path.join(directory, "old.bin"), os.path.join(directory, "src.bin")
+    with open(old_path, "wb") as old, open(src_path, "wb") as src:
+        for i in range(size // MB):
+            block = os.urandom(MB)
+            old.write(block)
+            if i % 100 == 10:
+                block = block[:1000] + b"edit" + block[1004:]
+            if i == size // MB // 2:
+                block = block[:500] + os.urandom(64 * 1024) + block[500:]
+            src.write(block)
+
+
+def main():
+    size = int(sys.argv[1]) * MB if len(sys.argv) > 1 else 1000 * MB
+    sent_bytes = []
+    send_file_content = Communicator._send_file_content
+
+    def counted_send(communicator, file, ranges=None):
+        sent_bytes.append(file.size if ranges is None else sum(length for _, length in ranges))
+        return send_file_content(communicator, file, ranges)
+
+    Communicator._send_file_content = counted_send
+    with tempfile.TemporaryDirectory() as directory:
+        write_files(directory, size)
+        src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+        with running_server(True, AES_GCM) as server:
+            for delta in (False, True):
+                shutil.copyfile(os.path.join(directory, "old.bin"), dst_path)
+                sent_bytes.clear()
+                start = time.perf_counter()
+                server.get_file(src_path, dst_path, delta)
+                duration = time.perf_counter() - start
+                assert os.path.getsize(dst_path) == os.path.getsize(src_path)
+                name = f"{size // MB} MB {'delta file' if delta else 'whole file'}, {AES_GCM}"
+                print(f"{name:<40} {duration:8.3f} s  {sum(sent_bytes) / MB:10.3f} MB of the file sent")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+:module: benchmarks.bench_directory_transfer
+:synopsis: Downloading a directory of many small files, file by file and as one directory.
+:author: Julian Sobott
+
+The directory contains `num_files` files of `file_size` bytes, in sub directories of 100 files. They are
+downloaded once with one `get_file` call per file and once with one `get_directory` call. The destination is
+removed before every run, unencrypted and encrypted with AES-GCM.
+
+usage: python benchmarks/bench_directory_transfer.py [number of files, default 10000] [file size, default 4096]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import running_server, report_throughput
+from pynetworking.Cryptography import AES_GCM
+
+
+def write_directory(path: str, num_files: int, file_size: int) -> list:
+    relative_paths = []
+    for i in range(num_files):
+        relative_path = os.path.join(str(i // 100), f"{i}.bin")
+        os.makedirs(os.path.join(path, str(i // 100)), exist_ok=True)
+        with open(os.path.join(path, relative_path), "wb") as f:
+            f.write(os.urandom(file_size))
+        relative_paths.append(relative_path)
+    return relative_paths
+
+
+def file_by_file(server, src_path: str, dst_path: str, relative_paths: list) -> None:
+    for relative_path in relative_paths:
+        os.makedirs(os.path.dirname(os.path.join(dst_path, relative_path)), exist_ok=True)
+        server.get_file(os.path.join(src_path, relative_path), os.path.join(dst_path, relative_path))
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    file_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    with tempfile.TemporaryDirectory() as directory:
+        src_path, dst_path = os.path.join(directory, "src"), os.path.join(directory, "dst")
+        relative_paths = write_directory(src_path, num_files, file_size)
+        for encrypted in (False, True):
+            with running_server(encrypted, AES_GCM) as server:
+                for name, download in (("get_file per file", lambda: file_by_file(server, src_path, dst_path,
+                                                                                  relative_paths)),
+                                       ("get_directory", lambda: server.get_directory(src_path, dst_path))):
+                    shutil.rmtree(dst_path, ignore_errors=True)
+                    start = time.perf_counter()
+                    download()
+                    duration = time.perf_counter() - start
+                    assert len(os.listdir(dst_path)) == len(os.listdir(src_path))
+                    report_throughput(f"{num_files} files, {name}, encrypted={encrypted}", num_files * file_size,
+                                      duration)
+                    print(f"{'':<41}{num_files / duration:10.0f} files/s")
+
+
+if __name__ == '__main__':
+    main()
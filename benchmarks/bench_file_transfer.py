@@ -0,0 +1,67 @@
+"""
+:module: benchmarks.bench_file_transfer
+:synopsis: Throughput and memory of downloading a file (returned File) and uploading a file (File argument).
+:author: Julian Sobott
+
+Client and server run in one process, on loopback. Every case runs in its own process, so the peak memory of one
+case doesn't influence the others. The file content is streamed, so the peak memory doesn't grow with the file.
+Unencrypted files are sent with `sendfile` and received with `splice` (Linux), encrypted files are sent in records
+of `FILE_RECORD_SIZE` bytes. Every cipher is measured, because Fernet is much slower than the AEAD ciphers.
+
+usage: python benchmarks/bench_file_transfer.py [size in MB, default 1000] [record size in KiB, default 256]
+
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pynetworking as net
+from benchmarks.common import running_server
+from pynetworking.Communication_general import Communicator
+from pynetworking.Cryptography import FERNET, AES_GCM, CHACHA20_POLY1305
+
+MB = 1000 * 1000
+
+
+def run(name: str, directory: str, upload: bool, encrypted: bool, cipher: str, record_size: int) -> None:
+    src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+    Communicator.FILE_RECORD_SIZE = record_size
+    with running_server(encrypted, cipher) as server:
+        start = time.perf_counter()
+        if upload:
+            server.put_file(net.File(src_path, dst_path))
+        else:
+            server.get_file(src_path, dst_path)
+        duration = time.perf_counter() - start
+    num_bytes = os.path.getsize(dst_path)
+    assert num_bytes == os.path.getsize(src_path)
+    os.remove(dst_path)
+    print(f"{name:<40} {num_bytes / duration / 1e9:8.3f} GB/s  ({duration:.3f} s for {num_bytes / 1e9:.2f} GB)  "
+          f"peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1000:.1f} MB")
+
+
+def main():
+    size = int(sys.argv[1]) * MB if len(sys.argv) > 1 else 1000 * MB
+    record_size = int(sys.argv[2]) * 1024 if len(sys.argv) > 2 else Communicator.FILE_RECORD_SIZE
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "src.bin"), "wb") as f:
+            for _ in range(size // MB):
+                f.write(os.urandom(MB))
+        for encrypted, cipher in ((False, FERNET), (True, FERNET), (True, AES_GCM), (True, CHACHA20_POLY1305)):
+            for upload in (False, True):
+                name = f"{size // MB} MB {'upload' if upload else 'download'}, {cipher if encrypted else 'plain'}"
+                process = multiprocessing.Process(target=run,
+                                                  args=(name, directory, upload, encrypted, cipher, record_size))
+                process.start()
+                process.join()
+                if process.exitcode != 0:
+                    print(f"{name:<40} failed with exit code {process.exitcode}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+:module: benchmarks.bench_handshake
+:synopsis: Handshakes per second of the RSA and the X25519 key exchange, with and without session resumption.
+:author: Julian Sobott
+
+usage: python benchmarks/bench_handshake.py
+
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pynetworking as net
+import pynetworking.Communication_general
+from benchmarks.common import BenchClientCommunicator, BenchServerCommunicator, server_address
+from pynetworking.Communication_server import MetaClientManager
+from pynetworking.Cryptography import Cryptographer, KEY_EXCHANGES, FERNET, RSA
+
+REPEAT = 100
+CONNECT_REPEAT = 20
+
+
+def handshake(key_exchange: str) -> None:
+    client, server = Cryptographer(), Cryptographer()
+    server_hello, server_key, cipher = server.server_hello(client.client_hello(key_exchange, [FERNET]), [FERNET])
+    client.key_from_server_hello(server_hello)
+
+
+def report_rate(name: str, repeat: int, seconds: float) -> None:
+    print(f"{name:<40} {repeat / seconds:10.1f} handshakes/s  ({seconds / repeat * 1e3:.2f} ms each)")
+
+
+def main():
+    for key_exchange in KEY_EXCHANGES:
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            handshake(key_exchange)
+        report_rate(f"Cryptographer only, {key_exchange}", REPEAT, time.perf_counter() - start)
+
+    for key_exchange in KEY_EXCHANGES:
+        pynetworking.Communication_general.set_key_exchange(key_exchange)
+        try:
+            with net.ClientManager(server_address, BenchClientCommunicator):
+                for resume in (False, True):
+                    seconds = 0.
+                    for _ in range(CONNECT_REPEAT):
+                        if not resume:
+                            BenchServerCommunicator._session_ticket = None
+                        start = time.perf_counter()
+                        BenchServerCommunicator.connect(server_address, timeout=5)
+                        seconds += time.perf_counter() - start
+                        # Closing waits for the receive timeout, so it is not measured.
+                        BenchServerCommunicator.close_connection()
+                    report_rate(f"connect, {key_exchange}{', resumed' if resume else ''}", CONNECT_REPEAT, seconds)
+            MetaClientManager._instances.pop(server_address, None)
+        finally:
+            pynetworking.Communication_general.set_key_exchange(RSA)
+
+
+if __name__ == '__main__':
+    main()
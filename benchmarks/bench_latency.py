@@ -0,0 +1,42 @@
+"""
+:module: benchmarks.bench_latency
+:synopsis: Round trip latency of a remote function call on loopback, the time to send a one-way call and the time
+    per call of a batch of calls.
+:author: Julian Sobott
+
+usage: python benchmarks/bench_latency.py
+
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pynetworking as net
+from benchmarks.common import running_server, measure, report
+
+REPEAT = 2000
+BATCH_SIZE = 100
+
+
+def batch_of_noops(server) -> None:
+    with net.Batch(server) as batch:
+        for _ in range(BATCH_SIZE):
+            batch.noop()
+
+
+def main():
+    for encrypted in (False, True):
+        with running_server(encrypted) as server:
+            server.noop()   # warm up
+            report(f"noop() round trip, encrypted={encrypted}", measure(server.noop, REPEAT))
+            report(f"echo(b'x' * 1024), encrypted={encrypted}", measure(lambda: server.echo(b"x" * 1024), REPEAT))
+            report(f"noop.one_way() send, encrypted={encrypted}", measure(server.noop.one_way, REPEAT))
+            server.noop()   # waits till all one-way calls are received
+            durations = measure(lambda: batch_of_noops(server), REPEAT // BATCH_SIZE * 10)
+            report(f"noop() in a batch of {BATCH_SIZE}, encrypted={encrypted}",
+                   [duration / BATCH_SIZE for duration in durations])
+
+
+if __name__ == '__main__':
+    main()
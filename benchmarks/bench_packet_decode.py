@@ -0,0 +1,71 @@
+"""
+:module: benchmarks.bench_packet_decode
+:synopsis: Per packet overhead of decoding the header and a small packet.
+:author: Julian Sobott
+
+The packed bytes are added to a :class:`pynetworking.Data.ReceiveBuffer` and decoded again and again, like the
+:class:`pynetworking.Communication_general.PacketBuilder` does at receiving.
+
+usage: python benchmarks/bench_packet_decode.py
+
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pynetworking.Communication_general import PacketBuilder
+from pynetworking.Data import ReceiveBuffer, BINARY
+from pynetworking.Packets import Header, DataPacket
+
+REPEAT = 200000
+
+
+def packed_packet() -> bytes:
+    packet = DataPacket(**{"return": 1})
+    packet.set_ids(1, 2)
+    return packet.pack(BINARY)
+
+
+def add_only(packed: bytes) -> float:
+    receive_buffer = ReceiveBuffer()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        receive_buffer += packed
+        receive_buffer.idx += len(packed)
+        receive_buffer.remove_consumed_bytes()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def decode_header(packed: bytes) -> float:
+    receive_buffer = ReceiveBuffer()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        receive_buffer += packed
+        Header.from_bytes(receive_buffer)
+        receive_buffer.idx += len(packed) - Header.LENGTH_BYTES
+        receive_buffer.remove_consumed_bytes()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def decode_packet(packed: bytes) -> float:
+    receive_buffer = ReceiveBuffer()
+    packet_builder = PacketBuilder(receive_buffer)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        receive_buffer += packed
+        packet = packet_builder.next_packet()
+    assert packet is not None
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    packed = packed_packet()
+    print(f"{'ReceiveBuffer += (included below)':<40} {add_only(packed) * 1e9:8.0f} ns/packet")
+    print(f"{'Header.from_bytes':<40} {decode_header(packed) * 1e9:8.0f} ns/packet")
+    print(f"{'PacketBuilder.next_packet':<40} {decode_packet(packed) * 1e9:8.0f} ns/packet")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+:module: benchmarks.bench_prefork
+:synopsis: Throughput of encrypted echo calls of many clients, served by one process and by a PreforkServer with a
+    worker process per cpu.
+:author: Julian Sobott
+
+Every client runs in its own process and calls `echo` with a small payload as often as possible. Decrypting,
+unpacking and dispatching the calls is bound by the GIL of the server process, so with one process the throughput
+doesn't grow with the cores. The worker processes of the PreforkServer have a GIL each.
+
+usage: python benchmarks/bench_prefork.py [number of clients, default 4 * cpus] [seconds, default 5]
+    [worker processes, default 1 and the number of cpus]
+
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pynetworking as net
+from benchmarks.common import BenchClientCommunicator, BenchServerCommunicator, server_address
+
+PAYLOAD = {"user": "john.miller", "items": list(range(200)), "data": b"x" * 1024}
+
+
+def run_client(duration: float) -> int:
+    BenchServerCommunicator.connect(server_address, timeout=10)
+    server = BenchServerCommunicator.remote_functions(timeout=30)
+    calls = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        server.echo(PAYLOAD)
+        calls += 1
+    BenchServerCommunicator.close_connection()
+    return calls
+
+
+def measure(num_processes: int, num_clients: int, duration: float) -> None:
+    with net.PreforkServer(server_address, BenchClientCommunicator, num_processes=num_processes):
+        time.sleep(0.5)  # till all workers listen
+        with multiprocessing.get_context("fork").Pool(num_clients) as pool:
+            calls = sum(pool.map(run_client, [duration] * num_clients))
+    print(f"{num_processes:>3} worker processes, {num_clients} clients: {calls / duration:10.0f} calls/s")
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    num_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 4 * cpus
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    process_counts = [int(sys.argv[3])] if len(sys.argv) > 3 else sorted({1, cpus})
+    print(f"{cpus} cpus")
+    for num_processes in process_counts:
+        measure(num_processes, num_clients, duration)
+
+
+if __name__ == '__main__':
+    main()
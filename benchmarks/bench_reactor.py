@@ -0,0 +1,83 @@
+"""
+:module: benchmarks.bench_reactor
+:synopsis: Threads, idle CPU time and memory of a server with many idle clients, with one thread per client and with
+    the reactor. The round trip latency of one active client is measured meanwhile.
+:author: Julian Sobott
+
+The idle clients are plain sockets in the same process, which connect and never send. The connection is unencrypted,
+so no key exchange is needed. Every client takes two file descriptors, so the open file limit must be above twice the
+number of clients. Each server runs in its own process, so the memory of one does not count for the other.
+
+With a thread per client the server listens with a backlog of 4. The connections of the burst, that don't fit, are
+accepted after the kernel retransmitted their SYN-ACK, so most of the connect time is waiting there. The reactor
+listens with the maximal backlog.
+
+usage: python benchmarks/bench_reactor.py [number of idle clients, default 1000] [idle seconds, default 5]
+    [reactor workers, 0 for a thread per client, default both one after another]
+
+"""
+import os
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import running_server, server_address, measure, report
+from pynetworking.Communication_server import MetaClientManager
+
+REPEAT = 1000
+REACTOR_WORKERS = 4
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def connect_idle_clients(num_clients: int) -> list:
+    clients = [socket.create_connection(server_address) for _ in range(num_clients)]
+    manager = MetaClientManager._instances[server_address]
+    while len(manager.clients) < num_clients + 1:
+        time.sleep(0.1)
+    return clients
+
+
+def run_server(num_clients: int, idle_seconds: float, reactor_workers: int) -> None:
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft_limit, min(hard_limit, 2 * num_clients + 100)), hard_limit))
+    name = f"reactor with {reactor_workers} workers" if reactor_workers else "thread per client"
+    with running_server(encrypted=False, reactor_workers=reactor_workers or None) as server:
+        start = time.perf_counter()
+        clients = connect_idle_clients(num_clients)
+        print(f"{name}: {num_clients} clients connected in {time.perf_counter() - start:.2f} s, "
+              f"{threading.active_count()} threads, {rss_mb():.0f} MB RSS")
+        start, cpu_start = time.perf_counter(), time.process_time()
+        time.sleep(idle_seconds)
+        cpu = (time.process_time() - cpu_start) / (time.perf_counter() - start)
+        print(f"{name}: {cpu * 100:.1f} % of a core while idle")
+        server.noop()   # warm up
+        report(f"noop() round trip, {name}", measure(server.noop, REPEAT))
+        for client in clients:
+            client.close()
+
+
+def main():
+    num_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    idle_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    if len(sys.argv) > 3:
+        run_server(num_clients, idle_seconds, int(sys.argv[3]))
+        return
+    for reactor_workers in (0, REACTOR_WORKERS):
+        subprocess.run([sys.executable, __file__, str(num_clients), str(idle_seconds), str(reactor_workers)],
+                       check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+:module: benchmarks.bench_receive_buffer
+:synopsis: Rebuilding one large packet from 4 KB chunks with the ByteStream and with the ReceiveBuffer.
+:author: Julian Sobott
+
+The ByteStream copies the whole received data at every chunk, so the time grows quadratic with the packet size.
+The ReceiveBuffer must grow linear. The end to end benchmark echoes a large payload over an unencrypted connection.
+
+usage: python benchmarks/bench_receive_buffer.py
+
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import running_server, report_throughput
+from pynetworking.Communication_general import PacketBuilder
+from pynetworking.Data import ByteStream, ReceiveBuffer
+from pynetworking.Packets import DataPacket
+
+CHUNK_SIZE = 4096
+MB = 1000 * 1000
+
+
+def packed_packet(num_bytes: int) -> bytes:
+    packet = DataPacket(**{"return": b"x" * num_bytes})
+    packet.set_ids(0, 0)
+    return packet.pack()
+
+
+def feed_byte_stream(packed: bytes) -> float:
+    packet_builder = PacketBuilder(ByteStream(b""))
+    start = time.perf_counter()
+    for i in range(0, len(packed), CHUNK_SIZE):
+        packet = packet_builder.add_chunk(packed[i: i + CHUNK_SIZE])
+    assert packet is not None
+    return time.perf_counter() - start
+
+
+def feed_receive_buffer(packed: bytes) -> float:
+    receive_buffer = ReceiveBuffer()
+    packet_builder = PacketBuilder(receive_buffer)
+    packed_view = memoryview(packed)
+    start = time.perf_counter()
+    for i in range(0, len(packed), CHUNK_SIZE):
+        chunk = packed_view[i: i + CHUNK_SIZE]
+        # Same as ReceiveBuffer.recv_into(), but without a socket.
+        receive_buffer.reserve(len(chunk))[:] = chunk
+        receive_buffer.commit(len(chunk))
+        packet = packet_builder.next_packet()
+    assert packet is not None
+    return time.perf_counter() - start
+
+
+def main():
+    for size in (1, 2, 4, 8):
+        packed = packed_packet(size * MB)
+        report_throughput(f"ByteStream {size} MB", len(packed), feed_byte_stream(packed))
+    for size in (1, 10, 100):
+        packed = packed_packet(size * MB)
+        report_throughput(f"ReceiveBuffer {size} MB", len(packed), feed_receive_buffer(packed))
+
+    with running_server(encrypted=False) as server:
+        for size in (1, 10, 100):
+            payload = b"x" * (size * MB)
+            start = time.perf_counter()
+            server.echo(payload)
+            report_throughput(f"echo {size} MB, unencrypted", 2 * len(payload), time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+:module: benchmarks.bench_send_path
+:synopsis: Sending packed packets with one vectored write and with a joined bytes string.
+:author: Julian Sobott
+
+A packet is packed into segments (header, packed data, large buffers). The segments are either sent with
+:func:`pynetworking.Data.send_segments` or joined and sent with `sendall`. For every packet size the time and the
+bytes allocated per send are printed. The receiver thread only drains the socket.
+
+usage: python benchmarks/bench_send_path.py
+
+"""
+import os
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pynetworking.Data import send_segments
+from pynetworking.Packets import FunctionPacket
+
+MB = 1000 * 1000
+
+
+def drain(receiver: socket.socket) -> None:
+    buffer = bytearray(1024 * 1024)
+    while receiver.recv_into(buffer):
+        pass
+
+
+def send_joined(sender: socket.socket, segments: list) -> None:
+    sender.sendall(b"".join(segments))
+
+
+def bench(name: str, send, sender: socket.socket, segments: list, repeat: int) -> None:
+    tracemalloc.start()
+    send(sender, segments)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        send(sender, segments)
+    duration = (time.perf_counter() - start) / repeat
+    print(f"{name:<40} {duration * 1e6:10.1f} us/send  {peak:>12} bytes allocated at peak")
+
+
+def main():
+    sender, receiver = socket.socketpair()
+    receive_thread = threading.Thread(target=drain, args=(receiver,), daemon=True)
+    receive_thread.start()
+    for name, payload, repeat in (("small call", (1, 2), 20000), ("1 MB bytes", b"x" * MB, 500),
+                                  ("100 MB bytes", b"x" * 100 * MB, 10)):
+        packet = FunctionPacket("echo", payload)
+        packet.set_ids(0, 0)
+        segments = packet.pack_segments()
+        bench(f"{name}, joined + sendall", send_joined, sender, segments, repeat)
+        bench(f"{name}, send_segments", send_segments, sender, segments, repeat)
+    sender.close()
+    receive_thread.join()
+    receiver.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+:module: benchmarks.bench_stream
+:synopsis: Streaming the items of a remote generator, compared to returning all items in one data-packet.
+:author: Julian Sobott
+
+The server returns `num_items` bytes items of 1 MB as generator or as list. For every size the throughput and the
+peak memory of the process (client and server) are printed. The peak memory of a stream stays flat, however many
+items are streamed. Every case runs in its own process, so the peaks don't influence each other.
+
+usage: python benchmarks/bench_stream.py
+
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import running_server, report_throughput
+
+MB = 1000 * 1000
+ITEM_SIZE = MB
+
+
+def run(name: str, num_items: int, streamed: bool, encrypted: bool) -> None:
+    with running_server(encrypted) as server:
+        start = time.perf_counter()
+        if streamed:
+            num_bytes = sum(len(item) for item in server.items(num_items, ITEM_SIZE))
+        else:
+            num_bytes = sum(len(item) for item in server.items_list(num_items, ITEM_SIZE))
+        duration = time.perf_counter() - start
+    report_throughput(name, num_bytes, duration)
+    print(f"{'':<40} peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1000:10.1f} MB")
+
+
+def main():
+    for encrypted in (False, True):
+        for num_items in (100, 1000, 4000):
+            for streamed in (True, False):
+                if not streamed and num_items > 1000:
+                    continue    # Doesn't fit into memory
+                name = f"{num_items} MB {'streamed' if streamed else 'one packet'}, encrypted={encrypted}"
+                process = multiprocessing.Process(target=run, args=(name, num_items, streamed, encrypted))
+                process.start()
+                process.join()
+                if process.exitcode != 0:
+                    print(f"{name:<40} failed with exit code {process.exitcode}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+:module: benchmarks.common
+:synopsis: Shared server/client setup and timing helpers for all benchmarks.
+:author: Julian Sobott
+
+"""
+import os
+import sys
+import time
+import statistics
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+project_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_path not in sys.path:
+    sys.path.insert(0, project_path)
+
+import pynetworking as net
+import pynetworking.Communication_general
+from pynetworking.Communication_server import MetaClientManager
+from pynetworking.Cryptography import FERNET
+
+server_address = "127.0.0.1", 5100
+
+net.Logging.logger.setLevel(40)
+
+
+class BenchServerFunctions(net.ServerFunctions):
+
+    @staticmethod
+    def echo(value):
+        return value
+
+    @staticmethod
+    def noop() -> None:
+        return None
+
+    @staticmethod
+    def get_file(file_path: str, destination_path: str, delta: bool = False) -> net.File:
+        return net.File(file_path, destination_path, delta=delta)
+
+    @staticmethod
+    def get_directory(directory_path: str, destination_path: str) -> net.Directory:
+        return net.Directory(directory_path, destination_path)
+
+    @staticmethod
+    def put_file(file: net.File) -> int:
+        return os.path.getsize(file.dst_path)
+
+    @staticmethod
+    def items(num_items: int, item_size: int):
+        return (bytes(item_size) for _ in range(num_items))
+
+    @staticmethod
+    def items_list(num_items: int, item_size: int) -> list:
+        return [bytes(item_size) for _ in range(num_items)]
+
+
+class BenchClientFunctions(net.ClientFunctions):
+    pass
+
+
+class BenchClientCommunicator(net.ClientCommunicator):
+    local_functions = BenchServerFunctions
+    remote_functions = BenchClientFunctions
+
+
+class BenchServerCommunicator(net.ServerCommunicator):
+    local_functions = BenchClientFunctions
+    remote_functions = BenchServerFunctions
+
+
+@contextmanager
+def running_server(encrypted: bool = True, cipher: str = FERNET, reactor_workers: Optional[int] = None):
+    """Starts a server, connects the :class:`BenchServerCommunicator` and yields the remote functions."""
+    pynetworking.Communication_general.set_encrypted_communication(encrypted)
+    pynetworking.Communication_general.set_ciphers([cipher])
+    try:
+        with net.ClientManager(server_address, BenchClientCommunicator, reactor_workers=reactor_workers):
+            BenchServerCommunicator.connect(server_address, timeout=5)
+            try:
+                yield BenchServerCommunicator.remote_functions
+            finally:
+                BenchServerCommunicator.close_connection()
+        MetaClientManager._instances.pop(server_address, None)
+    finally:
+        pynetworking.Communication_general.set_encrypted_communication(True)
+        pynetworking.Communication_general.set_ciphers([FERNET])
+
+
+def measure(func: Callable, repeat: int) -> List[float]:
+    """Calls `func` `repeat` times and returns every duration in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name: str, durations: List[float]) -> None:
+    durations = sorted(durations)
+    p50 = statistics.median(durations)
+    p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+    print(f"{name:<40} n={len(durations):<6} p50={p50 * 1e3:8.3f} ms  p99={p99 * 1e3:8.3f} ms")
+
+
+def report_throughput(name: str, num_bytes: int, seconds: float) -> None:
+    print(f"{name:<40} {num_bytes / seconds / 1e6:10.1f} MB/s  ({seconds:.3f} s for {num_bytes / 1e6:.1f} MB)")
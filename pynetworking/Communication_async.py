@@ -0,0 +1,1136 @@
+"""
+:module: pynetworking.Communication_async
+:synopsis: Asyncio based client and server. An alternative to the threaded communicators.
+:author: Julian Sobott
+
+All connections are handled by one event loop instead of one thread per connection and one thread per received
+function. The packets on the wire are exactly the same as the ones of the threaded communicators. So an asyncio
+server can serve threaded clients and the other way round.
+
+Remote functions are awaited: :code:`await server.remote_functions.dummy_function(x, y)`. Local functions may be
+normal functions or coroutine functions. Normal functions are executed in the function executor (by default the
+executor of the event loop), coroutine functions are awaited in the event loop. Only coroutine functions can call
+remote functions. Many calls are sent in one packet with :class:`AsyncBatch`. Functions marked with
+:func:`pynetworking.Communication_general.one_way` and calls like
+:code:`await server.remote_functions.notify.one_way(x)` return after sending, without a response.
+
+Functions may return generators, iterators, async generators and async iterators. Their items are streamed and the
+caller gets an :class:`AsyncStreamIterator`: :code:`async for item in await server.remote_functions.items():`.
+
+External use
+-------------
+
+.. code-block:: python
+
+    async def main():
+        async with AsyncClientManager(server_address, MyAsyncClientCommunicator):
+            async with MyAsyncServerCommunicator() as server:
+                await server.connect(server_address)
+                print(await server.remote_functions.echo("Hello"))
+
+    asyncio.run(main())
+
+public classes
+----------------
+
+.. autoclass:: AsyncServerCommunicator
+    :members:
+    :undoc-members:
+
+.. autoclass:: AsyncClientManager
+    :members:
+    :undoc-members:
+
+.. autoclass:: AsyncClientCommunicator
+    :members:
+    :undoc-members:
+
+.. autoclass:: AsyncStreamIterator
+    :members: aclose
+
+public functions
+----------------
+
+.. autofunction:: async_resume_file
+
+private classes
+-----------------
+
+.. autoclass:: AsyncCommunicator
+    :members:
+    :undoc-members:
+    :private-members:
+
+.. autoclass:: AsyncConnector
+    :members:
+    :undoc-members:
+
+.. autoclass:: AsyncRemoteFunctions
+    :members: __call__, __getattr__
+
+.. autoclass:: AsyncStreamCredits
+    :members:
+
+"""
+import asyncio
+import collections.abc
+import contextvars
+import functools
+import os
+import socket
+import sys
+import traceback
+import weakref
+from typing import Dict, Optional, Type, Callable, Any, Set, List, Union, Iterator, AsyncIterator, Tuple
+
+from pynetworking.Logging import logger
+from pynetworking.Compression import Compressor
+from pynetworking.Cryptography import Cryptographer, SessionTicket, SessionTickets
+from pynetworking.Packets import Packet, DataPacket, FunctionPacket, OneWayFunctionPacket, BatchFunctionPacket, \
+    FileRequestPacket, FileMetaPacket, DirectoryPacket, StreamPacket, StreamCreditPacket
+from pynetworking.ID_management import IDManager, remove_manager
+from pynetworking.Data import ReceiveBuffer, File, Directory, FileWriters, FileManifest, FileTransfer, FileSignature, \
+    pack_int, iter_file_records, open_source_file, read_file_into, DILL, OUT_OF_BAND_THRESHOLD
+import pynetworking.Communication_general
+from pynetworking.Communication_general import Communicator, PacketBuilder, Functions, SocketAddress, \
+    ExceptionObject, FunctionExecutor, to_client_id, to_server_id, unpack_return_value, is_one_way, Batch, is_stream, \
+    iter_chunks, ChunkCollector, decrypt_record, resumable_files, received_file_transfer, remove_file, \
+    old_file_signature, file_delta, copy_file_ranges, as_data_packet, prepare_directory, new_compressor
+
+__all__ = ["AsyncServerCommunicator", "AsyncClientManager", "AsyncClientCommunicator"]
+
+_FILE_READ_SIZE = 1 << 20
+
+_current_client: contextvars.ContextVar = contextvars.ContextVar("current_client", default=None)
+
+
+class AsyncCommunicator:
+    """Asyncio counterpart of :class:`pynetworking.Communication_general.Communicator`. Sends and receives packets
+    over a stream. Every received function is executed in its own task. Calls are matched to their data-packets by
+    the function_id, so many calls may be pending at the same time.
+    """
+    CHUNK_SIZE = Communicator.CHUNK_SIZE
+    FILE_RECORD_SIZE = Communicator.FILE_RECORD_SIZE
+    STREAM_WINDOW = Communicator.STREAM_WINDOW
+    STREAM_CHUNK_ITEMS = Communicator.STREAM_CHUNK_ITEMS
+    STREAM_CHUNK_BYTES = Communicator.STREAM_CHUNK_BYTES
+
+    def __init__(self, id_: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 local_functions: Type[Functions], connector: 'AsyncConnector',
+                 on_close: Optional[Callable[['AsyncCommunicator'], Any]] = None,
+                 function_executor: Optional[FunctionExecutor] = None) -> None:
+        self._id = id_
+        self._reader = reader
+        self._writer = writer
+        self._functions = local_functions
+        self._connector = connector
+        self._on_close = on_close
+        self._function_executor = function_executor
+        self._plain_buffer = ReceiveBuffer()
+        self._encrypted_buffer = ReceiveBuffer()
+        self._packet_builder = PacketBuilder(self._plain_buffer)
+        self._pending_calls: Dict[int, asyncio.Future] = {}
+        self._streams: Dict[int, weakref.ref] = {}
+        self._stream_credits: Dict[int, AsyncStreamCredits] = {}
+        self._file_transfers: Dict[bytes, FileTransfer] = {}
+        self._packets: asyncio.Queue = asyncio.Queue()
+        self._send_lock = asyncio.Lock()
+        self._receiver: Optional[asyncio.Task] = None
+        self._function_tasks: Set[asyncio.Future] = set()
+        self._is_connected = True
+        self._closed = False
+        self.wait_for_response_timeout = float("inf")
+        self.file_record_size = self.FILE_RECORD_SIZE
+        self._record_buffer: Optional[bytearray] = None
+        self.cryptographer = Cryptographer()
+        self.codec = DILL
+        self.compressor: Optional[Compressor] = None
+
+    def start(self) -> None:
+        """Starts the task, that receives packets."""
+        self._receiver = asyncio.ensure_future(self._wait_for_new_input())
+
+    async def send_packet(self, packet: Packet, function_id: Optional[int] = None, encrypted: bool = True) -> None:
+        """Set the proper ids and sends the packed packet. A data-packet, that answers a function-packet, must pass
+        the `function_id` of this function-packet."""
+        async with self._send_lock:
+            IDManager(self._id).set_ids_of_packet(packet, function_id)
+            await self._send_packed(packet, encrypted)
+
+    async def call_function(self, function_packet: FunctionPacket) -> DataPacket:
+        """Sends the function-packet and waits for the data-packet with the same function_id."""
+        future = asyncio.get_event_loop().create_future()
+        async with self._send_lock:
+            IDManager(self._id).set_ids_of_packet(function_packet)
+            function_id = function_packet.header.id_container.function_id
+            self._pending_calls[function_id] = future
+            try:
+                await self._send_packed(function_packet)
+            except OSError:
+                self._pending_calls.pop(function_id, None)
+                raise ConnectionError("Could not send function to server. Check connection to server.")
+        try:
+            return await asyncio.wait_for(future, self._timeout())
+        except asyncio.TimeoutError:
+            self._pending_calls.pop(function_id, None)
+            logger.warning("call_function waited too long")
+            raise TimeoutError("call_function waited too long")
+
+    async def _send_packed(self, packet: Packet, encrypted: bool = True) -> None:
+        """Must be called with the send lock. The content of the file arguments of a function-packet is sent
+        directly after it."""
+        await self._send_segments(packet.pack_segments(self.codec), encrypted)
+        if isinstance(packet, FunctionPacket):
+            for file in packet.files:
+                await self._send_file_content(file)
+
+    async def wait_for_response(self) -> DataPacket:
+        """Waits till a data-packet, that no call is waiting for (e.g. at the key exchange), is received."""
+        try:
+            return await asyncio.wait_for(self._packets.get(), self._timeout())
+        except asyncio.TimeoutError:
+            logger.warning("wait_for_response waited too long")
+            raise TimeoutError("wait_for_response waited too long")
+
+    def _timeout(self) -> Optional[float]:
+        timeout = self.wait_for_response_timeout
+        return None if timeout < 0 or timeout == float("inf") else timeout
+
+    async def _wait_for_new_input(self) -> None:
+        """Loop that is constantly receiving new packets from the stream."""
+        try:
+            while True:
+                packet = await self._recv_packet()
+                if packet is None:
+                    break
+                IDManager(self._id).update_ids_by_packet(packet)
+                if isinstance(packet, StreamPacket):
+                    await self._received_stream_packet(packet)
+                    continue
+                if isinstance(packet, StreamCreditPacket):
+                    credits = self._stream_credits.get(packet.header.id_container.function_id)
+                    if credits is not None:
+                        credits.add(packet.credits)
+                    continue
+                if isinstance(packet, FileMetaPacket) and packet.is_offer:
+                    self._request_offered_file(packet)
+                    continue
+                if isinstance(packet, (FileMetaPacket, DirectoryPacket)):
+                    error = await self._recv_file_packet(packet)
+                    if error is not None:
+                        future = self._pending_calls.pop(packet.header.id_container.function_id, None)
+                        if future is not None and not future.done():
+                            future.set_exception(error)
+                        if self._reader.at_eof():
+                            break
+                        continue
+                elif isinstance(packet, FunctionPacket):
+                    if not await self._recv_file_arguments(packet):
+                        break
+                if isinstance(packet, (DataPacket, FileMetaPacket, DirectoryPacket)):
+                    self._received_data_packet(packet)
+                elif isinstance(packet, FunctionPacket):
+                    task = asyncio.ensure_future(self._received_function_packet(packet))
+                    self._function_tasks.add(task)
+                    task.add_done_callback(self._function_tasks.discard)
+        except asyncio.CancelledError:
+            return
+        except (ConnectionError, OSError) as e:
+            logger.warning(f"Connection reset at ID({self._id}): {e}")
+        self._is_connected = False
+        await self.stop(is_same_task=True)
+
+    def _received_data_packet(self, packet: Packet) -> None:
+        function_id = packet.header.id_container.function_id
+        packet = as_data_packet(packet)
+        stream_ref = self._streams.pop(function_id, None)
+        if stream_ref is not None:
+            stream = stream_ref()
+            if stream is not None:
+                stream._end(packet)
+            return
+        future = self._pending_calls.pop(function_id, None)
+        if future is not None:
+            if not future.done():
+                future.set_result(packet)
+        elif function_id < 0:
+            self._packets.put_nowait(packet)
+        else:
+            logger.warning(f"Dropped response of a call, that is not pending anymore: {packet}")
+
+    async def _received_stream_packet(self, packet: StreamPacket) -> None:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._received_stream_packet`."""
+        function_id = packet.header.id_container.function_id
+        stream_ref = self._streams.get(function_id)
+        if stream_ref is None:
+            future = self._pending_calls.pop(function_id, None)
+            if future is None or future.done():
+                logger.warning(f"Dropped stream of a call, that is not pending anymore: {packet}")
+                await self.send_packet(StreamCreditPacket(StreamCreditPacket.CANCEL), function_id)
+                return
+            stream = AsyncStreamIterator(self, function_id)
+            self._streams[function_id] = weakref.ref(stream)
+            stream._put_chunk(packet.items)
+            future.set_result(DataPacket(**{"return": stream}))
+            return
+        stream = stream_ref()
+        if stream is not None:
+            stream._put_chunk(packet.items)
+
+    async def _recv_data(self) -> bool:
+        """Appends the next decryptable data to the plain buffer. Returns False if the connection is closed."""
+        while True:
+            if self.cryptographer.is_encrypted_communication:
+                record = self._encrypted_buffer.next_record()
+                if record is not None:
+                    decrypt_record(self.cryptographer, record, self._plain_buffer, self.compressor)
+                    self._encrypted_buffer.remove_consumed_bytes()
+                    return True
+                num_bytes = self._encrypted_buffer.missing_record_bytes()
+            else:
+                num_bytes = self._packet_builder.missing_bytes()
+            chunk_data = await self._reader.read(max(self.CHUNK_SIZE, num_bytes))
+            if chunk_data == b"":
+                logger.info("Connection reset, ID(%s)", str(self._id))
+                return False
+            if not self.cryptographer.is_encrypted_communication:
+                self._plain_buffer += chunk_data
+                return True
+            self._encrypted_buffer += chunk_data
+
+    async def _recv_packet(self) -> Optional[Packet]:
+        """Receives bytes till a packet can be build. This packet is returned"""
+        while True:
+            possible_packet = self._packet_builder.next_packet()
+            if possible_packet is not None:
+                return possible_packet
+            if not await self._recv_data():
+                return None
+
+    async def _recv_file(self, dst_path: str, file_size: int, ranges: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """Receives bytes, till the file is fully received. The file is saved at the destination, given in the
+        file-meta-packet or the file argument. With `ranges` only these (offset, length) ranges are received and
+        written into the existing file. Returns False if the connection was closed before."""
+        with open(dst_path, "r+b" if ranges is not None and os.path.exists(dst_path) else "wb+") as file:
+            for offset, length in (ranges if ranges is not None else [(0, file_size)]):
+                file.seek(offset)
+                if not await self._recv_file_range(file, length):
+                    logger.error("Connection aborted, while receiving file!")
+                    return False
+        return True
+
+    async def _recv_file_range(self, file, remaining_bytes: int) -> bool:
+        """Unencrypted files are read in large pieces directly from the stream, after the already received bytes are
+        written."""
+        while remaining_bytes > 0:
+            if self._plain_buffer.remaining_length == 0 and not self.cryptographer.is_encrypted_communication:
+                file_data = await self._reader.read(min(remaining_bytes, _FILE_READ_SIZE))
+                if file_data == b"":
+                    return False
+                file.write(file_data)
+                remaining_bytes -= len(file_data)
+                continue
+            if self._plain_buffer.remaining_length == 0 and not await self._recv_data():
+                return False
+            write_data = self._plain_buffer.next_bytes(min(remaining_bytes, self._plain_buffer.remaining_length))
+            file.write(write_data)
+            remaining_bytes -= len(write_data)
+            self._plain_buffer.remove_consumed_bytes()
+        return True
+
+    async def _recv_file_packet(self, packet: Union[FileMetaPacket, DirectoryPacket]) -> Optional[Exception]:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._recv_file_packet`."""
+        if isinstance(packet, DirectoryPacket):
+            return await self._recv_directory(packet)
+        if packet.manifest is None:
+            if await self._recv_file(packet.dst_path, packet.file_size):
+                return None
+            remove_file(packet.dst_path)
+            return ConnectionAbortedError(f"Connection aborted, while receiving file: {packet.dst_path}")
+        transfer = self._file_transfers.pop(packet.manifest.transfer_id, None) or \
+            FileTransfer(packet.src_path, packet.dst_path, packet.manifest)
+        copy_file_ranges(transfer, packet.copies)
+        await self._recv_file(transfer.partial_path, packet.file_size, packet.ranges)
+        return received_file_transfer(transfer, packet)
+
+    async def _recv_directory(self, packet: DirectoryPacket) -> Optional[Exception]:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._recv_directory`."""
+        directory = Directory.from_packet(packet)
+        error = prepare_directory(directory)
+        writers = FileWriters()
+        try:
+            for relative_path, size in directory.files:
+                path = directory.destination(relative_path) if error is None else None
+                if size > FileWriters.MAX_FILE_SIZE:
+                    if not await self._recv_file(path or os.devnull, size):
+                        if path is not None:
+                            remove_file(path)
+                        return ConnectionAbortedError(f"Connection aborted, while receiving directory: {path}")
+                    continue
+                data = await self._recv_bytes(size)
+                if data is None:
+                    return ConnectionAbortedError(f"Connection aborted, while receiving directory: {path}")
+                if path is not None:
+                    writers.submit(path, data)
+                    while writers.is_full():
+                        await asyncio.wrap_future(writers.pop_oldest())
+        finally:
+            write_error = await asyncio.get_event_loop().run_in_executor(None, writers.close)
+        return error or write_error
+
+    async def _recv_bytes(self, num_bytes: int) -> Optional[bytes]:
+        """Receives exactly `num_bytes`. Returns None if the connection was closed before."""
+        data = bytearray()
+        while len(data) < num_bytes:
+            if self._plain_buffer.remaining_length == 0:
+                if self.cryptographer.is_encrypted_communication:
+                    if not await self._recv_data():
+                        return None
+                    continue
+                chunk_data = await self._reader.read(_FILE_READ_SIZE)
+                if chunk_data == b"":
+                    return None
+                self._plain_buffer += chunk_data
+            data += self._plain_buffer.next_bytes(min(num_bytes - len(data), self._plain_buffer.remaining_length))
+            self._plain_buffer.remove_consumed_bytes()
+        return bytes(data)
+
+    async def resume_file(self, transfer: FileTransfer, signature: Optional[FileSignature] = None) -> DataPacket:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator.resume_file`."""
+        self._file_transfers[transfer.manifest.transfer_id] = transfer
+        try:
+            return await self.call_function(FileRequestPacket(transfer.manifest.transfer_id,
+                                                              transfer.missing_ranges(), signature))
+        finally:
+            self._file_transfers.pop(transfer.manifest.transfer_id, None)
+
+    def _request_offered_file(self, packet: FileMetaPacket) -> None:
+        """Requests the offered delta file in a new task, because this task receives the answer. The call, that
+        returned the file, is resolved with the answer."""
+        future = self._pending_calls.pop(packet.header.id_container.function_id, None)
+        if future is None:
+            logger.warning(f"Dropped offered file of a call, that is not pending anymore: {packet}")
+            return
+        transfer = FileTransfer(packet.src_path, packet.dst_path, packet.manifest)
+        task = asyncio.ensure_future(self._resume_offered_file(transfer, future))
+        self._function_tasks.add(task)
+        task.add_done_callback(self._function_tasks.discard)
+
+    async def _resume_offered_file(self, transfer: FileTransfer, future: asyncio.Future) -> None:
+        """The signature of the old file is created in the function executor."""
+        try:
+            signature = await asyncio.get_event_loop().run_in_executor(self._function_executor, old_file_signature,
+                                                                       transfer)
+            data_packet = await self.resume_file(transfer, signature)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.set_exception(ConnectionError("Communicator stopped, before the response arrived."))
+            raise
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+        else:
+            if not future.done():
+                future.set_result(data_packet)
+
+    async def _recv_file_arguments(self, function_packet: FunctionPacket) -> bool:
+        """Receives the files, that are args or kwargs of the function-packet, in order."""
+        for file in function_packet.files:
+            if not await self._recv_file(file.dst_path, file.size):
+                return False
+        return True
+
+    async def _send_bytes(self, byte_string: bytes, encrypted: bool = True) -> None:
+        await self._send_segments([byte_string], encrypted)
+
+    async def _send_segments(self, segments: List[Union[bytes, memoryview]], encrypted: bool = True) -> None:
+        """Sends the segments of :func:`pynetworking.Packets.Packet.pack_segments`. Encrypted segments are joined,
+        because they are compressed and encrypted as one record. The transport has no vectored write, so small
+        segments are written at once and large segments one after another."""
+        if encrypted and self.cryptographer.is_encrypted_communication:
+            message = segments[0] if len(segments) == 1 else b"".join(segments)
+            if self.compressor is not None:
+                message = self.compressor.compress(message)
+            encrypted_bytes = self.cryptographer.encrypt(message)
+            segments = [pack_int(len(encrypted_bytes)), encrypted_bytes]
+        if sum(len(segment) for segment in segments) <= OUT_OF_BAND_THRESHOLD:
+            self._writer.write(b"".join(segments))
+        else:
+            for segment in segments:
+                self._writer.write(segment)
+        await self._writer.drain()
+
+    async def _received_function_packet(self, packet: FunctionPacket) -> None:
+        """Executes the function, with all args. Packs the return value or the exception in a data-packet and sends
+        it back. If a pynetworking.File is returned, a FileMetaPacket + the file itself is sent."""
+        function_id = packet.header.id_container.function_id
+        _current_client.set(self._connector)
+        try:
+            if isinstance(packet, BatchFunctionPacket):
+                ret_value = [await self._execute_batch_call(*call) for call in packet.calls]
+            elif isinstance(packet, FileRequestPacket):
+                return await self._send_requested_file(packet)
+            else:
+                ret_value = await self._execute_function(packet.function_name, packet.args, packet.kwargs)
+            if isinstance(packet, OneWayFunctionPacket):
+                return
+            if isinstance(ret_value, File):
+                return await self._send_file(ret_value, function_id)
+            if isinstance(ret_value, Directory):
+                return await self._send_directory(ret_value, function_id)
+            if is_stream(ret_value) or isinstance(ret_value, collections.abc.AsyncIterator):
+                return await self._send_stream(ret_value, function_id)
+        except asyncio.CancelledError:
+            raise
+        except:
+            if isinstance(packet, OneWayFunctionPacket):
+                logger.error(f"One-way function {packet.function_name} raised:\n{traceback.format_exc()}")
+                return
+            ret_value = ExceptionObject(*sys.exc_info())
+        try:
+            await self.send_packet(DataPacket(**{"return": ret_value}), function_id)
+        except OSError:
+            logger.error(f"Could not send return value of {packet.function_name}")
+
+    async def _execute_function(self, function_name: str, args: tuple, kwargs: dict) -> Any:
+        func = self._functions.__getattr__(function_name)
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        context = contextvars.copy_context()
+        return await asyncio.get_event_loop().run_in_executor(
+            self._function_executor, functools.partial(context.run, func, *args, **kwargs))
+
+    async def _execute_batch_call(self, function_name: str, args: tuple, kwargs: dict) -> Any:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._execute_batch_call`."""
+        try:
+            return await self._execute_function(function_name, args, kwargs)
+        except asyncio.CancelledError:
+            raise
+        except:
+            return ExceptionObject(*sys.exc_info())
+
+    async def _send_file(self, file: File, function_id: Optional[int] = None,
+                         manifest: Optional[FileManifest] = None, ranges: Optional[List[Tuple[int, int]]] = None,
+                         copies: Optional[List[Tuple[int, int, int]]] = None) -> None:
+        """Creates a FileMetaPacket, that is sent and followed by the file_content. No other packet may be sent in
+        between. A resumable file is hashed in the function executor first. A delta file is only offered."""
+        if manifest is None and (file.resumable or file.delta):
+            manifest = await asyncio.get_event_loop().run_in_executor(self._function_executor,
+                                                                      resumable_files.add, file)
+            if file.delta:
+                ranges = []
+        file_meta_packet = FileMetaPacket(file.src_path, file.size, file.dst_path, manifest, ranges, copies)
+        async with self._send_lock:
+            IDManager(self._id).set_ids_of_packet(file_meta_packet, function_id)
+            await self._send_packed(file_meta_packet)
+            await self._send_file_content(file, ranges)
+
+    async def _send_requested_file(self, packet: FileRequestPacket) -> None:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._send_requested_file`."""
+        resumable_file = resumable_files.get(packet.transfer_id)
+        if resumable_file is None:
+            raise ValueError("The file can't be resumed, because it changed or its transfer expired")
+        file, manifest = resumable_file
+        copies, ranges = await asyncio.get_event_loop().run_in_executor(self._function_executor, file_delta, file,
+                                                                        packet)
+        await self._send_file(file, packet.header.id_container.function_id, manifest, ranges, copies)
+
+    async def _send_file_content(self, file: File, ranges: Optional[List[Tuple[int, int]]] = None) -> None:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._send_file_content`."""
+        with open(file.src_path, "rb") as f:
+            for offset, length in (ranges if ranges is not None else [(0, file.size)]):
+                await self._send_file_range(file, f, offset, length)
+
+    async def _send_file_range(self, file: File, f, offset: int, remaining_bytes: int) -> None:
+        """Unencrypted files are sent with `loop.sendfile`. The records of encrypted files are read into one buffer,
+        but encrypted into new bytes, because the transport may keep them, till they are written."""
+        f.seek(offset)
+        if remaining_bytes > 0 and not self.cryptographer.is_encrypted_communication:
+            remaining_bytes -= await asyncio.get_event_loop().sendfile(self._writer.transport, f, offset,
+                                                                       remaining_bytes)
+        if remaining_bytes > 0 and self.cryptographer.is_encrypted_communication:
+            record_size = file.record_size or self.file_record_size
+            if self._record_buffer is None or len(self._record_buffer) < record_size:
+                self._record_buffer = bytearray(record_size)
+            for record in iter_file_records(f, remaining_bytes, memoryview(self._record_buffer)[:record_size]):
+                await self._send_bytes(record)
+            return
+        while remaining_bytes > 0:
+            file_data = f.read(min(self.CHUNK_SIZE, remaining_bytes))
+            if len(file_data) == 0:
+                logger.error(f"File shrank while sending: {file.src_path}")
+                file_data = bytes(min(self.CHUNK_SIZE, remaining_bytes))
+            await self._send_bytes(file_data)
+            remaining_bytes -= len(file_data)
+
+    async def _send_directory(self, directory: Directory, function_id: int) -> None:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._send_directory`. The
+        directory is scanned in the function executor."""
+        await asyncio.get_event_loop().run_in_executor(self._function_executor, directory.scan)
+        directory_packet = DirectoryPacket(directory)
+        async with self._send_lock:
+            IDManager(self._id).set_ids_of_packet(directory_packet, function_id)
+            await self._send_packed(directory_packet)
+            await self._send_directory_content(directory)
+
+    async def _send_directory_content(self, directory: Directory) -> None:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._send_directory_content`.
+        The records are read into one buffer, but sent as new bytes, because the transport may keep them."""
+        record_size = directory.record_size or self.file_record_size
+        if self._record_buffer is None or len(self._record_buffer) < record_size:
+            self._record_buffer = bytearray(record_size)
+        record_view = memoryview(self._record_buffer)[:record_size]
+        filled = 0
+        for relative_path, size in directory.files:
+            if filled + size > record_size and filled > 0:
+                await self._send_bytes(bytes(record_view[:filled]))
+                filled = 0
+            path = directory.source(relative_path)
+            if size <= record_size:
+                read_file_into(path, record_view[filled:filled + size])
+                filled += size
+                continue
+            with open_source_file(path) as f:
+                await self._send_file_range(File(path, "", size, record_size), f, 0, size)
+        if filled > 0:
+            await self._send_bytes(bytes(record_view[:filled]))
+
+    async def _send_stream(self, iterator: Union[Iterator, AsyncIterator], function_id: int) -> None:
+        """Async counterpart of :func:`pynetworking.Communication_general.Communicator._send_stream`. The items of a
+        normal iterator are taken in the function executor."""
+        credits = AsyncStreamCredits(self.STREAM_WINDOW)
+        self._stream_credits[function_id] = credits
+        ret_value = None
+        try:
+            async for chunk in self._iter_chunks(iterator):
+                if not await credits.take():
+                    break
+                await self.send_packet(StreamPacket(chunk), function_id)
+        except (asyncio.CancelledError, OSError):
+            raise
+        except:
+            ret_value = ExceptionObject(*sys.exc_info())
+        finally:
+            self._stream_credits.pop(function_id, None)
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+            elif hasattr(iterator, "close"):
+                try:
+                    iterator.close()
+                except ValueError:
+                    pass  # Still executed in the function executor, because the task was cancelled.
+        await self.send_packet(DataPacket(**{"return": ret_value}), function_id)
+
+    async def _iter_chunks(self, iterator: Union[Iterator, AsyncIterator]) -> AsyncIterator[list]:
+        if isinstance(iterator, collections.abc.AsyncIterator):
+            collector = ChunkCollector(self.STREAM_CHUNK_ITEMS, self.STREAM_CHUNK_BYTES)
+            try:
+                async for item in iterator:
+                    chunk = collector.add(item)
+                    if chunk is not None:
+                        yield chunk
+            except Exception:
+                chunk = collector.rest()
+                if chunk:
+                    yield chunk
+                raise
+            chunk = collector.rest()
+            if chunk is not None:
+                yield chunk
+            return
+        chunks = iter_chunks(iterator, self.STREAM_CHUNK_ITEMS, self.STREAM_CHUNK_BYTES)
+        context = contextvars.copy_context()
+        while True:
+            chunk = await asyncio.get_event_loop().run_in_executor(
+                self._function_executor, functools.partial(context.run, next, chunks, None))
+            if chunk is None:
+                return
+            yield chunk
+
+    async def stop(self, is_same_task=False) -> None:
+        """Stops receiving, cancels all running functions and closes the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._is_connected = False
+        for task in list(self._function_tasks):
+            task.cancel()
+        if self._receiver is not None and not is_same_task:
+            self._receiver.cancel()
+        for future in self._pending_calls.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Communicator stopped, before the response arrived."))
+        self._pending_calls.clear()
+        streams, self._streams = self._streams, {}
+        for stream in filter(None, (stream_ref() for stream_ref in streams.values())):
+            stream._fail(ConnectionError("Communicator stopped, before the stream ended."))
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        remove_manager(self._id)
+        if self._on_close is not None:
+            self._on_close(self)
+
+    def is_connected(self) -> bool:
+        return self._is_connected
+
+    def get_id(self) -> int:
+        return self._id
+
+
+class AsyncStreamCredits:
+    """Async counterpart of :class:`pynetworking.Communication_general.StreamCredits`."""
+
+    def __init__(self, credits: int) -> None:
+        self._credits = credits
+        self._cancelled = False
+        self._changed = asyncio.Event()
+
+    def add(self, credits: int) -> None:
+        if credits == StreamCreditPacket.CANCEL:
+            self._cancelled = True
+        else:
+            self._credits += credits
+        self._changed.set()
+
+    async def take(self) -> bool:
+        """Waits till a credit is available and takes it. Returns False if the stream was cancelled."""
+        while self._credits <= 0 and not self._cancelled:
+            self._changed.clear()
+            await self._changed.wait()
+        if self._cancelled:
+            return False
+        self._credits -= 1
+        return True
+
+
+class AsyncStreamIterator:
+    """Async counterpart of :class:`pynetworking.Communication_general.StreamIterator`.
+
+    .. code-block:: python
+
+        async for line in await server.remote_functions.read_lines(path):
+            ...
+    """
+
+    def __init__(self, communicator: AsyncCommunicator, function_id: int) -> None:
+        self._communicator = communicator
+        self._function_id = function_id
+        self._chunks: collections.deque = collections.deque()
+        self._changed = asyncio.Event()
+        self._items: Iterator = iter(())
+        self._end_packet: Optional[DataPacket] = None
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._taken_chunks = 0
+
+    def __aiter__(self) -> 'AsyncStreamIterator':
+        return self
+
+    async def __anext__(self) -> Any:
+        while True:
+            for item in self._items:
+                return item
+            self._items = iter(await self._next_chunk())
+
+    async def _next_chunk(self) -> list:
+        while not self._chunks:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise StopAsyncIteration
+            if self._end_packet is not None:
+                self._closed = True
+                unpack_return_value(self._end_packet)
+                raise StopAsyncIteration
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), self._communicator._timeout())
+            except asyncio.TimeoutError:
+                logger.warning("AsyncStreamIterator waited too long")
+                raise TimeoutError("AsyncStreamIterator waited too long")
+        chunk = self._chunks.popleft()
+        self._taken_chunks += 1
+        if self._taken_chunks >= max(1, self._communicator.STREAM_WINDOW // 2):
+            await self._communicator.send_packet(StreamCreditPacket(self._taken_chunks), self._function_id)
+            self._taken_chunks = 0
+        return chunk
+
+    def _put_chunk(self, items: list) -> None:
+        if not self._closed:
+            self._chunks.append(items)
+            self._changed.set()
+
+    def _end(self, data_packet: DataPacket) -> None:
+        self._end_packet = data_packet
+        self._changed.set()
+
+    def _fail(self, exception: Exception) -> None:
+        self._error = exception
+        self._changed.set()
+
+    def _close(self) -> bool:
+        """Returns whether the other side still sends items."""
+        if self._closed:
+            return False
+        self._closed = True
+        self._chunks.clear()
+        self._items = iter(())
+        return self._end_packet is None and self._error is None and self._communicator.is_connected()
+
+    async def aclose(self) -> None:
+        """Stops iterating. The remaining items are dropped and the remote iterator is closed."""
+        if self._close():
+            await self._communicator.send_packet(StreamCreditPacket(StreamCreditPacket.CANCEL), self._function_id)
+
+    def __del__(self) -> None:
+        try:
+            if self._close():
+                asyncio.ensure_future(self._communicator.send_packet(StreamCreditPacket(StreamCreditPacket.CANCEL),
+                                                                     self._function_id))
+        except Exception:
+            pass
+
+    async def __aenter__(self) -> 'AsyncStreamIterator':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+
+class AsyncRemoteFunctions:
+    """Awaitable counterpart of :class:`pynetworking.Communication_general.MetaFunctionCommunicator`. Every
+    attribute is a coroutine function, that calls the function with the same name at the other side."""
+
+    def __init__(self, connector: 'AsyncConnector', functions: Optional[Type[Functions]] = None) -> None:
+        self._connector = connector
+        self._functions = functions
+
+    def __call__(self, timeout: Optional[float] = None) -> 'AsyncRemoteFunctions':
+        """Sets the time, that is waited for a data-packet: `await remote_functions(timeout=2.5).function(...)`"""
+        if timeout is not None and self._connector.communicator is not None:
+            self._connector.communicator.wait_for_response_timeout = timeout
+        return self
+
+    def __getattr__(self, item: str):
+        if item.startswith("__", 0, 2):
+            raise AttributeError(item)
+
+        async def call(function_is_one_way: bool, args: tuple, kwargs: dict) -> Any:
+            communicator = self._connector.communicator
+            if communicator is None or not communicator.is_connected():
+                raise ConnectionError(
+                    "Communicator is not connected!"
+                    "Connect first to a server with `await AsyncServerCommunicator().connect(server_address)´")
+            if function_is_one_way:
+                try:
+                    await communicator.send_packet(OneWayFunctionPacket(item, *args, **kwargs))
+                except OSError:
+                    raise ConnectionError("Could not send function to server. Check connection to server.")
+                return None
+            data_packet = await communicator.call_function(FunctionPacket(item, *args, **kwargs))
+            return unpack_return_value(data_packet)
+
+        one_way = is_one_way(self._functions, item)
+
+        async def container(*args, **kwargs) -> Any:
+            return await call(one_way, args, kwargs)
+
+        container.one_way = lambda *args, **kwargs: call(True, args, kwargs)
+        return container
+
+
+class AsyncBatch(Batch):
+    """Async counterpart of :class:`pynetworking.Communication_general.Batch`.
+
+    .. code-block:: python
+
+        async with AsyncBatch(server.remote_functions) as batch:
+            futures = [batch.incrementer(i) for i in range(100)]
+        print([future.result() for future in futures])
+    """
+
+    def __init__(self, remote_functions: AsyncRemoteFunctions) -> None:
+        super().__init__(remote_functions)
+
+    async def send(self) -> list:
+        """Sends all collected calls and waits for their results."""
+        calls, futures = self._take_calls()
+        if not calls:
+            return self._resolve(futures, [])
+        communicator = self._remote_functions._connector.communicator
+        if communicator is None or not communicator.is_connected():
+            raise ConnectionError(
+                "Communicator is not connected!"
+                "Connect first to a server with `await AsyncServerCommunicator().connect(server_address)´")
+        try:
+            results = unpack_return_value(await communicator.call_function(BatchFunctionPacket(calls)))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            raise
+        return self._resolve(futures, results)
+
+    async def __aenter__(self) -> 'AsyncBatch':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            await self.send()
+        else:
+            for future in self._take_calls()[1]:
+                future.cancel()
+
+
+async def async_resume_file(remote_functions: AsyncRemoteFunctions, transfer: FileTransfer) -> File:
+    """Async counterpart of :func:`pynetworking.Communication_general.resume_file`.
+
+    .. code-block:: python
+
+        try:
+            file = await server.remote_functions.get_file("big.iso")
+        except net.IncompleteFileError as error:
+            await server.connect(server_address)
+            file = await net.async_resume_file(server.remote_functions, error.transfer)
+    """
+    communicator = remote_functions._connector.communicator
+    if communicator is None or not communicator.is_connected():
+        raise ConnectionError(
+            "Communicator is not connected!"
+            "Connect first to a server with `await AsyncServerCommunicator().connect(server_address)´")
+    return unpack_return_value(await communicator.resume_file(transfer))
+
+
+class AsyncConnector:
+    """Super class for :class:`AsyncServerCommunicator` and :class:`AsyncClientCommunicator`. Subclasses need to
+    set the attributes :code:`local_functions` and :code:`remote_functions`.
+
+    :ivar remote_functions: Class with all functions, that are available at the remote side. At an instance this
+        is an :class:`AsyncRemoteFunctions` proxy, whose functions are awaited.
+    :ivar local_functions: Class with all functions, that are locally available.
+    :ivar communicator: instance of :class:`AsyncCommunicator`.
+    """
+    remote_functions: Optional[Type[Functions]] = None
+    local_functions: Optional[Type[Functions]] = None
+
+    def __init__(self, id_: int) -> None:
+        self._id = id_
+        self._exchanged_keys = False
+        self._session_ticket: Optional[SessionTicket] = None
+        self.communicator: Optional[AsyncCommunicator] = None
+        self.remote_functions = AsyncRemoteFunctions(self, type(self).remote_functions)
+
+    def _create_communicator(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                             on_close: Optional[Callable[[AsyncCommunicator], Any]] = None,
+                             function_executor: Optional[FunctionExecutor] = None) -> None:
+        self.communicator = AsyncCommunicator(self._id, reader, writer, self.local_functions, self, on_close,
+                                              function_executor)
+        self.communicator.start()
+
+    async def close_connection(self) -> None:
+        if self.communicator is not None:
+            await self.communicator.stop()
+
+    def is_connected(self) -> bool:
+        return self.communicator is not None and self.communicator.is_connected()
+
+    def get_id(self) -> int:
+        return self._id
+
+    @property
+    def exchanged_keys(self) -> bool:
+        return self._exchanged_keys
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+
+class AsyncServerCommunicator(AsyncConnector):
+    """Client side class, that is responsible for communicating with the server. Like the
+    :class:`pynetworking.Communication_client.MultiServerCommunicator` each instance needs an id below 30. To call a
+    function at the server type: :code:`await server_communicator.remote_functions.dummy_function(x, y)`
+    """
+
+    def __init__(self, id_: int = 0) -> None:
+        super().__init__(to_client_id(id_))
+
+    async def connect(self, addr: SocketAddress, timeout=float("inf"), seconds_till_next_try: float = 0.5) -> bool:
+        """Connects to the server and exchanges the keys. Tries to connect till the timeout is reached. Returns False
+        if the server is not reachable in time."""
+        if self.is_connected():
+            return True
+        deadline = asyncio.get_event_loop().time() + timeout
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(*addr)
+                break
+            except socket.gaierror:
+                raise ValueError(
+                    f"Address error. {addr} is not a valid address. Address must be of type {SocketAddress}")
+            except OSError:
+                logger.warning("Could not connect to server with address: (%s)", str(addr))
+            remaining = deadline - asyncio.get_event_loop().time()
+            if remaining <= 0:
+                logger.warning("Connection timeout")
+                return False
+            await asyncio.sleep(min(seconds_till_next_try, remaining))
+        logger.info(f"Successfully connected to: {str(addr)}")
+        self._create_communicator(reader, writer)
+        if pynetworking.Communication_general.ENCRYPTED_COMMUNICATION:
+            await exchange_keys_client(self)
+        return True
+
+    async def __aenter__(self) -> 'AsyncServerCommunicator':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close_connection()
+
+
+class AsyncClientCommunicator(AsyncConnector):
+    """Server side class, that is responsible for communicating with a client. This class needs to be overwritten,
+    but is only instantiated by the :class:`AsyncClientManager`."""
+
+    @staticmethod
+    def get() -> 'AsyncClientCommunicator':
+        """Returns the client, that called the currently executed server-side function."""
+        client = _current_client.get()
+        if client is None:
+            raise Exception("No client connected. Function is not called by a client.")
+        return client
+
+
+class AsyncClientManager:
+    """Accepts new clients in the event loop and stores them. Every client is handled by an
+    :class:`AsyncClientCommunicator`. Use it as async context-manager or call :func:`start` and :func:`stop`.
+
+    Normal (not coroutine) functions are executed by the `function_executor`. Use the
+    :attr:`FunctionExecutor.REJECT` policy, because a blocking executor would block the event loop."""
+
+    def __init__(self, address: SocketAddress, client_communicator: Type[AsyncClientCommunicator],
+                 function_executor: Optional[FunctionExecutor] = None,
+                 session_tickets: Optional[SessionTickets] = None) -> None:
+        self.clients: Dict[int, AsyncClientCommunicator] = {}
+        self._next_client_id = 0
+        self._address = address
+        self._client_communicator = client_communicator
+        self.function_executor = function_executor
+        self.session_tickets = session_tickets if session_tickets is not None else SessionTickets()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start listening to new connections and accepts them"""
+        self._server = await asyncio.start_server(self._accept, self._address[0], self._address[1],
+                                                  reuse_address=True)
+        logger.info(f"Server is now listening on: {self._address[0]}:{self._address[1]}")
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        logger.info("New client connected: (%s)", str(writer.get_extra_info("peername")))
+        client_id = to_server_id(self._produce_next_client_id())
+        client = self._client_communicator(client_id)
+        client._create_communicator(reader, writer, self._remove_disconnected_client, self.function_executor)
+        self.clients[client_id] = client
+        if pynetworking.Communication_general.ENCRYPTED_COMMUNICATION:
+            try:
+                await exchange_keys_server(client, self.session_tickets)
+            except (ConnectionError, TimeoutError) as e:
+                logger.warning(f"Key exchange with client {client_id} failed: {e}")
+                await client.close_connection()
+
+    def _produce_next_client_id(self) -> int:
+        try:
+            return self._next_client_id
+        finally:
+            self._next_client_id += 1
+
+    def _remove_disconnected_client(self, communicator: AsyncCommunicator) -> None:
+        self.clients.pop(communicator.get_id(), None)
+
+    def get(self, client_id: Optional[int] = None) -> AsyncClientCommunicator:
+        """Returns the proper AsyncClientCommunicator. Without `client_id` it is the one who called the server-side
+        function."""
+        if client_id is None:
+            return AsyncClientCommunicator.get()
+        if client_id not in self.clients.keys():
+            raise Exception("No client connected. The client_id doesn't match any connected clients.")
+        return self.clients[client_id]
+
+    async def serve_forever(self) -> None:
+        """Runs the server till the task is cancelled."""
+        await self._server.serve_forever()
+
+    async def stop_listening(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            logger.info("Closed server listener")
+
+    async def stop_connections(self) -> None:
+        for client in list(self.clients.values()):
+            await client.close_connection()
+        self.clients.clear()
+
+    async def stop(self) -> None:
+        await self.stop_listening()
+        await self.stop_connections()
+
+    async def __aenter__(self) -> 'AsyncClientManager':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+
+async def exchange_keys_client(connector: AsyncServerCommunicator) -> None:
+    """Async counterpart of :func:`pynetworking.Communication_client.exchange_keys`."""
+    cryptographer = connector.communicator.cryptographer
+    session_ticket = connector._session_ticket
+    while True:
+        # A RSA key pair takes long to generate.
+        client_hello = await asyncio.get_event_loop().run_in_executor(
+            None, cryptographer.client_hello, pynetworking.Communication_general.KEY_EXCHANGE,
+            pynetworking.Communication_general.ACCEPTED_CIPHERS, session_ticket)
+        IDManager(connector.get_id()).append_dummy_functions(2)
+        client_hello["codecs"] = pynetworking.Communication_general.ACCEPTED_CODECS
+        client_hello["compressions"] = pynetworking.Communication_general.ACCEPTED_COMPRESSIONS
+        await connector.communicator.send_packet(DataPacket(**client_hello))
+        communication_packet = await connector.communicator.wait_for_response()
+        key_and_cipher = cryptographer.key_from_server_hello(communication_packet.data)
+        if key_and_cipher is not None:
+            break
+        logger.info("Session ticket was rejected by the server. Exchanging new keys.")
+        session_ticket = None
+    connector.communicator.compressor = new_compressor(communication_packet.data.get("compression"))
+    cryptographer.set_communication_key(*key_and_cipher)
+    connector.communicator.codec = communication_packet.data.get("codec", DILL)
+    connector._session_ticket = cryptographer.session_ticket
+    connector._exchanged_keys = True
+
+
+async def exchange_keys_server(client_communicator: AsyncClientCommunicator,
+                               session_tickets: Optional[SessionTickets] = None) -> None:
+    """Async counterpart of :func:`pynetworking.Communication_server.exchange_keys`."""
+    cryptographer = client_communicator.communicator.cryptographer
+    IDManager(client_communicator.id).append_dummy_functions(2)
+    while True:
+        public_key_packet = await client_communicator.communicator.wait_for_response()
+        server_hello, communication_key, cipher = cryptographer.server_hello(
+            public_key_packet.data, pynetworking.Communication_general.ACCEPTED_CIPHERS, session_tickets)
+        server_hello["codec"] = pynetworking.Communication_general.choose_codec(public_key_packet.data.get("codecs"))
+        server_hello["compression"] = pynetworking.Communication_general.choose_compression(
+            public_key_packet.data.get("compressions"))
+        if communication_key is None:
+            IDManager(client_communicator.id).append_dummy_functions(2)
+        else:
+            # The client sends encrypted and compressed data as soon as it received the answer.
+            client_communicator.communicator.compressor = new_compressor(server_hello["compression"])
+            cryptographer.set_communication_key(communication_key, cipher, is_server=True)
+        await client_communicator.communicator.send_packet(DataPacket(**server_hello), encrypted=False)
+        if communication_key is not None:
+            break
+    client_communicator.communicator.codec = server_hello["codec"]
+    client_communicator._exchanged_keys = True
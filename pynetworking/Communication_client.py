@@ -28,9 +28,12 @@ private functions
 from typing import Union, Type, Optional
 
 from pynetworking.Logging import logger
-from pynetworking.Communication_general import Connector, SingleConnector, MultiConnector, Functions, SocketAddress
+import pynetworking.Communication_general
+from pynetworking.Communication_general import Connector, SingleConnector, MultiConnector, Functions, SocketAddress, \
+    new_compressor
 from pynetworking.Packets import DataPacket
 from pynetworking.ID_management import IDManager
+from pynetworking.Data import DILL
 
 
 class ServerCommunicator(SingleConnector):
@@ -65,22 +68,30 @@ class ServerFunctions(Functions):
 
 
 def exchange_keys(connector: Union['Connector', Type['SingleConnector']]):
-    """Exchanges a symmetric `communication key` with the server. The `communication key` is received from the
-    server. It is decrypted with the private key. After this function, all packets are encrypted with this
-    `communication key`"""
-    # generate public key + private key
+    """Exchanges a symmetric `communication key` with the server. Depending on the key exchange, the `communication
+    key` is received from the server and decrypted with the private key, or it is derived from the X25519 public key
+    of the server. If the connector has a session ticket of a previous connection, the session is resumed instead.
+    After this function, all packets are encrypted with this `communication key`"""
     cryptographer = connector.communicator.cryptographer
-    cryptographer.generate_key_pair()
-    serialized_public_key = cryptographer.get_serialized_public_key()
-    IDManager(connector.get_id()).append_dummy_functions(2)
-    # send public key
-    public_key_packet = DataPacket(public_key=serialized_public_key)
-    connector.communicator.send_packet(public_key_packet)
-    # wait for communication key
-    communication_packet = connector.communicator.wait_for_response()
-    encrypted_communication_key = communication_packet.data["communication_key"]
-    # decrypt key with private key
-    communication_key = cryptographer.decrypt_with_private_key(encrypted_communication_key)
-    # set communication key
-    cryptographer.communication_key = communication_key
+    session_ticket = connector._session_ticket
+    while True:
+        IDManager(connector.get_id()).append_dummy_functions(2)
+        # send public key or session ticket
+        client_hello = cryptographer.client_hello(pynetworking.Communication_general.KEY_EXCHANGE,
+                                                  pynetworking.Communication_general.ACCEPTED_CIPHERS, session_ticket)
+        client_hello["codecs"] = pynetworking.Communication_general.ACCEPTED_CODECS
+        client_hello["compressions"] = pynetworking.Communication_general.ACCEPTED_COMPRESSIONS
+        connector.communicator.send_packet(DataPacket(**client_hello))
+        # wait for communication key
+        communication_packet = connector.communicator.wait_for_response()
+        key_and_cipher = cryptographer.key_from_server_hello(communication_packet.data)
+        if key_and_cipher is not None:
+            break
+        logger.info("Session ticket was rejected by the server. Exchanging new keys.")
+        session_ticket = None
+    # set communication key, the compression of the received messages must be known before
+    connector.communicator.compressor = new_compressor(communication_packet.data.get("compression"))
+    cryptographer.set_communication_key(*key_and_cipher)
+    connector.communicator.codec = communication_packet.data.get("codec", DILL)
+    connector._session_ticket = cryptographer.session_ticket
     connector._exchanged_keys = True
@@ -33,6 +33,22 @@ Communicator, Connector, SocketAddress, Functions, to_server_id
     :members:
     :undoc-members:
 
+.. autoclass:: Batch
+    :members: call, send
+
+.. autoclass:: StreamIterator
+    :members: close
+
+.. autoclass:: FunctionExecutor
+    :members: submit, shutdown
+
+.. autoclass:: Reactor
+    :members: register, unregister, run, stop, close
+
+.. autoexception:: ExecutionRejectedError
+
+.. autoexception:: IncompleteFileError
+
 
 public functions
 ----------------
@@ -40,6 +56,15 @@ public functions
 .. autofunction:: to_server_id
 .. autofunction:: to_client_id
 .. autofunction:: set_encrypted_communication
+.. autofunction:: set_ciphers
+.. autofunction:: set_key_exchange
+.. autofunction:: set_codecs
+.. autofunction:: set_compressions
+.. autofunction:: unpack_return_value
+.. autofunction:: get_calling_communicator_id
+.. autofunction:: one_way
+.. autofunction:: is_stream
+.. autofunction:: resume_file
 
 private classes
 -----------------
@@ -57,19 +82,47 @@ private classes
 
 .. autoclass:: FunctionExecutionThread
 
+.. autoclass:: CallFuture
+
+.. autoclass:: StreamCredits
+    :members:
+
+.. autoclass:: ChunkCollector
+    :members:
+
+.. autofunction:: iter_chunks
+
 """
+import collections
+import collections.abc
+import functools
+import os
+import select
+import selectors
 import threading
 import socket
 import time
 import traceback
 import sys
-from typing import Tuple, List, Dict, Optional, Callable, Any, Type, Union
-
-from pynetworking.Cryptography import Cryptographer
+import queue
+import concurrent.futures
+import weakref
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+from typing import Tuple, List, Dict, Optional, Callable, Any, Type, Union, Iterator
+
+from pynetworking.Cryptography import Cryptographer, SessionTicket, FERNET, CIPHERS, RSA, KEY_EXCHANGES, \
+    AEAD_TAG_SIZE
+from pynetworking.Compression import Compressor, COMPRESSIONS
 from pynetworking.Logging import logger
-from pynetworking.Packets import Packet, DataPacket, FunctionPacket, FileMetaPacket, Header
+from pynetworking.Packets import Packet, DataPacket, FunctionPacket, OneWayFunctionPacket, BatchFunctionPacket, \
+    FileRequestPacket, FileMetaPacket, DirectoryPacket, StreamPacket, StreamCreditPacket, Header
 from pynetworking.ID_management import IDManager, remove_manager
-from pynetworking.Data import ByteStream, File
+from pynetworking.Data import ByteStream, ReceiveBuffer, File, Directory, FileWriters, FileManifest, FileTransfer, \
+    FileSignature, ResumableFiles, file_version, open_source_file, read_file_into, pack_int, send_segments, \
+    iter_file_records, DILL, BINARY, CODECS
 
 SocketAddress = Tuple[str, int]
 
@@ -78,6 +131,27 @@ CLIENT_ID_START = 30
 SERVER_ID_START = 0  # Max 30 servers
 
 ENCRYPTED_COMMUNICATION = True
+ACCEPTED_CIPHERS = [FERNET]
+KEY_EXCHANGE = RSA
+ACCEPTED_CODECS = [BINARY, DILL]
+ACCEPTED_COMPRESSIONS: List[str] = []
+
+_SPLICE_SIZE = 1 << 20
+
+
+def _is_readable(socket_connection: socket.socket) -> bool:
+    """Checks without waiting, if data can be received. The socket timeout makes every recv wait, even with
+    MSG_DONTWAIT. Windows has no poll, so a reactor worker reads once per wake up there."""
+    if not hasattr(select, "poll"):
+        return False
+    poller = select.poll()
+    poller.register(socket_connection, select.POLLIN)
+    return bool(poller.poll(0))
+
+
+_function_context = threading.local()
+
+resumable_files = ResumableFiles()
 
 
 def set_encrypted_communication(value: bool):
@@ -86,6 +160,71 @@ def set_encrypted_communication(value: bool):
     ENCRYPTED_COMMUNICATION = value
 
 
+def set_ciphers(ciphers: List[str]):
+    """Sets the ciphers of :mod:`pynetworking.Cryptography`, that are accepted at the key exchange, in the order of
+    preference. The server chooses the first of its ciphers, that the client also accepts. :data:`FERNET` is used, if
+    there is no such cipher."""
+    for cipher in ciphers:
+        if cipher not in CIPHERS:
+            raise ValueError(f"Unknown cipher: {cipher}. Cipher must be one of {CIPHERS}")
+    global ACCEPTED_CIPHERS
+    ACCEPTED_CIPHERS = list(ciphers)
+
+
+def set_key_exchange(key_exchange: str):
+    """Sets the key exchange of :mod:`pynetworking.Cryptography`, that the client uses. The server accepts every key
+    exchange."""
+    if key_exchange not in KEY_EXCHANGES:
+        raise ValueError(f"Unknown key exchange: {key_exchange}. Key exchange must be one of {KEY_EXCHANGES}")
+    global KEY_EXCHANGE
+    KEY_EXCHANGE = key_exchange
+
+
+def set_codecs(codecs: List[str]):
+    """Sets the codecs of :mod:`pynetworking.Data`, that are accepted at the key exchange, in the order of
+    preference. The server chooses the first codec of the client, that it also accepts. :data:`DILL` is used, if
+    there is no such codec, or if the communication is not encrypted (there is no key exchange then)."""
+    for codec in codecs:
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}. Codec must be one of {CODECS}")
+    global ACCEPTED_CODECS
+    ACCEPTED_CODECS = list(codecs)
+
+
+def choose_codec(client_codecs: Optional[List[str]]) -> str:
+    """Returns the codec, that the server chooses for the codecs of the client hello. Clients, that don't send
+    codecs, only know :data:`DILL`."""
+    for codec in client_codecs or ():
+        if codec in ACCEPTED_CODECS:
+            return codec
+    return DILL
+
+
+def set_compressions(compressions: List[str]):
+    """Sets the compressions of :mod:`pynetworking.Compression`, that are accepted at the key exchange, in the order
+    of preference. The server chooses the first compression of the client, that it also accepts. By default no
+    compression is accepted. The messages are not compressed, if there is no such compression, or if the
+    communication is not encrypted (there is no key exchange then)."""
+    for compression in compressions:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}. Compression must be one of {COMPRESSIONS}")
+    global ACCEPTED_COMPRESSIONS
+    ACCEPTED_COMPRESSIONS = list(compressions)
+
+
+def choose_compression(client_compressions: Optional[List[str]]) -> Optional[str]:
+    """Returns the compression, that the server chooses for the compressions of the client hello. None if the
+    messages are not compressed."""
+    for compression in client_compressions or ():
+        if compression in ACCEPTED_COMPRESSIONS:
+            return compression
+    return None
+
+
+def new_compressor(compression: Optional[str]) -> Optional[Compressor]:
+    return Compressor(compression) if compression is not None else None
+
+
 def to_client_id(id_: int) -> int:
     return int(id_ + CLIENT_ID_START)
 
@@ -94,14 +233,34 @@ def to_server_id(id_: int) -> int:
     return int(id_ + SERVER_ID_START)
 
 
+def get_calling_communicator_id() -> Optional[int]:
+    """Returns the id of the communicator, that received the function, which is executed in the current thread.
+    Returns None if the current thread doesn't execute a received function."""
+    return getattr(_function_context, "communicator_id", None)
+
+
 class Communicator(threading.Thread):
     """Super class for all communicators. It handles a tcp-socket connection. Can send and receive packets and
     handles them. Responsible for connecting to another tcp-socket.
+
+    A function, that returns a generator or iterator, streams its items in :class:`StreamPacket` chunks. The first
+    chunk has one item and every further chunk doubles, till it has `STREAM_CHUNK_ITEMS` items or
+    `STREAM_CHUNK_BYTES` bytes of bytes-like and str items. At most `STREAM_WINDOW` chunks are sent, that the
+    receiving :class:`StreamIterator` has not taken yet.
+
+    At encrypted connections files are encrypted in records of `file_record_size` bytes (default `FILE_RECORD_SIZE`),
+    unless the :class:`File` has its own `record_size`. Every record is verified at receiving. The records are read
+    and encrypted in buffers, that are kept for the next files.
     """
     CHUNK_SIZE = 4096
+    FILE_RECORD_SIZE = 256 * 1024
+    STREAM_WINDOW = 8
+    STREAM_CHUNK_ITEMS = 256
+    STREAM_CHUNK_BYTES = 1 << 20
 
     def __init__(self, address: SocketAddress, id_, socket_connection: socket.socket = None, from_accept=False,
-                 on_close: Optional[Callable[['Communicator'], Any]] = None, local_functions=Type['Functions']) -> None:
+                 on_close: Optional[Callable[['Communicator'], Any]] = None, local_functions=Type['Functions'],
+                 function_executor: Optional['FunctionExecutor'] = None, reactor: Optional['Reactor'] = None) -> None:
         super().__init__(name=f"{'Client' if from_accept else 'Server'}_Communicator_thread_{id_}")
         self._recv_timeout = 1
 
@@ -114,14 +273,30 @@ class Communicator(threading.Thread):
         self._is_connected = from_accept
         self._keep_connection = not from_accept
         self._packets: List[Packet] = []
+        self._packets_available = threading.Condition()
+        self._pending_calls: Dict[int, 'CallFuture'] = {}
+        self._pending_calls_lock = threading.Lock()
+        self._streams: Dict[int, weakref.ref] = {}
+        self._stream_credits: Dict[int, StreamCredits] = {}
+        self._file_transfers: Dict[bytes, FileTransfer] = {}
+        self._send_lock = threading.RLock()
         self._exit = threading.Event()
-        self._time_till_next_check = 0.3
         self._on_close = on_close
         self._functions: Type['Functions'] = local_functions
-        self._auto_execute_functions = from_accept
+        self._auto_execute_functions = True
+        self._function_executor = function_executor
         self._closed = False
         self.wait_for_response_timeout = float("inf")
+        self.file_record_size = self.FILE_RECORD_SIZE
+        self._record_buffers: Optional[Tuple[bytearray, bytearray]] = None
         self.cryptographer = Cryptographer()
+        self.codec = DILL
+        self.compressor: Optional[Compressor] = None
+        self._reactor = reactor
+        if reactor is not None:
+            # Without own thread, the packets are received with :func:`receive_available`. Most connections of a
+            # reactor are idle, so their buffers start small.
+            self._reset_receive_buffers(self.CHUNK_SIZE)
 
     def run(self) -> None:
         """Connects to a tcp-socket. When it is connected, it listens to packets, that are sent from the other
@@ -131,51 +306,141 @@ class Communicator(threading.Thread):
         if self.is_connected():
             self._wait_for_new_input()
 
-    def send_packet(self, packet: Packet) -> bool:
-        """Set the proper ids and converts/packs the packet into bytes. Sends the bytes string."""
-        IDManager(self._id).set_ids_of_packet(packet)
-        send_data = packet.pack()
-        successfully_sent = self._send_bytes(send_data)
+    def send_packet(self, packet: Packet, function_id: Optional[int] = None, encrypted: bool = True) -> bool:
+        """Set the proper ids and converts/packs the packet into bytes. Sends the bytes string. A data-packet,
+        that answers a function-packet, must pass the `function_id` of this function-packet. The last message of the
+        key exchange is sent with `encrypted=False`, after the communication key is set."""
+        with self._send_lock:
+            IDManager(self._id).set_ids_of_packet(packet, function_id)
+            return self._send_packed(packet, encrypted)
+
+    def call_function(self, function_packet: FunctionPacket) -> 'CallFuture':
+        """Sends the function-packet and returns a future, that is resolved with the data-packet that has the same
+        function_id. Many calls may be pending at the same time, their responses can arrive in any order."""
+        with self._send_lock:
+            IDManager(self._id).set_ids_of_packet(function_packet)
+            future = CallFuture(function_packet.header.id_container.function_id)
+            with self._pending_calls_lock:
+                self._pending_calls[future.function_id] = future
+            if not self._send_packed(function_packet):
+                self._pop_pending_call(future.function_id)
+                raise ConnectionError("Could not send function to server. Check connection to server.")
+        return future
+
+    def wait_for_result(self, future: 'CallFuture') -> DataPacket:
+        """Waits till the future of :func:`call_function` is resolved, at most `wait_for_response_timeout`
+        seconds."""
+        timeout = self.wait_for_response_timeout
+        try:
+            return future.result(None if timeout < 0 or timeout == float("inf") else timeout)
+        except concurrent.futures.TimeoutError:
+            self._pop_pending_call(future.function_id)
+            logger.warning("wait_for_result waited too long")
+            raise TimeoutError("wait_for_result waited too long")
+
+    def _send_packed(self, packet: Packet, encrypted: bool = True) -> bool:
+        """Must be called with the send lock. The content of the file arguments of a function-packet is sent
+        directly after it."""
+        segments = packet.pack_segments(self.codec)
+        successfully_sent = self._send_segments(segments, encrypted)
+        if successfully_sent and isinstance(packet, FunctionPacket):
+            successfully_sent = all(self._send_file_content(file) for file in packet.files)
         if not successfully_sent:
             logger.error("Could not send packet: %s", str(packet))
         return successfully_sent
 
+    def _pop_pending_call(self, function_id: int) -> Optional['CallFuture']:
+        with self._pending_calls_lock:
+            return self._pending_calls.pop(function_id, None)
+
+    def _resolve_call(self, packet: Union[DataPacket, FileMetaPacket, DirectoryPacket]) -> bool:
+        """Resolves the future, that waits for this packet. Returns False if no call is waiting for it."""
+        function_id = packet.header.id_container.function_id
+        future = self._pop_pending_call(function_id)
+        if future is None:
+            return False
+        future.set_result(as_data_packet(packet))
+        return True
+
+    def _received_stream_packet(self, packet: StreamPacket) -> None:
+        """The first chunk of a stream resolves the call with a :class:`StreamIterator`. The following chunks are
+        added to it."""
+        function_id = packet.header.id_container.function_id
+        stream_ref = self._streams.get(function_id)
+        if stream_ref is None:
+            future = self._pop_pending_call(function_id)
+            if future is None:
+                logger.warning(f"Dropped stream of a call, that is not pending anymore: {packet}")
+                self.send_packet(StreamCreditPacket(StreamCreditPacket.CANCEL), function_id)
+                return
+            stream = StreamIterator(self, function_id)
+            self._streams[function_id] = weakref.ref(stream)
+            stream._put_chunk(packet.items)
+            future.set_result(DataPacket(**{"return": stream}))
+            return
+        stream = stream_ref()
+        if stream is not None:
+            stream._put_chunk(packet.items)
+
+    def _end_stream(self, packet: DataPacket) -> bool:
+        """The data-packet ends the stream with the same function_id. Returns False if there is no such stream."""
+        stream_ref = self._streams.pop(packet.header.id_container.function_id, None)
+        if stream_ref is None:
+            return False
+        stream = stream_ref()
+        if stream is not None:
+            stream._end(packet)
+        return True
+
     def wait_for_response(self):
-        """Waits till a data-packet is received and returns it. If a function packet is received instead it is
-        executed first."""
-        waited = 0.
+        """Waits till a data-packet, that no call is waiting for (e.g. at the key exchange), is received and returns
+        it. If a function packet is received instead it is executed first. The receiving thread notifies the waiting
+        thread as soon as a new packet arrives."""
+        timeout = self.wait_for_response_timeout
+        deadline = time.monotonic() + timeout if timeout >= 0 else float("inf")
         while not self._exit.is_set():
-            next_global_id = IDManager(self._id).get_next_outer_id()
-            try:
+            next_packet = self._next_packet(deadline)
+            if isinstance(next_packet, FunctionPacket):
+                """execute and keep waiting for data"""
+                self._handle_packet(next_packet)
+            elif isinstance(next_packet, (DataPacket, FileMetaPacket, DirectoryPacket)):
+                return as_data_packet(next_packet)
+            elif next_packet is not None:
+                logger.error(f"Received not implemented Packet class: {type(next_packet)}")
+
+    def poll_response(self) -> Optional[DataPacket]:
+        """Like :func:`wait_for_response`, but returns None immediately, if no data-packet was received yet."""
+        while True:
+            with self._packets_available:
+                if len(self._packets) == 0:
+                    return None
                 next_packet = self._packets.pop(0)
-                actual_outer_id = next_packet.header.id_container.global_id
-                if actual_outer_id > next_global_id:
-                    logger.error(f"Packet lost! Expected outer_id: {next_global_id}. Got instead: {actual_outer_id}")
-                    # TODO: handle
-                elif actual_outer_id < next_global_id:
-                    logger.error(f"Unhandled Packet! Expected outer_id: {next_global_id}. "
-                                 f"actual: {actual_outer_id}, Communicator id: {self._id}")
-                    # TODO: handle (if possible)
-                else:
-                    if isinstance(next_packet, Packet):
-                        self._handle_packet(next_packet)
-                    if isinstance(next_packet, FunctionPacket):
-                        """execute and keep waiting for data"""
-                    elif isinstance(next_packet, DataPacket):
-                        return next_packet
-                    elif isinstance(next_packet, FileMetaPacket):
-                        """File is already transmitted."""
-                        return DataPacket(**{"return": File.from_meta_packet(next_packet)})
-                    else:
-                        logger.error(f"Received not implemented Packet class: {type(next_packet)}")
-
-            except IndexError:
-                pass  # List is empty -> wait
-            self._exit.wait(self._time_till_next_check)
-            waited += self._time_till_next_check
-            if waited > self.wait_for_response_timeout >= 0:
-                logger.warning("wait_for_response waited too long")
-                raise TimeoutError("wait_for_response waited too long")
+            if isinstance(next_packet, FunctionPacket):
+                self._handle_packet(next_packet)
+            elif isinstance(next_packet, (DataPacket, FileMetaPacket, DirectoryPacket)):
+                return as_data_packet(next_packet)
+            else:
+                logger.error(f"Received not implemented Packet class: {type(next_packet)}")
+
+    def _next_packet(self, deadline: float) -> Optional[Packet]:
+        """Blocks till a packet is available, the communicator is stopped or the deadline is reached. The lock is
+        released before the packet is handled, so nested function calls can keep receiving."""
+        with self._packets_available:
+            while len(self._packets) == 0:
+                if self._exit.is_set():
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("wait_for_response waited too long")
+                    raise TimeoutError("wait_for_response waited too long")
+                self._packets_available.wait(None if remaining == float("inf") else remaining)
+            return self._packets.pop(0)
+
+    def _put_packet(self, packet: Packet) -> None:
+        """Stores a received packet and wakes up every thread, that is waiting for a response."""
+        with self._packets_available:
+            self._packets.append(packet)
+            self._packets_available.notify_all()
 
     def _connect(self, seconds_till_next_try: float = 2, timeout: float = -1) -> bool:
         waited = 0
@@ -206,53 +471,140 @@ class Communicator(threading.Thread):
 
     def _wait_for_new_input(self):
         """Loop that is constantly receiving or waiting for new packets from the tcp-connection."""
-        plain_byte_stream = ByteStream(b'')
-        encrypted_byte_stream = ByteStream(b'')
+        self._reset_receive_buffers()
         while not self._exit.is_set():
             if not self._exit.is_set() and not self._is_connected:
                 if self._keep_connection:
                     self._connect()
+                    self._reset_receive_buffers()
                 else:
                     self.stop(is_same_thread=True)
                     continue
-            packet = self._recv_packet(plain_byte_stream, encrypted_byte_stream)
+            packet = self._recv_packet(self._packet_builder, self._encrypted_buffer)
             if packet is not None:
-                if isinstance(packet, FileMetaPacket):
-                    self._recv_file(packet, plain_byte_stream, encrypted_byte_stream)
-                    self._packets.append(packet)
-                elif self._auto_execute_functions and isinstance(packet, FunctionPacket):
-                    func_thread = FunctionExecutionThread(self._id, packet, self._handle_packet)
-                    func_thread.start()
-                else:
-                    self._packets.append(packet)
-
-    def _recv_data(self, plain_byte_stream: ByteStream, encrypted_byte_stream: ByteStream) -> \
-            Optional[bytes]:
-        """Returns every chunk, that can be decrypted"""
-        data = plain_byte_stream.next_all_bytes()
-        plain_byte_stream.remove_consumed_bytes()
-        if len(data) > 0:
-            return data
-        encrypted_data = encrypted_byte_stream.next_all_bytes()
-        encrypted_byte_stream.remove_consumed_bytes()
+                self._received_packet(packet)
+
+    def receive_available(self) -> bool:
+        """Receives the available data of the readable socket and handles all packets, that can be built from it.
+        This is called by the :class:`Reactor` instead of a receiving thread. Reads don't wait, once the socket is
+        drained. Only file content, that follows a packet, is waited for. Returns False and stops the communicator, if
+        the connection was closed."""
+        for i in range(Reactor.MAX_READS):
+            if i > 0 and not _is_readable(self._socket_connection):
+                break
+            if self.cryptographer.is_encrypted_communication:
+                buffer, missing_bytes = self._encrypted_buffer, self._encrypted_buffer.missing_record_bytes()
+            else:
+                buffer, missing_bytes = self._plain_buffer, self._packet_builder.missing_bytes()
+            try:
+                received = buffer.recv_into(self._socket_connection, max(self.CHUNK_SIZE, missing_bytes))
+            except socket.timeout:
+                break
+            except OSError:
+                received = 0
+            if received == 0:
+                self._is_connected = False
+                break
+            packet = self._next_buffered_packet()
+            while packet is not None and not self._exit.is_set():
+                self._received_packet(packet)
+                packet = self._next_buffered_packet()
+            if self._exit.is_set() or not self._is_connected:
+                break
+        if self._exit.is_set():
+            return False
+        if not self._is_connected:
+            logger.info("Connection reset, (%s)", str(self._address))
+            self.stop(is_same_thread=True)
+            return False
+        return True
+
+    def _next_buffered_packet(self) -> Optional[Packet]:
+        """Builds the next packet from the received data, without receiving more. Encrypted records are decrypted
+        only when the plain data is not enough."""
+        while True:
+            packet = self._packet_builder.next_packet()
+            if packet is not None or not self.cryptographer.is_encrypted_communication:
+                return packet
+            record = self._encrypted_buffer.next_record()
+            if record is None:
+                return None
+            decrypt_record(self.cryptographer, record, self._plain_buffer, self.compressor)
+            self._encrypted_buffer.remove_consumed_bytes()
+
+    def _reset_receive_buffers(self, capacity: int = ReceiveBuffer.INITIAL_CAPACITY) -> None:
+        self._plain_buffer = ReceiveBuffer(capacity)
+        self._encrypted_buffer = ReceiveBuffer(capacity)
+        self._packet_builder = PacketBuilder(self._plain_buffer)
+
+    def _received_packet(self, packet: Packet) -> None:
+        """Handles a received packet. The content of files, that follow the packet, is received first."""
+        plain_buffer, encrypted_buffer = self._plain_buffer, self._encrypted_buffer
+        IDManager(self._id).update_ids_by_packet(packet)
+        if isinstance(packet, StreamPacket):
+            self._received_stream_packet(packet)
+            return
+        if isinstance(packet, StreamCreditPacket):
+            credits = self._stream_credits.get(packet.header.id_container.function_id)
+            if credits is not None:
+                credits.add(packet.credits)
+            return
+        if isinstance(packet, FileMetaPacket) and packet.is_offer:
+            self._request_offered_file(packet)
+            return
+        if isinstance(packet, (FileMetaPacket, DirectoryPacket)):
+            error = self._recv_file_packet(packet, plain_buffer, encrypted_buffer)
+            if error is not None:
+                future = self._pop_pending_call(packet.header.id_container.function_id)
+                if future is not None:
+                    future.set_exception(error)
+                return
+        elif isinstance(packet, FunctionPacket):
+            for file in packet.files:
+                self._recv_file(file.dst_path, file.size, plain_buffer, encrypted_buffer)
+        if isinstance(packet, (DataPacket, FileMetaPacket, DirectoryPacket)):
+            if self._streams and self._end_stream(packet):
+                return
+            if self._resolve_call(packet):
+                return
+            if packet.header.id_container.function_id >= 0:
+                logger.warning(f"Dropped response of a call, that is not pending anymore: {packet}")
+                return
+            self._put_packet(packet)
+        elif self._auto_execute_functions and isinstance(packet, FunctionPacket):
+            self._execute_function_packet(packet)
+        else:
+            self._put_packet(packet)
+
+    def _recv_data(self, plain_buffer: ReceiveBuffer, encrypted_buffer: ReceiveBuffer,
+                   num_bytes: int = CHUNK_SIZE) -> bool:
+        """Receives data from the socket and appends the decrypted data to the plain_buffer. Unencrypted data is
+        received directly into the plain_buffer. Returns False if nothing was received, because of a timeout or a
+        closed connection."""
         try:
             while not self._exit.is_set():
-                chunk_data = self._socket_connection.recv(self.CHUNK_SIZE)
-                if chunk_data == b"":
+                if not self.cryptographer.is_encrypted_communication:
+                    num_bytes = max(num_bytes, self.CHUNK_SIZE)
+                    received = plain_buffer.recv_into(self._socket_connection, num_bytes)
+                    if received > 0 and self.cryptographer.is_encrypted_communication:
+                        # The communication key was set, while waiting for data.
+                        encrypted_buffer += plain_buffer.pop_last(received)
+                        continue
+                else:
+                    # Multiple records may arrive at once. Remaining records are handled at the next call.
+                    record = encrypted_buffer.next_record()
+                    if record is not None:
+                        decrypt_record(self.cryptographer, record, plain_buffer, self.compressor)
+                        encrypted_buffer.remove_consumed_bytes()
+                        return True
+                    num_bytes = max(encrypted_buffer.missing_record_bytes(), num_bytes, self.CHUNK_SIZE)
+                    received = encrypted_buffer.recv_into(self._socket_connection, num_bytes)
+                if received == 0:
                     logger.info("Connection reset, (%s)", str(self._address))
                     self._is_connected = False
-                    return None
-                else:
-                    if not self.cryptographer.is_encrypted_communication:
-                        return chunk_data
-                    if b"%%" in chunk_data:
-                        corresponding_data = chunk_data.split(b"%%")[0]
-                        encrypted_data += corresponding_data
-                        encrypted_byte_stream += chunk_data[len(corresponding_data) + 2:]
-                        data += self.cryptographer.decrypt(encrypted_data)
-                        return data
-                    else:
-                        encrypted_data += chunk_data
+                    return False
+                if not self.cryptographer.is_encrypted_communication:
+                    return True
 
         except ConnectionResetError:
             if not self._exit.is_set():
@@ -269,61 +621,215 @@ class Communicator(threading.Thread):
                 if not self._exit.is_set():
                     logger.warning("TCP connection closed while listening")
                 self._is_connected = False
+        return False
 
-    def _recv_packet(self, plain_byte_stream: ByteStream, encrypted_byte_stream: ByteStream,) -> Optional[Packet]:
-        """Receives bytes till a packet can be build. This packet is returned"""
-        packet_builder = PacketBuilder(plain_byte_stream)
+    def _recv_packet(self, packet_builder: 'PacketBuilder', encrypted_buffer: ReceiveBuffer) -> Optional[Packet]:
+        """Receives bytes till a packet can be build. This packet is returned. Returns None if no packet could be
+        build, because of a timeout or a closed connection."""
         while not self._exit.is_set():
-            chunk_data = self._recv_data(plain_byte_stream, encrypted_byte_stream)
-            if chunk_data == b"" or chunk_data is None:
-                return None
-            else:
-                possible_packet = packet_builder.add_chunk(chunk_data)
+            possible_packet = packet_builder.next_packet()
+            if possible_packet is not None:
                 logger.debug(possible_packet)
-                if possible_packet is not None:
-                    return possible_packet
+                return possible_packet
+            if not self._recv_data(packet_builder.byte_stream, encrypted_buffer, packet_builder.missing_bytes()):
+                return None
 
-    def _recv_file(self, file_meta_packet: FileMetaPacket, plain_byte_stream: ByteStream,
-                   encrypted_byte_stream: ByteStream,) -> None:
+    def _recv_file(self, dst_path: str, file_size: int, plain_buffer: ReceiveBuffer,
+                   encrypted_buffer: ReceiveBuffer, ranges: Optional[List[Tuple[int, int]]] = None) -> bool:
         """Receives bytes, till the file is fully received. The file is saved at the destination, given in the
-        file_meta_packet."""
-        file_path = file_meta_packet.dst_path
-        existing_bytes = plain_byte_stream.next_all_bytes()
-        with open(file_path, "wb+") as file:
-            file.write(existing_bytes)
-        remaining_bytes = file_meta_packet.file_size - len(existing_bytes)
-        appended_data = b""
-        with open(file_path, "ab") as file:
-            while remaining_bytes > 0:
-                data = self._recv_data(plain_byte_stream, encrypted_byte_stream)
-                if data is None:
+        file-meta-packet or the file argument. With `ranges` only these (offset, length) ranges are received and
+        written into the existing file. Returns False if the connection was closed before."""
+        with open(dst_path, "r+b" if ranges is not None and os.path.exists(dst_path) else "wb+") as file:
+            for offset, length in (ranges if ranges is not None else [(0, file_size)]):
+                file.seek(offset)
+                if not self._recv_file_range(file, length, plain_buffer, encrypted_buffer):
                     logger.error("Connection aborted, while receiving file!")
-                    return
-                write_data = data[:remaining_bytes]
-                appended_data = data[remaining_bytes:]
-                file.write(write_data)
-                remaining_bytes -= len(write_data)
-            plain_byte_stream += appended_data
-
-    def _send_bytes(self, byte_string: bytes) -> bool:
+                    return False
+        return True
+
+    def _recv_file_range(self, file, remaining_bytes: int, plain_buffer: ReceiveBuffer,
+                         encrypted_buffer: ReceiveBuffer) -> bool:
+        """Unencrypted files are spliced into the file, after the already received bytes are written."""
+        while remaining_bytes > 0:
+            if (plain_buffer.remaining_length == 0 and hasattr(os, "splice")
+                    and not self.cryptographer.is_encrypted_communication):
+                file.flush()
+                remaining_bytes = self._splice_file(file.fileno(), remaining_bytes)
+                if remaining_bytes == 0:
+                    break
+            if plain_buffer.remaining_length == 0:
+                received = self._recv_data(plain_buffer, encrypted_buffer, min(remaining_bytes, 1 << 20))
+                if not received and (not self._is_connected or self._exit.is_set()):
+                    return False
+                continue
+            write_data = plain_buffer.next_bytes(min(remaining_bytes, plain_buffer.remaining_length))
+            file.write(write_data)
+            remaining_bytes -= len(write_data)
+            plain_buffer.remove_consumed_bytes()
+        return True
+
+    def _recv_file_packet(self, packet: Union[FileMetaPacket, DirectoryPacket], plain_buffer: ReceiveBuffer,
+                          encrypted_buffer: ReceiveBuffer) -> Optional[Exception]:
+        """Receives the file of the file-meta-packet or the files of the directory-packet. Returns the error, if the
+        file was not fully received. An incomplete file is removed, unless it is resumable."""
+        if isinstance(packet, DirectoryPacket):
+            return self._recv_directory(packet, plain_buffer, encrypted_buffer)
+        if packet.manifest is None:
+            if self._recv_file(packet.dst_path, packet.file_size, plain_buffer, encrypted_buffer):
+                return None
+            remove_file(packet.dst_path)
+            return ConnectionAbortedError(f"Connection aborted, while receiving file: {packet.dst_path}")
+        transfer = self._file_transfers.pop(packet.manifest.transfer_id, None) or \
+            FileTransfer(packet.src_path, packet.dst_path, packet.manifest)
+        copy_file_ranges(transfer, packet.copies)
+        self._recv_file(transfer.partial_path, packet.file_size, plain_buffer, encrypted_buffer, packet.ranges)
+        return received_file_transfer(transfer, packet)
+
+    def _recv_directory(self, packet: DirectoryPacket, plain_buffer: ReceiveBuffer,
+                        encrypted_buffer: ReceiveBuffer) -> Optional[Exception]:
+        """Receives the files of the directory one after another. Small files are written by :class:`FileWriters`,
+        larger files are received like single files. The files of a directory, that can't be created, are received,
+        but not written."""
+        directory = Directory.from_packet(packet)
+        error = prepare_directory(directory)
+        writers = FileWriters()
+        try:
+            for relative_path, size in directory.files:
+                path = directory.destination(relative_path) if error is None else None
+                if size > FileWriters.MAX_FILE_SIZE:
+                    if not self._recv_file(path or os.devnull, size, plain_buffer, encrypted_buffer):
+                        if path is not None:
+                            remove_file(path)
+                        return ConnectionAbortedError(f"Connection aborted, while receiving directory: {path}")
+                    continue
+                data = self._recv_bytes(size, plain_buffer, encrypted_buffer)
+                if data is None:
+                    return ConnectionAbortedError(f"Connection aborted, while receiving directory: {path}")
+                if path is not None:
+                    writers.write(path, data)
+        finally:
+            write_error = writers.close()
+        return error or write_error
+
+    def _recv_bytes(self, num_bytes: int, plain_buffer: ReceiveBuffer,
+                    encrypted_buffer: ReceiveBuffer) -> Optional[bytes]:
+        """Receives exactly `num_bytes`. Returns None if the connection was closed before."""
+        data = bytearray()
+        while len(data) < num_bytes:
+            if plain_buffer.remaining_length == 0:
+                received = self._recv_data(plain_buffer, encrypted_buffer, 1 << 20)
+                if not received and (not self._is_connected or self._exit.is_set()):
+                    return None
+                continue
+            data += plain_buffer.next_bytes(min(num_bytes - len(data), plain_buffer.remaining_length))
+            plain_buffer.remove_consumed_bytes()
+        return bytes(data)
+
+    def resume_file(self, transfer: FileTransfer, signature: Optional[FileSignature] = None) -> DataPacket:
+        """Requests the missing ranges of the resumable file and waits for them. With the signature of the old file
+        at the destination only the changed parts are sent. The data-packet is the same, as the answer of the call,
+        that returned the file."""
+        self._file_transfers[transfer.manifest.transfer_id] = transfer
+        try:
+            future = self.call_function(FileRequestPacket(transfer.manifest.transfer_id, transfer.missing_ranges(),
+                                                          signature))
+            return self.wait_for_result(future)
+        finally:
+            self._file_transfers.pop(transfer.manifest.transfer_id, None)
+
+    def _request_offered_file(self, packet: FileMetaPacket) -> None:
+        """Requests the offered delta file in a new thread, because this thread receives the answer. The call,
+        that returned the file, is resolved with the answer."""
+        future = self._pop_pending_call(packet.header.id_container.function_id)
+        if future is None:
+            logger.warning(f"Dropped offered file of a call, that is not pending anymore: {packet}")
+            return
+        transfer = FileTransfer(packet.src_path, packet.dst_path, packet.manifest)
+        threading.Thread(target=self._resume_offered_file, args=(transfer, future),
+                         name=f"Delta_file_thread_{self._id}", daemon=True).start()
+
+    def _resume_offered_file(self, transfer: FileTransfer, future: 'CallFuture') -> None:
+        try:
+            data_packet = self.resume_file(transfer, old_file_signature(transfer))
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+        else:
+            if not future.done():
+                future.set_result(data_packet)
+
+    def _splice_file(self, file_fd: int, remaining_bytes: int) -> int:
+        """Moves the bytes from the socket through a pipe into the file with `os.splice` (Linux), so they are never
+        copied into user space. Returns the number of bytes, that are still missing, when the connection is closed
+        or the communicator stopped. :func:`_recv_data` handles these cases then."""
+        read_fd, write_fd = os.pipe()
+        socket_fd = self._socket_connection.fileno()
+        poller = select.poll()
+        poller.register(socket_fd, select.POLLIN)
+        try:
+            if hasattr(fcntl, "F_SETPIPE_SZ"):
+                try:
+                    fcntl.fcntl(write_fd, fcntl.F_SETPIPE_SZ, _SPLICE_SIZE)
+                except OSError:
+                    pass  # Above the pipe-max-size of the system. The default size is used.
+            while remaining_bytes > 0 and not self._exit.is_set():
+                try:
+                    num_bytes = os.splice(socket_fd, write_fd, min(remaining_bytes, _SPLICE_SIZE))
+                except BlockingIOError:
+                    poller.poll(self._recv_timeout * 1000)
+                    continue
+                except OSError:
+                    break
+                if num_bytes == 0:
+                    break
+                remaining_bytes -= num_bytes
+                while num_bytes > 0:
+                    num_bytes -= os.splice(read_fd, file_fd, num_bytes)
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+        return remaining_bytes
+
+    def _send_bytes(self, byte_string: bytes, encrypted: bool = True) -> bool:
+        return self._send_segments([byte_string], encrypted)
+
+    def _send_segments(self, segments: List[Union[bytes, memoryview]], encrypted: bool = True) -> bool:
+        """Sends the segments of :func:`pynetworking.Packets.Packet.pack_segments` with one vectored write.
+        Encrypted segments are joined, because they are compressed and encrypted as one record."""
         if not self._is_connected:
             self._connect(timeout=2)
         try:
-            encrypted_message = self.cryptographer.encrypt(byte_string)
-            if self.cryptographer.is_encrypted_communication:
-                send_message = encrypted_message + b"%%"
-            else:
-                send_message = encrypted_message
-            sent = self._socket_connection.sendall(send_message)
-            # returns None on success
-            return sent is None
+            if encrypted and self.cryptographer.is_encrypted_communication:
+                message = segments[0] if len(segments) == 1 else b"".join(segments)
+                if self.compressor is not None:
+                    message = self.compressor.compress(message)
+                encrypted_bytes = self.cryptographer.encrypt(message)
+                segments = [pack_int(len(encrypted_bytes)), encrypted_bytes]
+            send_segments(self._socket_connection, segments)
+            return True
         except OSError:
-            logger.error(f"Could not send bytes {byte_string}")
+            logger.error(f"Could not send {sum(len(segment) for segment in segments)} bytes")
             return False
 
+    def _execute_function_packet(self, packet: FunctionPacket) -> None:
+        """Executes the function in the function executor. Without an executor a new thread is started. If the
+        executor rejects the function or was shut down, the exception is sent back to the caller."""
+        if self._function_executor is None:
+            func_thread = FunctionExecutionThread(self._id, packet, self._handle_packet)
+            func_thread.start()
+            return
+        try:
+            self._function_executor.submit(self._handle_packet, packet)
+        except RuntimeError:
+            # ExecutionRejectedError or the executor was shut down
+            logger.warning(f"Rejected function: {packet.function_name}")
+            if isinstance(packet, OneWayFunctionPacket):
+                return
+            data_packet = DataPacket(**{"return": ExceptionObject(*sys.exc_info())})
+            self.send_packet(data_packet, packet.header.id_container.function_id)
+
     def _handle_packet(self, packet):
-        """Adjusts all ids in the IDManager. Handles function-packets."""
-        IDManager(self._id).update_ids_by_packet(packet)
+        """Handles function-packets. The ids are already adjusted, when the packet was received."""
         if isinstance(packet, FunctionPacket):
             self._received_function_packet(packet)
 
@@ -333,26 +839,164 @@ class Communicator(threading.Thread):
         func = packet.function_name
         args = packet.args
         kwargs = packet.kwargs
+        function_id = packet.header.id_container.function_id
+        calling_communicator_id = get_calling_communicator_id()
+        _function_context.communicator_id = self._id
         try:
-            ret_value = self._functions.__getattr__(func)(*args, **kwargs)
+            if isinstance(packet, BatchFunctionPacket):
+                ret_value = [self._execute_batch_call(*call) for call in packet.calls]
+            elif isinstance(packet, FileRequestPacket):
+                return self._send_requested_file(packet)
+            else:
+                ret_value = self._functions.__getattr__(func)(*args, **kwargs)
+            if isinstance(packet, OneWayFunctionPacket):
+                return
             if isinstance(ret_value, File):
-                return self._send_file(ret_value)
+                return self._send_file(ret_value, function_id)
+            if isinstance(ret_value, Directory):
+                return self._send_directory(ret_value, function_id)
+            if is_stream(ret_value):
+                return self._send_stream(ret_value, function_id)
         except:
+            if isinstance(packet, OneWayFunctionPacket):
+                logger.error(f"One-way function {func} raised:\n{traceback.format_exc()}")
+                return
             ret_value = ExceptionObject(*sys.exc_info())
+        finally:
+            _function_context.communicator_id = calling_communicator_id
 
         ret_kwargs = {"return": ret_value}
         data_packet = DataPacket(**ret_kwargs)
-        self.send_packet(data_packet)
+        self.send_packet(data_packet, function_id)
 
-    def _send_file(self, file: File):
-        """Creates a FileMetaPacket, that is sent and followed by the file_content."""
-        file_meta_packet = FileMetaPacket(file.src_path, file.size, file.dst_path)
-        self.send_packet(file_meta_packet)
+    def _execute_batch_call(self, function_name: str, args: tuple, kwargs: dict) -> Any:
+        """Executes one call of a :class:`BatchFunctionPacket`. An exception is returned as :class:`ExceptionObject`,
+        so the following calls are still executed."""
+        try:
+            return self._functions.__getattr__(function_name)(*args, **kwargs)
+        except:
+            return ExceptionObject(*sys.exc_info())
+
+    def _send_file(self, file: File, function_id: Optional[int] = None, manifest: Optional[FileManifest] = None,
+                   ranges: Optional[List[Tuple[int, int]]] = None, copies: Optional[List[Tuple[int, int, int]]] = None):
+        """Creates a FileMetaPacket, that is sent and followed by the file_content. No other packet may be sent in
+        between. A resumable file is hashed first. If `ranges` are passed only these ranges are sent. A delta file is
+        only offered without content."""
+        if manifest is None and (file.resumable or file.delta):
+            manifest = resumable_files.add(file)
+            if file.delta:
+                ranges = []
+        file_meta_packet = FileMetaPacket(file.src_path, file.size, file.dst_path, manifest, ranges, copies)
+        with self._send_lock:
+            self.send_packet(file_meta_packet, function_id)
+            self._send_file_content(file, ranges)
+
+    def _send_requested_file(self, packet: FileRequestPacket) -> None:
+        """Sends the requested ranges of a resumable file, that was sent before. With a signature only the parts of
+        the ranges, that the old file of the receiver doesn't contain, are sent."""
+        resumable_file = resumable_files.get(packet.transfer_id)
+        if resumable_file is None:
+            raise ValueError("The file can't be resumed, because it changed or its transfer expired")
+        file, manifest = resumable_file
+        copies, ranges = file_delta(file, packet)
+        self._send_file(file, packet.header.id_container.function_id, manifest, ranges, copies)
+
+    def _send_file_content(self, file: File, ranges: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """Sends exactly `file.size` bytes of the file (or the lengths of the (offset, length) ranges), because the
+        other side receives that many. A file, that shrank in between, is filled up with zeros."""
         with open(file.src_path, "rb") as f:
-            file_data = f.read(self.CHUNK_SIZE)
-            while len(file_data) > 0:
-                self._send_bytes(file_data)
-                file_data = f.read(self.CHUNK_SIZE)
+            return all(self._send_file_range(file, f, offset, length)
+                       for offset, length in (ranges if ranges is not None else [(0, file.size)]))
+
+    def _send_file_range(self, file: File, f, offset: int, remaining_bytes: int) -> bool:
+        """Unencrypted files are sent with `socket.sendfile`, which copies them in the kernel (`os.sendfile`), if the
+        platform allows it. Encrypted files are sent in records."""
+        f.seek(offset)
+        if remaining_bytes > 0 and not self.cryptographer.is_encrypted_communication:
+            try:
+                remaining_bytes -= self._socket_connection.sendfile(f, offset, remaining_bytes)
+            except OSError:
+                logger.error(f"Could not send file: {file.src_path}")
+                return False
+        if remaining_bytes > 0 and self.cryptographer.is_encrypted_communication:
+            plain_view, encrypted_buffer = self._get_record_buffers(file.record_size or self.file_record_size)
+            return all(self._send_record(record, encrypted_buffer)
+                       for record in iter_file_records(f, remaining_bytes, plain_view))
+        while remaining_bytes > 0:
+            file_data = f.read(min(self.CHUNK_SIZE, remaining_bytes))
+            if len(file_data) == 0:
+                logger.error(f"File shrank while sending: {file.src_path}")
+                file_data = bytes(min(self.CHUNK_SIZE, remaining_bytes))
+            if not self._send_bytes(file_data):
+                return False
+            remaining_bytes -= len(file_data)
+        return True
+
+    def _send_record(self, record: memoryview, encrypted_buffer: bytearray) -> bool:
+        """Sends the record of file content. At encrypted connections it is encrypted into the buffer first. A
+        compressed record is encrypted into new bytes."""
+        if self.compressor is not None:
+            return self._send_segments([record])
+        if self.cryptographer.is_encrypted_communication:
+            encrypted_record = self.cryptographer.encrypt_into(record, encrypted_buffer)
+            return self._send_segments([pack_int(len(encrypted_record)), encrypted_record], encrypted=False)
+        return self._send_segments([record], encrypted=False)
+
+    def _send_directory(self, directory: Directory, function_id: int) -> None:
+        """Sends a directory-packet, that is followed by the content of all files of the directory. No other packet
+        may be sent in between."""
+        directory.scan()
+        with self._send_lock:
+            self.send_packet(DirectoryPacket(directory), function_id)
+            self._send_directory_content(directory)
+
+    def _send_directory_content(self, directory: Directory) -> bool:
+        """Files, that fit into a record, are read into the record buffer one after another and sent together. Larger
+        files are sent like single files."""
+        record_size = directory.record_size or self.file_record_size
+        plain_view, encrypted_buffer = self._get_record_buffers(record_size)
+        filled = 0
+        for relative_path, size in directory.files:
+            if filled + size > record_size and filled > 0:
+                if not self._send_record(plain_view[:filled], encrypted_buffer):
+                    return False
+                filled = 0
+            path = directory.source(relative_path)
+            if size <= record_size:
+                read_file_into(path, plain_view[filled:filled + size])
+                filled += size
+                continue
+            with open_source_file(path) as f:
+                if not self._send_file_range(File(path, "", size, record_size), f, 0, size):
+                    return False
+        return filled == 0 or self._send_record(plain_view[:filled], encrypted_buffer)
+
+    def _get_record_buffers(self, record_size: int) -> Tuple[memoryview, bytearray]:
+        """The buffers for the plain and the encrypted records of files. They are only replaced, if a file needs
+        larger records. The send lock is held, while they are used."""
+        if self._record_buffers is None or len(self._record_buffers[0]) < record_size:
+            self._record_buffers = bytearray(record_size), bytearray(record_size + AEAD_TAG_SIZE)
+        plain_buffer, encrypted_buffer = self._record_buffers
+        return memoryview(plain_buffer)[:record_size], encrypted_buffer
+
+    def _send_stream(self, iterator: Iterator, function_id: int) -> None:
+        """Sends the items of the iterator in stream packets, as long as the other side has credits left. A
+        data-packet ends the stream. Its return value is None or the exception, that the iterator raised. If the
+        other side cancels the stream, the iterator is closed."""
+        credits = StreamCredits(self.STREAM_WINDOW)
+        self._stream_credits[function_id] = credits
+        ret_value = None
+        try:
+            for chunk in iter_chunks(iterator, self.STREAM_CHUNK_ITEMS, self.STREAM_CHUNK_BYTES):
+                if not credits.take(self._exit) or not self.send_packet(StreamPacket(chunk), function_id):
+                    break
+        except:
+            ret_value = ExceptionObject(*sys.exc_info())
+        finally:
+            self._stream_credits.pop(function_id, None)
+            if hasattr(iterator, "close"):
+                iterator.close()
+        self.send_packet(DataPacket(**{"return": ret_value}), function_id)
 
     def stop(self, is_same_thread=False) -> None:
         """Stops all listening and the thread is joined. Send processes are not stopped and it the thread first
@@ -363,11 +1007,24 @@ class Communicator(threading.Thread):
             communicator_side = "Client" if self._id >= CLIENT_ID_START else "Server"
             logger.info(f"Stopping {communicator_side}side communicator: {self._id}")
             self._exit.set()
+            with self._packets_available:
+                self._packets_available.notify_all()
+            with self._pending_calls_lock:
+                pending_calls, self._pending_calls = self._pending_calls, {}
+            for future in pending_calls.values():
+                future.set_exception(ConnectionError("Communicator stopped, before the response arrived."))
+            streams, self._streams = self._streams, {}
+            for stream in filter(None, (stream_ref() for stream_ref in streams.values())):
+                stream._fail(ConnectionError("Communicator stopped, before the stream ended."))
             if self._socket_connection is not None:
+                if self._reactor is not None:
+                    self._reactor.unregister(self._socket_connection)
                 self._socket_connection.close()
             self._is_connected = False
-            if not is_same_thread:
+            if not is_same_thread and self._reactor is None:
                 self.join()
+                # The thread may have reconnected in between.
+                self._is_connected = False
             remove_manager(self._id)
             if self._on_close is not None:
                 try:
@@ -384,9 +1041,11 @@ class Communicator(threading.Thread):
 
 
 class PacketBuilder:
-    """Builds a packet from bytes chunk data. Bytes must be added till a packet can be built. This packet is returned"""
+    """Builds a packet from bytes chunk data. Bytes must be added till a packet can be built. This packet is returned.
+    The bytes can also be written directly into the byte_stream (e.g. a :class:`ReceiveBuffer`) and the packet is
+    taken with :func:`next_packet`."""
 
-    def __init__(self, byte_stream: ByteStream) -> None:
+    def __init__(self, byte_stream: Union[ByteStream, ReceiveBuffer]) -> None:
         self.byte_stream = byte_stream
         self.current_header: Optional[Header] = None
 
@@ -394,7 +1053,11 @@ class PacketBuilder:
         """Byte string is from receiving bytes from the tcp-connection. This function rebuilds the packet from it,
         if there was enough data added."""
         self.byte_stream += byte_string
-        if self.current_header is None and self.byte_stream.length >= Header.LENGTH_BYTES:
+        return self.next_packet()
+
+    def next_packet(self) -> Optional[Packet]:
+        """Returns the next packet, if all its bytes are in the byte_stream."""
+        if self.current_header is None and self.byte_stream.remaining_length >= Header.LENGTH_BYTES:
             self.current_header = Header.from_bytes(self.byte_stream)
         if self.current_header and self.byte_stream.remaining_length >= self.current_header.specific_data_size:
             packet = Packet.from_bytes(self.current_header, self.byte_stream)
@@ -403,6 +1066,12 @@ class PacketBuilder:
             return packet
         return None
 
+    def missing_bytes(self) -> int:
+        """Number of bytes, that are at least missing to build the next packet."""
+        if self.current_header is None:
+            return Header.LENGTH_BYTES - self.byte_stream.remaining_length
+        return self.current_header.specific_data_size - self.byte_stream.remaining_length
+
 
 class MetaFunctionCommunicator(type):
     """
@@ -447,32 +1116,31 @@ class MetaFunctionCommunicator(type):
         if item.startswith("__", 0, 2):
             return type.__getattribute__(self, item)
 
-        def container(*args, **kwargs) -> Any:
-            """Container works like a decorator container. The 'decoration' is, that it sends a function-packet and
-            receives and unpacks a data-packet."""
+        def call(is_one_way: bool, args: tuple, kwargs: dict) -> Any:
             function_name = item
-            # send function packet
             connector: Connector = self.__getattr__("_connector")
-            function_packet = FunctionPacket(function_name, *args, **kwargs)
             if connector is None or connector.communicator is None:
                 raise ConnectionError(
                     "Communicator is not connected!"
                     "Connect first to a server with `ServerCommunicator.connect(server_address)´")
-            sent_packet = connector.communicator.send_packet(function_packet)
-            if not sent_packet:
-                raise ConnectionError("Could not send function to server. Check connection to server.")
+            if is_one_way:
+                if not connector.communicator.send_packet(OneWayFunctionPacket(function_name, *args, **kwargs)):
+                    raise ConnectionError("Could not send function to server. Check connection to server.")
+                return None
+            # send function packet
+            function_packet = FunctionPacket(function_name, *args, **kwargs)
+            future = connector.communicator.call_function(function_packet)
+            data_packet = connector.communicator.wait_for_result(future)
+            return unpack_return_value(data_packet)
 
-            try:
-                data_packet = connector.communicator.wait_for_response()
-            except TimeoutError as e:
-                raise e
-            # unpack data packet
-            return_values = data_packet.data["return"]
-            if isinstance(return_values, ExceptionObject):
-                # An exception was thrown at the other side!
-                raise return_values.exec_type(return_values.get_formatted())
-            return return_values
+        function_is_one_way = is_one_way(self, item)
 
+        def container(*args, **kwargs) -> Any:
+            """Container works like a decorator container. The 'decoration' is, that it sends a function-packet and
+            receives and unpacks a data-packet."""
+            return call(function_is_one_way, args, kwargs)
+
+        container.one_way = lambda *args, **kwargs: call(True, args, kwargs)
         return container
 
     def __getattr__(self, attr_name: str) -> Any:
@@ -481,6 +1149,422 @@ class MetaFunctionCommunicator(type):
         return attribute
 
 
+def one_way(func: Callable) -> Callable:
+    """Marks a function of a :class:`Functions` class as one-way. A call of it returns None immediately after the
+    function-packet is sent, and the other side sends no data-packet back. Exceptions of the function are only logged
+    at the other side. A single call is one-way with: `remote_functions.function.one_way(...)`.
+
+    .. code-block:: python
+
+        class ServerFunctions(net.ServerFunctions):
+            @staticmethod
+            @net.one_way
+            def notify(event: str) -> None:
+                ...
+    """
+    target = func.__func__ if isinstance(func, (staticmethod, classmethod)) else func
+    target._one_way = True
+    return func
+
+
+def is_one_way(functions: Optional[Type['Functions']], function_name: str) -> bool:
+    """Returns whether the function of the :class:`Functions` class is marked with :func:`one_way`."""
+    try:
+        function = type.__getattribute__(functions, function_name)
+    except (AttributeError, TypeError):
+        return False
+    return getattr(function, "_one_way", False) is True
+
+
+class Batch:
+    """Collects calls of remote functions and sends them in one :class:`pynetworking.Packets.BatchFunctionPacket`.
+    The other side executes them in order and answers all of them with one data-packet. Every call returns a future,
+    that is resolved with the return value or raises the exception of the call. The batch is sent, when the with
+    block is left without an exception, or with :func:`send`. Returned Files are not transmitted in a batch.
+
+    .. code-block:: python
+
+        with net.Batch(ServerCommunicator.remote_functions) as batch:
+            futures = [batch.incrementer(i) for i in range(100)]
+        print([future.result() for future in futures])
+
+    :ivar results: Return values of all calls of the last sent batch. Exceptions are :class:`ExceptionObject`.
+    """
+
+    def __init__(self, remote_functions: Type['Functions']) -> None:
+        self._remote_functions = remote_functions
+        self._calls: List[Tuple[str, tuple, dict]] = []
+        self._futures: List[concurrent.futures.Future] = []
+        self.results: Optional[list] = None
+
+    def __getattr__(self, item: str) -> Callable[..., concurrent.futures.Future]:
+        if item.startswith("__", 0, 2):
+            raise AttributeError(item)
+        return functools.partial(self.call, item)
+
+    def call(self, function_name: str, *args, **kwargs) -> concurrent.futures.Future:
+        """Adds a call to the batch. Allows to call functions, whose names are attributes of the batch (e.g. `send`).
+        """
+        self._calls.append((function_name, args, kwargs))
+        future = concurrent.futures.Future()
+        self._futures.append(future)
+        return future
+
+    def send(self) -> list:
+        """Sends all collected calls and waits for their results."""
+        calls, futures = self._take_calls()
+        if not calls:
+            return self._resolve(futures, [])
+        connector: Connector = self._remote_functions.__getattr__("_connector")
+        if connector is None or connector.communicator is None:
+            raise ConnectionError(
+                "Communicator is not connected!"
+                "Connect first to a server with `ServerCommunicator.connect(server_address)´")
+        try:
+            future = connector.communicator.call_function(BatchFunctionPacket(calls))
+            results = unpack_return_value(connector.communicator.wait_for_result(future))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            raise
+        return self._resolve(futures, results)
+
+    def _take_calls(self) -> Tuple[List[Tuple[str, tuple, dict]], List[concurrent.futures.Future]]:
+        calls, futures = self._calls, self._futures
+        self._calls, self._futures = [], []
+        return calls, futures
+
+    def _resolve(self, futures: List[concurrent.futures.Future], results: list) -> list:
+        for future, result in zip(futures, results):
+            if isinstance(result, ExceptionObject):
+                future.set_exception(result.exec_type(result.get_formatted()))
+            else:
+                future.set_result(result)
+        self.results = results
+        return results
+
+    def __enter__(self) -> 'Batch':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.send()
+        else:
+            for future in self._take_calls()[1]:
+                future.cancel()
+
+
+def resume_file(remote_functions: Type['Functions'], transfer: FileTransfer) -> File:
+    """Requests only the missing blocks of a resumable file, whose transfer was interrupted. The other side must
+    still have the unchanged file. Raises :class:`IncompleteFileError` again, if the file is still not complete.
+
+    .. code-block:: python
+
+        try:
+            file = ServerCommunicator.remote_functions.get_file("big.iso")
+        except net.IncompleteFileError as error:
+            ServerCommunicator.connect(server_address)
+            file = net.resume_file(ServerCommunicator.remote_functions, error.transfer)
+    """
+    connector: Connector = remote_functions.__getattr__("_connector")
+    if connector is None or connector.communicator is None:
+        raise ConnectionError(
+            "Communicator is not connected!"
+            "Connect first to a server with `ServerCommunicator.connect(server_address)´")
+    return unpack_return_value(connector.communicator.resume_file(transfer))
+
+
+def is_stream(value: Any) -> bool:
+    """Returns whether a returned value is streamed to the caller, instead of being packed in one data-packet."""
+    return isinstance(value, collections.abc.Iterator) and not isinstance(value, File)
+
+
+class ChunkCollector:
+    """Collects the items of a stream in chunks. The first chunk has one item, so the first item is sent without
+    waiting for the following ones. Every chunk has twice the items of the previous one, till `max_items`, or is
+    full earlier, when its bytes-like and str items have `max_bytes`."""
+
+    def __init__(self, max_items: int, max_bytes: int) -> None:
+        self._max_items = max_items
+        self._max_bytes = max_bytes
+        self._limit = 1
+        self._chunk = []
+        self._num_bytes = 0
+        self._num_chunks = 0
+
+    def add(self, item: Any) -> Optional[list]:
+        """Adds the item and returns the chunk, if it is full."""
+        self._chunk.append(item)
+        if isinstance(item, (bytes, bytearray, str)):
+            self._num_bytes += len(item)
+        elif isinstance(item, memoryview):
+            self._num_bytes += item.nbytes
+        if len(self._chunk) >= self._limit or self._num_bytes >= self._max_bytes:
+            self._limit = min(2 * self._limit, self._max_items)
+            return self._take()
+        return None
+
+    def rest(self) -> Optional[list]:
+        """Returns the last chunk after all items were added. At least one (empty) chunk is returned."""
+        if self._chunk or self._num_chunks == 0:
+            return self._take()
+        return None
+
+    def _take(self) -> list:
+        chunk, self._chunk, self._num_bytes = self._chunk, [], 0
+        self._num_chunks += 1
+        return chunk
+
+
+def iter_chunks(iterator: Iterator, max_items: int, max_bytes: int) -> Iterator[list]:
+    """Yields the items of the iterator in the chunks of a :class:`ChunkCollector`. If the iterator raises, the
+    collected items are yielded, before the exception is raised."""
+    collector = ChunkCollector(max_items, max_bytes)
+    try:
+        for item in iterator:
+            chunk = collector.add(item)
+            if chunk is not None:
+                yield chunk
+    except Exception:
+        chunk = collector.rest()
+        if chunk:
+            yield chunk
+        raise
+    chunk = collector.rest()
+    if chunk is not None:
+        yield chunk
+
+
+class StreamCredits:
+    """Number of chunks, that the sender of a stream may send. The receiver adds credits, when it takes chunks."""
+
+    def __init__(self, credits: int) -> None:
+        self._credits = credits
+        self._cancelled = False
+        self._changed = threading.Condition()
+
+    def add(self, credits: int) -> None:
+        """Adds credits. :attr:`pynetworking.Packets.StreamCreditPacket.CANCEL` cancels the stream."""
+        with self._changed:
+            if credits == StreamCreditPacket.CANCEL:
+                self._cancelled = True
+            else:
+                self._credits += credits
+            self._changed.notify_all()
+
+    def take(self, exit_event: threading.Event) -> bool:
+        """Blocks till a credit is available and takes it. Returns False if the stream was cancelled or the
+        communicator stopped."""
+        with self._changed:
+            while self._credits <= 0 and not self._cancelled and not exit_event.is_set():
+                self._changed.wait(1)
+            if self._cancelled or exit_event.is_set():
+                return False
+            self._credits -= 1
+            return True
+
+
+class StreamIterator:
+    """Lazy iterator over the items, that a remote function returned as generator or iterator. Chunks are received
+    in the background, but at most :attr:`Communicator.STREAM_WINDOW` chunks are buffered. The sender waits, till
+    chunks are taken. So the memory stays bounded, however many items are streamed. An exception of the remote
+    iterator is raised, after all items before it.
+
+    .. code-block:: python
+
+        for line in ServerCommunicator.remote_functions.read_lines(path):
+            ...
+
+    A stream, that isn't iterated till the end, is cancelled with :func:`close` or when it is garbage collected.
+    """
+
+    def __init__(self, communicator: Communicator, function_id: int) -> None:
+        self._communicator = communicator
+        self._function_id = function_id
+        self._chunks: collections.deque = collections.deque()
+        self._changed = threading.Condition()
+        self._items: Iterator = iter(())
+        self._end_packet: Optional[DataPacket] = None
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._taken_chunks = 0
+
+    def __iter__(self) -> 'StreamIterator':
+        return self
+
+    def __next__(self) -> Any:
+        while True:
+            for item in self._items:
+                return item
+            self._items = iter(self._next_chunk())
+
+    def _next_chunk(self) -> list:
+        timeout = self._communicator.wait_for_response_timeout
+        deadline = time.monotonic() + timeout if timeout >= 0 else float("inf")
+        with self._changed:
+            while not self._chunks:
+                if self._error is not None:
+                    raise self._error
+                if self._closed:
+                    raise StopIteration
+                if self._end_packet is not None:
+                    self._closed = True
+                    unpack_return_value(self._end_packet)
+                    raise StopIteration
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("StreamIterator waited too long")
+                    raise TimeoutError("StreamIterator waited too long")
+                self._changed.wait(None if remaining == float("inf") else remaining)
+            chunk = self._chunks.popleft()
+        self._taken_chunks += 1
+        if self._taken_chunks >= max(1, self._communicator.STREAM_WINDOW // 2):
+            self._send_credits(self._taken_chunks)
+            self._taken_chunks = 0
+        return chunk
+
+    def _send_credits(self, credits: int) -> None:
+        self._communicator.send_packet(StreamCreditPacket(credits), self._function_id)
+
+    def _put_chunk(self, items: list) -> None:
+        with self._changed:
+            if not self._closed:
+                self._chunks.append(items)
+                self._changed.notify_all()
+
+    def _end(self, data_packet: DataPacket) -> None:
+        with self._changed:
+            self._end_packet = data_packet
+            self._changed.notify_all()
+
+    def _fail(self, exception: Exception) -> None:
+        with self._changed:
+            self._error = exception
+            self._changed.notify_all()
+
+    def close(self) -> None:
+        """Stops iterating. The remaining items are dropped and the remote iterator is closed."""
+        with self._changed:
+            if self._closed:
+                return
+            self._closed = True
+            self._chunks.clear()
+            is_running = self._end_packet is None and self._error is None
+        self._items = iter(())
+        if is_running and self._communicator.is_connected():
+            self._send_credits(StreamCreditPacket.CANCEL)
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self) -> 'StreamIterator':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def decrypt_record(cryptographer: Cryptographer, record: memoryview, plain_buffer: ReceiveBuffer,
+                   compressor: Optional[Compressor] = None) -> None:
+    """Appends the decrypted and decompressed record to the plain_buffer. With an AEAD cipher an uncompressed record
+    is decrypted directly into the buffer."""
+    if compressor is not None:
+        plain_buffer += compressor.decompress(cryptographer.decrypt(record))
+        return
+    decrypted_length = cryptographer.decrypted_length(record)
+    if decrypted_length is None:
+        plain_buffer += cryptographer.decrypt(record)
+        return
+    cryptographer.decrypt_into(record, plain_buffer.reserve(decrypted_length)[:decrypted_length])
+    plain_buffer.commit(decrypted_length)
+
+
+def as_data_packet(packet: Union[DataPacket, FileMetaPacket, DirectoryPacket]) -> DataPacket:
+    """A file-meta-packet or directory-packet answers a call with the file or directory, that is already
+    transmitted."""
+    if isinstance(packet, FileMetaPacket):
+        return DataPacket(**{"return": File.from_meta_packet(packet)})
+    if isinstance(packet, DirectoryPacket):
+        return DataPacket(**{"return": Directory.from_packet(packet)})
+    return packet
+
+
+def prepare_directory(directory: Directory) -> Optional[Exception]:
+    """Creates the destination and all sub directories of a received directory. Returns the error, if a relative
+    path leads out of the destination or a directory can't be created."""
+    relative_paths = directory.directories + [relative_path for relative_path, _ in directory.files]
+    invalid_paths = [relative_path for relative_path in relative_paths if directory.destination(relative_path) is None]
+    if invalid_paths:
+        return ValueError(f"Invalid paths in directory {directory.src_path}: {invalid_paths[:10]}")
+    try:
+        os.makedirs(directory.dst_path, exist_ok=True)
+        for relative_path in directory.directories:
+            os.makedirs(directory.destination(relative_path), exist_ok=True)
+    except OSError as error:
+        return error
+    return None
+
+
+def old_file_signature(transfer: FileTransfer) -> Optional[FileSignature]:
+    """The signature of the old file at the destination of a delta file. None if there is no file. Its version is
+    kept, so the copied blocks are only trusted, if it didn't change till then."""
+    transfer.old_file_version = file_version(transfer.dst_path)
+    if transfer.old_file_version is None or not os.path.isfile(transfer.dst_path):
+        return None
+    return FileSignature.from_file(transfer.dst_path)
+
+
+def file_delta(file: File, packet: FileRequestPacket) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+    """The copies from the old file of the receiver and the ranges, that must be sent, to answer the request."""
+    signature = packet.signature
+    if signature is None:
+        return [], packet.ranges
+    return signature.delta(file.src_path, packet.ranges)
+
+
+def copy_file_ranges(transfer: FileTransfer, copies: Optional[List[Tuple[int, int, int]]]) -> None:
+    """Copies the unchanged parts of a delta file from the old file. Parts, that can't be copied, are missing at
+    the verification."""
+    if not copies:
+        return
+    try:
+        transfer.copy(copies)
+    except OSError as error:
+        logger.error(f"Could not copy from the old file {transfer.dst_path}: {error}")
+
+
+def received_file_transfer(transfer: FileTransfer, packet: FileMetaPacket) -> Optional['IncompleteFileError']:
+    """Verifies the received blocks and the copied blocks, that aren't verified yet, of the resumable file. A
+    complete file is moved to its destination, otherwise the error is returned."""
+    ranges = packet.ranges if packet.ranges is not None else [(0, packet.file_size)]
+    copied_blocks = transfer.manifest.blocks_of([(offset, length) for offset, _, length in packet.copies or []])
+    transfer.verify(ranges + transfer.manifest.ranges_of(sorted(set(copied_blocks) - transfer.verified)))
+    if not transfer.is_complete():
+        return IncompleteFileError(transfer)
+    transfer.complete()
+    return None
+
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def unpack_return_value(data_packet: DataPacket) -> Any:
+    """Returns the return value of a data-packet. If an exception was risen at the other side it is raised
+    locally."""
+    return_values = data_packet.data["return"]
+    if isinstance(return_values, ExceptionObject):
+        # An exception was thrown at the other side!
+        raise return_values.exec_type(return_values.get_formatted())
+    return return_values
+
+
 class MetaSingletonConnector(type):
     """Allows singleton like connectors. Each connector is identified, by its id."""
     _instances: Dict[int, 'Connector'] = {}
@@ -510,6 +1594,7 @@ class Connector:
     :ivar local_functions: Class with all functions, that are locally available.
     :ivar communicator: instance of :class:`Communicator`.
     :ivar _id:
+    :ivar _session_ticket: Resumes the session at the next connect, without a full key exchange.
     """
     remote_functions: Optional[Type['Functions']] = None
     local_functions: Optional[Type['Functions']] = None
@@ -517,6 +1602,7 @@ class Connector:
     communicator: Optional[Communicator] = None
     _id = to_client_id(0)
     _exchanged_keys = False
+    _session_ticket: Optional[SessionTicket] = None
 
     @staticmethod
     def connect(connector: Union['Connector', Type['SingleConnector']], addr: SocketAddress, blocking=True,
@@ -588,6 +1674,7 @@ class MultiConnector(Connector, metaclass=MetaSingletonConnector):
         self._id = to_client_id(id_)
         self.communicator: Optional[Communicator] = None
         self._exchanged_keys = False
+        self._session_ticket: Optional[SessionTicket] = None
 
     def connect(self: Connector, addr: SocketAddress, blocking=True, timeout=float("inf"), exchange_keys_function=None) \
             -> bool:
@@ -659,6 +1746,228 @@ class FunctionExecutionThread(threading.Thread):
         return self._id
 
 
+class ExecutionRejectedError(RuntimeError):
+    """Raised when a :class:`FunctionExecutor` can't accept another function."""
+
+
+class IncompleteFileError(ConnectionError):
+    """Raised when a resumable file was not fully received, e.g. because the connection was closed. The verified
+    blocks are kept in the partial file of the `transfer`. :func:`resume_file` requests the missing blocks."""
+
+    def __init__(self, transfer: FileTransfer) -> None:
+        super().__init__(f"Received {len(transfer.verified)} of {transfer.manifest.num_blocks} blocks of "
+                         f"{transfer.dst_path}")
+        self.transfer = transfer
+
+
+class FunctionExecutor(concurrent.futures.Executor):
+    """Pool of worker threads, that executes the received functions of many communicators. Workers are started on
+    demand, till `max_workers` are running. Further functions wait in a queue with at most `max_queue_size` entries
+    (0 means unlimited). When the queue is full the `rejection_policy` decides:
+
+    - :attr:`REJECT`: The function is not executed. The caller gets an :class:`ExecutionRejectedError`.
+    - :attr:`BLOCK`: The receiving thread waits till the queue has space. No more packets are received from this
+      connection in the meantime.
+
+    Nested calls (a function that calls a function at the other side) occupy a worker till the response arrives. So
+    `max_workers` must be bigger than the deepest nesting.
+    """
+    REJECT = "reject"
+    BLOCK = "block"
+
+    def __init__(self, max_workers: int = 32, max_queue_size: int = 0, rejection_policy: str = REJECT) -> None:
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        if rejection_policy not in (self.REJECT, self.BLOCK):
+            raise ValueError(f"Unknown rejection_policy: {rejection_policy}")
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.rejection_policy = rejection_policy
+        self._queue: queue.Queue = queue.Queue(max_queue_size)
+        self._workers: List[threading.Thread] = []
+        self._idle_workers = threading.Semaphore(0)
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Schedules `fn(*args, **kwargs)`. Raises :class:`ExecutionRejectedError` if the queue is full and the
+        rejection policy is :attr:`REJECT`."""
+        if self._shutdown:
+            raise RuntimeError("Cannot schedule new functions after shutdown")
+        future = concurrent.futures.Future()
+        reserved_idle_worker = self._adjust_worker_count()
+        try:
+            self._queue.put((future, fn, args, kwargs), block=self.rejection_policy == self.BLOCK)
+        except queue.Full:
+            if reserved_idle_worker:
+                self._idle_workers.release()
+            raise ExecutionRejectedError(f"Server is busy. {self.max_queue_size} functions are already waiting.")
+        return future
+
+    def _adjust_worker_count(self) -> bool:
+        """Reserves an idle worker or starts a new one, if the maximum is not reached yet. If all workers are busy,
+        the next one that finishes takes the function from the queue. Returns True if an idle worker was reserved."""
+        if self._idle_workers.acquire(blocking=False):
+            return True
+        with self._lock:
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"FunctionExecutor_worker_{len(self._workers)}")
+                self._workers.append(worker)
+                worker.start()
+        return False
+
+    def _work(self) -> None:
+        while True:
+            work_item = self._queue.get()
+            if work_item is None:
+                return
+            future, fn, args, kwargs = work_item
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    logger.error(f"Function execution failed: {e}")
+                    future.set_exception(e)
+            del work_item, future
+            self._idle_workers.release()
+
+    def shutdown(self, wait: bool = True, **kwargs) -> None:
+        """Waiting functions are still executed. Afterwards all workers stop."""
+        with self._lock:
+            self._shutdown = True
+            workers = list(self._workers)
+            self._workers = []
+        for _ in workers:
+            self._queue.put(None)
+        if wait:
+            for worker in workers:
+                if worker is not threading.current_thread():
+                    worker.join()
+
+
+class Reactor:
+    """Waits for the sockets of many connections in one thread with a :class:`selectors.DefaultSelector` (epoll,
+    kqueue, ...), instead of one receiving thread per connection. Idle connections cost neither a thread nor a wake
+    up. When a socket is readable, it is unregistered and its `on_readable` callback is called by one of
+    `num_workers` threads. The socket is registered again, if the callback returns True. So the packets of one
+    connection are handled one after another, like in its own receiving thread.
+
+    The received functions are still executed by a :class:`FunctionExecutor`. The workers only decode and dispatch the
+    packets, but they wait while file content is received.
+    """
+    NUM_WORKERS = 4
+    MAX_READS = 16
+
+    def __init__(self, num_workers: int = NUM_WORKERS) -> None:
+        self._selector = selectors.DefaultSelector()
+        self._workers = concurrent.futures.ThreadPoolExecutor(num_workers, thread_name_prefix="Reactor_worker")
+        self._changes: collections.deque = collections.deque()
+        self._wake_up_receiver, self._wake_up_sender = socket.socketpair()
+        self._wake_up_receiver.setblocking(False)
+        self._wake_up_sender.setblocking(False)
+        self._exit = threading.Event()
+        self._running = False
+
+    def register(self, socket_connection: socket.socket, on_readable: Callable[[], bool]) -> None:
+        """Waits for the socket to become readable. Can be called from every thread."""
+        self._changes.append((socket_connection, on_readable))
+        self._wake_up()
+
+    def unregister(self, socket_connection: socket.socket) -> None:
+        """Stops waiting for the socket. Must be called before the socket is closed."""
+        self._changes.append((socket_connection, None))
+        self._wake_up()
+
+    def run(self, listening_socket: socket.socket, on_acceptable: Callable[[], None]) -> None:
+        """Waits for all registered sockets till :func:`stop` is called. `on_acceptable` is called in this thread,
+        when the listening socket has new connections."""
+        if self._exit.is_set():
+            return
+        self._running = True
+        try:
+            self._selector.register(self._wake_up_receiver, selectors.EVENT_READ)
+            self._selector.register(listening_socket, selectors.EVENT_READ)
+            while not self._exit.is_set():
+                self._apply_changes()
+                for key, _ in self._selector.select():
+                    if key.fileobj is self._wake_up_receiver:
+                        self._drain_wake_ups()
+                    elif key.fileobj is listening_socket:
+                        on_acceptable()
+                    else:
+                        self._selector.unregister(key.fileobj)
+                        try:
+                            self._workers.submit(self._handle_readable, key.fileobj, key.data)
+                        except RuntimeError:
+                            break  # The workers were shut down by close()
+        finally:
+            # Closed only here: a closed socket is removed from the selector, even if its wake up is pending.
+            self._selector.close()
+            self._wake_up_receiver.close()
+            self._wake_up_sender.close()
+
+    def stop(self) -> None:
+        self._exit.set()
+        self._wake_up()
+
+    def close(self) -> None:
+        """Waits till the workers are finished. The connections must be stopped before."""
+        self.stop()
+        self._workers.shutdown()
+        if not self._running:
+            self._selector.close()
+            self._wake_up_receiver.close()
+            self._wake_up_sender.close()
+
+    def _handle_readable(self, socket_connection: socket.socket, on_readable: Callable[[], bool]) -> None:
+        try:
+            if on_readable():
+                self.register(socket_connection, on_readable)
+        except Exception:
+            logger.error(f"Handling received data failed:\n{traceback.format_exc()}")
+
+    def _apply_changes(self) -> None:
+        """Changes are applied in this thread, because the selector is not thread safe. A closed socket may have
+        left a key, whose file descriptor is reused by a new socket."""
+        while self._changes:
+            socket_connection, on_readable = self._changes.popleft()
+            if on_readable is None:
+                try:
+                    self._selector.unregister(socket_connection)
+                except (KeyError, ValueError):
+                    pass
+                continue
+            file_descriptor = socket_connection.fileno()
+            if file_descriptor == -1:
+                continue
+            stale_key = self._selector.get_map().get(file_descriptor)
+            if stale_key is not None:
+                self._selector.unregister(stale_key.fileobj)
+            self._selector.register(socket_connection, selectors.EVENT_READ, on_readable)
+
+    def _wake_up(self) -> None:
+        try:
+            self._wake_up_sender.send(b"\0")
+        except OSError:
+            pass  # A wake up is already pending or the reactor is closed.
+
+    def _drain_wake_ups(self) -> None:
+        try:
+            while self._wake_up_receiver.recv(4096):
+                pass
+        except OSError:
+            pass
+
+
+class CallFuture(concurrent.futures.Future):
+    """Future of a single remote function call. It is resolved with the data-packet, that has the same
+    :attr:`function_id` as the sent function-packet."""
+
+    def __init__(self, function_id: int) -> None:
+        super().__init__()
+        self.function_id = function_id
+
+
 class ExceptionObject:
 
     def __init__(self, exc_type, exc_value, exc_traceback):
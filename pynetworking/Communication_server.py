@@ -15,6 +15,9 @@ public classes
     :members:
     :undoc-members:
 
+.. autoclass:: PreforkServer
+    :members: start, mainloop, stop
+
 private classes
 ----------------
 
@@ -30,20 +33,29 @@ private functions
 ------------------
 
 .. autofunction:: exchange_keys
+.. autofunction:: answer_client_hello
+.. autofunction:: _run_worker_process
 
 """
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import sys
 import threading
 import socket
 import time
-from typing import Dict, Type, Union, Optional
+from typing import Dict, Type, Optional, List
 
 from pynetworking.Logging import logger
-from pynetworking.Communication_general import Communicator, Connector, SocketAddress, Functions, to_server_id
+from pynetworking.Communication_general import Communicator, Connector, SocketAddress, Functions, to_server_id, \
+    FunctionExecutor, Reactor, get_calling_communicator_id, new_compressor
 import pynetworking.Communication_general
 from pynetworking.ID_management import IDManager
 from pynetworking.Packets import DataPacket
+from pynetworking.Cryptography import SessionTickets
 
-__all__ = ["ClientManager", "ClientFunctions"]
+__all__ = ["ClientManager", "ClientFunctions", "PreforkServer"]
 
 
 class MetaClientManager(type):
@@ -75,9 +87,29 @@ class MetaClientManager(type):
 class ClientManager(threading.Thread, metaclass=MetaClientManager):
     """This class accepts new clients and stores them in an array. Provides access to each client. Necessary for every
     server. The :func:`start()` method will start the ClientManager to listen for new clients. It is also possible to
-    use this class as context-manager with the `with` statement."""
+    use this class as context-manager with the `with` statement.
+
+    By default every received function is executed in a new thread. Pass a :class:`FunctionExecutor` as
+    `function_executor` to execute the functions of all clients with a limited number of workers and waiting
+    functions. An executor may be shared by multiple ClientManagers and is not shut down by them.
+
+    Every full key exchange issues a session ticket of `session_tickets`, with which the client can resume the session
+    at the next connect.
 
-    def __init__(self, address: SocketAddress = None, client_communicator: Type['ClientCommunicator'] = None) -> None:
+    By default every client has its own receiving thread. With `reactor_workers` a :class:`Reactor` waits for the
+    listening socket and all clients in the thread of the ClientManager, and `reactor_workers` threads handle the
+    received packets. This serves many, mostly idle clients with a few threads.
+
+    With `reuse_port` the listening socket sets `SO_REUSEPORT`, so that ClientManagers of multiple processes can listen
+    on the same address and the kernel distributes the new connections among them (see :class:`PreforkServer`)."""
+    ACCEPTS_PER_WAKE_UP = 64
+
+    def __init__(self, address: SocketAddress = None, client_communicator: Type['ClientCommunicator'] = None,
+                 function_executor: Optional[FunctionExecutor] = None,
+                 session_tickets: Optional[SessionTickets] = None, reactor_workers: Optional[int] = None,
+                 reuse_port: bool = False) -> None:
+        if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("SO_REUSEPORT is not supported on this platform")
         super().__init__(name="ClientManager")
         self._socket_connection = socket.socket()
         self._socket_connection.settimeout(1)
@@ -86,6 +118,10 @@ class ClientManager(threading.Thread, metaclass=MetaClientManager):
         self._address = address
         self._exit = threading.Event()
         self._client_communicator = client_communicator
+        self.function_executor = function_executor
+        self.session_tickets = session_tickets if session_tickets is not None else SessionTickets()
+        self._reactor = Reactor(reactor_workers) if reactor_workers else None
+        self._reuse_port = reuse_port
 
     def start(self):
         """Start listening to new connections and accepts them"""
@@ -94,9 +130,16 @@ class ClientManager(threading.Thread, metaclass=MetaClientManager):
     def run(self) -> None:
         try:
             self._socket_connection.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self._reuse_port:
+                self._socket_connection.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             self._socket_connection.bind(self._address)
             logger.info(f"Server is now listening on: {self._address[0]}:{self._address[1]}")
-            self._socket_connection.listen(4)
+            if self._reactor is None:
+                self._socket_connection.listen(4)
+            else:
+                # Many clients may connect at once. They are accepted without waiting for their key exchange.
+                self._socket_connection.listen(socket.SOMAXCONN)
+                self._socket_connection.setblocking(False)
         except OSError as e:
             # [WinError 10038] socket closed before
             logger.error(e)
@@ -105,21 +148,41 @@ class ClientManager(threading.Thread, metaclass=MetaClientManager):
             raise ValueError(
                 f"Address error. {self._address} is not a valid address. Address must be of type {SocketAddress}")
 
+        if self._reactor is not None:
+            if not self._exit.is_set():
+                self._reactor.run(self._socket_connection, self._accept_waiting_clients)
+            return
         while not self._exit.is_set():
             try:
-                (connection, addr) = self._socket_connection.accept()
-                logger.info("New client connected: (%s)", str(addr))
-                client_id = self._produce_next_client_id()
-                client_communicator_id = to_server_id(client_id)
-                client = self._client_communicator(client_communicator_id, self._address, connection,
-                                                   self._remove_disconnected_client)
-                self._add_client(client_communicator_id, client)
+                self._accept_client()
             except OSError as e:
                 if not isinstance(e, socket.timeout):
                     if not self._exit.is_set():
                         logger.error("TCP connection closed while listening")
                         # TODO: handle (if possible)
 
+    def _accept_client(self) -> None:
+        (connection, addr) = self._socket_connection.accept()
+        logger.info("New client connected: (%s)", str(addr))
+        client_id = self._produce_next_client_id()
+        client_communicator_id = to_server_id(client_id)
+        client = self._client_communicator(client_communicator_id, self._address, connection,
+                                           self._remove_disconnected_client, self.function_executor,
+                                           self.session_tickets, self._reactor)
+        self._add_client(client_communicator_id, client)
+
+    def _accept_waiting_clients(self) -> None:
+        """Called by the reactor, when clients are waiting to be accepted."""
+        for _ in range(self.ACCEPTS_PER_WAKE_UP):
+            try:
+                self._accept_client()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if not self._exit.is_set():
+                    logger.error(f"Could not accept client: {e}")
+                return
+
     def _add_client(self, client_communicator_id: int, client: 'ClientCommunicator'):
         self.clients[client_communicator_id] = client
 
@@ -133,12 +196,11 @@ class ClientManager(threading.Thread, metaclass=MetaClientManager):
         """Returns the proper ClientCommunicator. The proper one is the one who called the server-side function. This
         function is thread dependent. So if you create a new thread inside the called function you have to store the
         :code:`id` of the current ClientCommunicator and then call this function with this id as optional parameter.
+        In a worker process of a :class:`PreforkServer` only the clients of this process are found.
         """
         if client_id is None:
-            current_thread: Union[ClientCommunicator, threading.Thread] = threading.current_thread()
-            try:
-                client_id = current_thread.id
-            except AttributeError:
+            client_id = get_calling_communicator_id()
+            if client_id is None:
                 """Function may only be called from same thread (thread that called the server function) 
                 or with a valid existing client_id!"""
                 logger.error(
@@ -168,11 +230,14 @@ class ClientManager(threading.Thread, metaclass=MetaClientManager):
 
     def stop_listening(self) -> None:
         self._exit.set()
+        if self._reactor is not None:
+            self._reactor.stop()
         self._socket_connection.close()
         self.join()
         logger.info("Closed server listener")
 
     def stop_connections(self) -> None:
+        """Closes all connections. If the ClientManager doesn't listen anymore, the reactor is closed as well."""
         logger.debug(f"Close connections: {self.clients}")
         while len(self.clients.items()) > 0:
             client_id = self.clients.keys().__iter__().__next__()
@@ -181,6 +246,8 @@ class ClientManager(threading.Thread, metaclass=MetaClientManager):
                 client.close_connection()
             else:
                 self.clients.pop(client_id)
+        if self._exit.is_set() and self._reactor is not None:
+            self._reactor.close()
 
     def __enter__(self) -> 'ClientManager':
         self.start()
@@ -191,6 +258,128 @@ class ClientManager(threading.Thread, metaclass=MetaClientManager):
         self.stop_connections()
 
 
+class PreforkServer(threading.Thread):
+    """Runs a :class:`ClientManager` in each of `num_processes` (default: number of cpus) worker processes. All of them
+    listen on the same address with `SO_REUSEPORT` and the kernel distributes the new connections among them. So
+    received functions of different clients don't compete for the GIL of one process. Every client stays at the
+    process, that accepted it, and :func:`ClientManager.get` only finds the clients of its own process.
+
+    The worker processes are forked at :func:`start`. The other arguments are passed to the ClientManager of every
+    worker. The `function_executor` is copied into every worker and must not have executed functions before. All
+    workers redeem the session tickets of each other, because they share the key of `session_tickets`.
+
+    The thread of the PreforkServer restarts workers, that exited, after at least `RESTART_DELAY` seconds since their
+    start. :func:`stop` sends SIGTERM to every worker, which stops its ClientManager then, and kills workers, that
+    didn't stop after `STOP_TIMEOUT` seconds. Workers stop as well, when the parent process exited. Like the
+    ClientManager the PreforkServer can be used as context-manager.
+
+    SO_REUSEPORT and fork are not available on Windows.
+
+    :ivar processes: The currently running worker processes.
+    """
+    RESTART_DELAY = 1
+    STOP_TIMEOUT = 10
+
+    def __init__(self, address: SocketAddress, client_communicator: Type['ClientCommunicator'],
+                 num_processes: Optional[int] = None, function_executor: Optional[FunctionExecutor] = None,
+                 session_tickets: Optional[SessionTickets] = None, reactor_workers: Optional[int] = None) -> None:
+        if not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+            raise ValueError("A PreforkServer needs SO_REUSEPORT and fork, which are not supported on this platform")
+        super().__init__(name="PreforkServer")
+        self._address = address
+        self._client_communicator = client_communicator
+        self.num_processes = num_processes if num_processes is not None else os.cpu_count() or 1
+        self.function_executor = function_executor
+        self.session_tickets = session_tickets if session_tickets is not None else SessionTickets()
+        self._reactor_workers = reactor_workers
+        self._context = multiprocessing.get_context("fork")
+        self._exit = threading.Event()
+        self.processes: List[multiprocessing.Process] = []
+        self._start_times: List[float] = []
+
+    def start(self) -> None:
+        """Forks the worker processes and starts supervising them."""
+        self._start_times = [0.] * self.num_processes
+        self.processes = [self._start_worker(i) for i in range(self.num_processes)]
+        super().start()
+
+    def run(self) -> None:
+        while not self._exit.is_set():
+            multiprocessing.connection.wait([process.sentinel for process in self.processes], timeout=1)
+            for i, process in enumerate(self.processes):
+                if process.is_alive() or self._exit.is_set():
+                    continue
+                logger.error(f"Worker process {process.pid} exited with code {process.exitcode}. It is restarted.")
+                process.join()
+                self._exit.wait(max(0., self._start_times[i] + self.RESTART_DELAY - time.monotonic()))
+                if not self._exit.is_set():
+                    self.processes[i] = self._start_worker(i)
+
+    def _start_worker(self, index: int) -> multiprocessing.Process:
+        process = self._context.Process(target=_run_worker_process, name=f"PreforkServer_worker_{index}",
+                                        args=(self._address, self._client_communicator, self.function_executor,
+                                              self.session_tickets, self._reactor_workers, os.getpid()))
+        process.start()
+        self._start_times[index] = time.monotonic()
+        return process
+
+    def mainloop(self) -> None:
+        """Runs the server till it is stopped by a `KeyboardInterrupt`"""
+        while not self._exit.is_set():
+            try:
+                self._exit.wait(5)
+            except KeyboardInterrupt:
+                break
+
+    def stop(self) -> None:
+        """Stops all workers gracefully and waits for them."""
+        self._exit.set()
+        if self.is_alive():
+            self.join()
+        for process in self.processes:
+            process.terminate()
+        deadline = time.monotonic() + self.STOP_TIMEOUT
+        for process in self.processes:
+            process.join(max(0., deadline - time.monotonic()))
+            if process.is_alive():
+                logger.error(f"Worker process {process.pid} did not stop in time. It is killed.")
+                process.kill()
+                process.join()
+        logger.info("Stopped all worker processes")
+
+    def __enter__(self) -> 'PreforkServer':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def _run_worker_process(address: SocketAddress, client_communicator: Type['ClientCommunicator'],
+                        function_executor: Optional[FunctionExecutor], session_tickets: SessionTickets,
+                        reactor_workers: Optional[int], parent_pid: int) -> None:
+    """Target of the worker processes of a :class:`PreforkServer`. Runs a ClientManager till SIGTERM is received or
+    the parent exited. Exits with code 1, if the ClientManager stopped listening before."""
+    # The handler only sets a flag. Setting a threading.Event may deadlock, if the signal interrupts the waiting.
+    stop_requested = []
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: stop_requested.append(signal_number))
+    # A KeyboardInterrupt reaches the whole process group. The parent stops the workers then.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # The ClientManagers of the parent, if there are any, were copied by fork. They don't belong to this process.
+    MetaClientManager._instances = {}
+    MetaClientManager._last_instance = None
+    with ClientManager(address, client_communicator, function_executor, session_tickets, reactor_workers,
+                       reuse_port=True) as client_manager:
+        while client_manager.is_alive() and os.getppid() == parent_pid and not stop_requested:
+            time.sleep(1)
+        listening = client_manager.is_alive()
+    if function_executor is not None:
+        # The copy of this process is not shared with other ClientManagers.
+        function_executor.shutdown()
+    if not listening:
+        sys.exit(1)
+
+
 class ClientCommunicator(Connector):
     """A static accessible class, that is responsible for communicating with a client.
     This class needs to be overwritten, but is only used internally. The overwritten class needs to set the
@@ -202,15 +391,38 @@ class ClientCommunicator(Connector):
     :ivar local_functions: All functions, that are available at the server side.
         instance of: :class:`pynetworking.Communication_client.ServerFunctions`"""
 
-    def __init__(self, id_: int, address: SocketAddress, connection: socket.socket, on_close):
+    def __init__(self, id_: int, address: SocketAddress, connection: socket.socket, on_close,
+                 function_executor: Optional[FunctionExecutor] = None, session_tickets: Optional[SessionTickets] = None,
+                 reactor: Optional[Reactor] = None):
         super().__init__()
         self._id = id_
+        self._session_tickets = session_tickets
         self.communicator = Communicator(address, id_, connection, from_accept=True, on_close=on_close,
-                                         local_functions=self.local_functions)
-        self.communicator.start()
+                                         local_functions=self.local_functions, function_executor=function_executor,
+                                         reactor=reactor)
         self.remote_functions.__setattr__(self.remote_functions, "_connector", self)
+        if reactor is not None:
+            # The client hello is answered, when it is received. Nothing waits for it.
+            if pynetworking.Communication_general.ENCRYPTED_COMMUNICATION:
+                IDManager(self._id).append_dummy_functions(2)
+            reactor.register(connection, self._receive_available)
+            return
+        self.communicator.start()
         if pynetworking.Communication_general.ENCRYPTED_COMMUNICATION:
-            exchange_keys(self)
+            exchange_keys(self, session_tickets)
+
+    def _receive_available(self) -> bool:
+        """Called by the reactor, when the socket is readable. Returns False if the connection was closed."""
+        communicator = self.communicator
+        # The connection may have been closed, after the reactor found the socket readable.
+        if communicator is None or not communicator.receive_available():
+            return False
+        while pynetworking.Communication_general.ENCRYPTED_COMMUNICATION and not self._exchanged_keys:
+            client_hello = communicator.poll_response()
+            if client_hello is None:
+                break
+            answer_client_hello(self, client_hello, self._session_tickets)
+        return True
 
     def close_connection(self: Connector, blocking=True, timeout=float("inf")) -> None:
         return super().close_connection(self, blocking, timeout)
@@ -234,23 +446,44 @@ class ClientFunctions(Functions):
     pass
 
 
-def exchange_keys(client_communicator: ClientCommunicator):
+def exchange_keys(client_communicator: ClientCommunicator, session_tickets: Optional[SessionTickets] = None):
     """Exchanges a symmetric `communication key` with the client. The `communication key` is encrypted,
-    with the public key of the client. After this function, all packets are encrypted with this `communication key`"""
-    # generate communication_key#
-    cryptographer = client_communicator.communicator.cryptographer
-    serialized_communication_key = cryptographer.generate_communication_key()
-
-    # wait for public key
+    with the public key of the client, or derived from the X25519 public keys of both sides. If the client sends a
+    valid session ticket of `session_tickets`, the key is derived from the ticket. After this function, all packets
+    are encrypted with this `communication key`"""
     IDManager(client_communicator.id).append_dummy_functions(2)
-    public_key_packet = client_communicator.communicator.wait_for_response()
-    serialized_public_key = public_key_packet.data["public_key"]
-    cryptographer.public_key_from_serialized_key(serialized_public_key)
-
-    encrypted_communication_key = cryptographer.encrypt_with_public_key(serialized_communication_key)
+    while True:
+        # wait for public key or session ticket
+        public_key_packet = client_communicator.communicator.wait_for_response()
+        if public_key_packet is None:
+            # The client disconnected before the keys were exchanged.
+            return
+        if answer_client_hello(client_communicator, public_key_packet, session_tickets):
+            break
+
+
+def answer_client_hello(client_communicator: ClientCommunicator, public_key_packet: DataPacket,
+                        session_tickets: Optional[SessionTickets] = None) -> bool:
+    """Answers the public key or session ticket of the client. Returns False, if the session ticket was rejected and
+    the client sends a new hello."""
+    cryptographer = client_communicator.communicator.cryptographer
+    # generate communication_key
+    server_hello, communication_key, cipher = cryptographer.server_hello(
+        public_key_packet.data, pynetworking.Communication_general.ACCEPTED_CIPHERS, session_tickets)
+    server_hello["codec"] = pynetworking.Communication_general.choose_codec(public_key_packet.data.get("codecs"))
+    server_hello["compression"] = pynetworking.Communication_general.choose_compression(
+        public_key_packet.data.get("compressions"))
+    if communication_key is None:
+        # The client answers the rejected session ticket immediately with a full key exchange.
+        IDManager(client_communicator.id).append_dummy_functions(2)
+    else:
+        # The client sends encrypted and compressed data as soon as it received the answer.
+        client_communicator.communicator.compressor = new_compressor(server_hello["compression"])
+        cryptographer.set_communication_key(communication_key, cipher, is_server=True)
     # send communication key
-    communication_packet = DataPacket(communication_key=encrypted_communication_key)
-    client_communicator.communicator.send_packet(communication_packet)
-    cryptographer.communication_key = serialized_communication_key
-
+    client_communicator.communicator.send_packet(DataPacket(**server_hello), encrypted=False)
+    if communication_key is None:
+        return False
+    client_communicator.communicator.codec = server_hello["codec"]
     client_communicator._exchanged_keys = True
+    return True
@@ -0,0 +1,91 @@
+"""
+:module: pynetworking.Compression
+:synopsis: Compression of the encrypted messages
+:author: Julian Sobott
+
+Compressions
+------------
+
+Messages are compressed after packing and before encryption, because encrypted messages can't be compressed
+anymore. The compression is negotiated at the key exchange, like the cipher and the codec: the client sends its
+accepted :data:`COMPRESSIONS` and the server chooses the first one, that it also accepts. Without a common compression
+or without encryption (there is no key exchange then) the messages are not compressed. :data:`ZLIB` is the only
+compression of the standard library, that can flush a stream without ending it.
+
+Every message starts with one byte, that tells how the rest is compressed:
+
+- Messages below :attr:`Compressor.THRESHOLD` bytes and messages, that don't compress, are sent raw.
+- Messages up to :attr:`Compressor.STREAM_SIZE` bytes are compressed with one zlib stream per direction, that is
+  flushed after every message. Small messages refer to the previous messages of the connection, so small repetitive
+  packets are compressed well.
+- Larger messages, like the records of files, are compressed on their own.
+
+Before a message larger than :attr:`Compressor.SAMPLE_SIZE` is compressed, a sample of it is compressed. Random or
+already compressed content is detected with the sample and sent raw, because compressing it is much slower than
+encrypting it.
+
+The length of a compressed message tells, how much of it repeats earlier messages. This leaks secrets, if an attacker
+can mix own data with them (like the CRIME attack). That's why no compression is accepted by default.
+
+public classes
+---------------
+
+.. autoclass:: Compressor
+   :members:
+"""
+import zlib
+from typing import Union
+
+ZLIB = "zlib"
+COMPRESSIONS = (ZLIB,)
+
+_RAW = 0
+_STREAM = 1
+_SINGLE = 2
+
+
+class Compressor:
+    """Compresses the sent messages and decompresses the received messages of one connection. The messages must be
+    decompressed in the same order as they are compressed.
+
+    :ivar compression: One of :data:`COMPRESSIONS`.
+    """
+    THRESHOLD = 128
+    STREAM_SIZE = 64 * 1024
+    SAMPLE_SIZE = 4096
+    MAX_RATIO = 0.9
+    LEVEL = 1
+
+    def __init__(self, compression: str = ZLIB) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}. Compression must be one of {COMPRESSIONS}")
+        self.compression = compression
+        self._compressor = zlib.compressobj(self.LEVEL)
+        self._decompressor = zlib.decompressobj()
+
+    def compress(self, message: Union[bytes, memoryview]) -> bytes:
+        if len(message) < self.THRESHOLD or not self._is_compressible(message):
+            return bytes([_RAW]) + message
+        if len(message) <= self.STREAM_SIZE:
+            return bytes([_STREAM]) + self._compressor.compress(message) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        compressed = zlib.compress(message, self.LEVEL)
+        if len(compressed) > len(message) * self.MAX_RATIO:
+            return bytes([_RAW]) + message
+        return bytes([_SINGLE]) + compressed
+
+    def decompress(self, message: Union[bytes, memoryview]) -> Union[bytes, memoryview]:
+        """Raises :class:`ValueError`, if the message wasn't compressed by a :class:`Compressor`."""
+        mode, content = message[0], memoryview(message)[1:]
+        if mode == _RAW:
+            return content
+        if mode == _STREAM:
+            return self._decompressor.decompress(content)
+        if mode == _SINGLE:
+            return zlib.decompress(content)
+        raise ValueError(f"Unknown compression mode: {mode}")
+
+    def _is_compressible(self, message: Union[bytes, memoryview]) -> bool:
+        if len(message) <= self.SAMPLE_SIZE:
+            return True
+        sample = memoryview(message)[:self.SAMPLE_SIZE]
+        return len(zlib.compress(sample, self.LEVEL)) <= self.SAMPLE_SIZE * self.MAX_RATIO
@@ -3,20 +3,123 @@
 :synopsis: Access to Cryptography
 :author: Julian Sobott
 
+Ciphers
+-------
+
+The messages are encrypted with one of :data:`CIPHERS`. :data:`FERNET` is the default. The AEAD ciphers
+:data:`AES_GCM` and :data:`CHACHA20_POLY1305` produce raw binary records, that are only 16 bytes longer than the
+message. Their nonces are not sent, but counted at both sides: 4 bytes, that tell whether the client or the server sent
+the message, followed by an 8 byte counter of the messages sent in this direction. The cipher is negotiated at the
+key exchange.
+
+Large messages, like the content of files, are encrypted with :func:`Cryptographer.encrypt_into` and decrypted with
+:func:`Cryptographer.decrypt_into`. With an AEAD cipher they write into preallocated buffers, so no new bytes are
+allocated for every record. Every record has its own tag (AEAD) or HMAC (Fernet), so its integrity is verified, before
+any of its bytes are used.
+
+Key exchanges
+-------------
+
+The communication key is exchanged with one of :data:`KEY_EXCHANGES`. With :data:`RSA` (default) the client
+generates a RSA-2048 key pair and the server sends a random communication key, encrypted with the public key. With
+:data:`X25519` both sides send an ephemeral X25519 public key and derive the communication key from the shared secret
+with HKDF-SHA256. This is much cheaper than generating a RSA key. Both exchanges need one message of the client
+(:func:`Cryptographer.client_hello`) and one answer of the server (:func:`Cryptographer.server_hello`). The server
+accepts both exchanges.
+
+Session resumption
+------------------
+
+A server with :class:`SessionTickets` adds a ticket to its answer. The ticket contains the cipher and a resumption
+secret, that is derived from the communication key. It is encrypted with a key, that only the server knows. At the
+next connect the client sends the ticket and a random value instead of a public key. Both sides derive a new
+communication key from the resumption secret and the random value, so no keys must be generated. If the server
+rejects the ticket (e.g. it expired or the server restarted), the client falls back to a full key exchange.
+
 public classes
 ---------------
 
 .. autoclass:: Cryptographer
    :members:
    :undoc-members:
+
+.. autoclass:: SessionTickets
+   :members:
+
+.. autoclass:: SessionTicket
 """
+import base64
+import os
+import time
+from typing import Union, Optional, Tuple, NamedTuple
+
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend as crypto_default_backend
 
+FERNET = "fernet"
+AES_GCM = "aes-gcm"
+CHACHA20_POLY1305 = "chacha20-poly1305"
+CIPHERS = (FERNET, AES_GCM, CHACHA20_POLY1305)
+
+RSA = "rsa"
+X25519 = "x25519"
+KEY_EXCHANGES = (RSA, X25519)
+
+_AEAD_CLASSES = {AES_GCM: AESGCM, CHACHA20_POLY1305: ChaCha20Poly1305}
+AEAD_KEY_SIZE = 32
+NONCE_COUNTER_BYTES = 8
+MAX_NONCE_COUNTER = 2 ** (8 * NONCE_COUNTER_BYTES) - 1
+_CLIENT_NONCE_PREFIX = b"\x00\x00\x00\x00"
+_SERVER_NONCE_PREFIX = b"\x00\x00\x00\x01"
+RESUMPTION_RANDOM_SIZE = 32
+AEAD_TAG_SIZE = 16
+
+
+class SessionTicket(NamedTuple):
+    """Everything the client needs to resume a session. The `ticket` is opaque for the client."""
+    ticket: bytes
+    resumption_secret: bytes
+    cipher: str
+
+
+class SessionTickets:
+    """Issues and redeems the session tickets of a server. The tickets are encrypted with AES-GCM and a key, that is
+    generated for every instance. Tickets are valid for `lifetime` seconds."""
+    LIFETIME = 24 * 60 * 60
+    _TIME_BYTES = 8
+    _NONCE_SIZE = 12
+    _ASSOCIATED_DATA = b"pynetworking session ticket"
+
+    def __init__(self, lifetime: float = LIFETIME) -> None:
+        self.lifetime = lifetime
+        self._aead = AESGCM(AESGCM.generate_key(bit_length=256))
+
+    def issue(self, resumption_secret: bytes, cipher: str) -> bytes:
+        nonce = os.urandom(self._NONCE_SIZE)
+        content = int(time.time()).to_bytes(self._TIME_BYTES, "big") + bytes([CIPHERS.index(cipher)]) + \
+            resumption_secret
+        return nonce + self._aead.encrypt(nonce, content, self._ASSOCIATED_DATA)
+
+    def redeem(self, ticket: bytes) -> Optional[Tuple[bytes, str]]:
+        """Returns the resumption secret and the cipher of the ticket. Returns None if the ticket is invalid or
+        expired."""
+        try:
+            content = self._aead.decrypt(ticket[:self._NONCE_SIZE], ticket[self._NONCE_SIZE:], self._ASSOCIATED_DATA)
+        except (InvalidTag, ValueError):
+            return None
+        issued = int.from_bytes(content[:self._TIME_BYTES], "big")
+        if not 0 <= time.time() - issued <= self.lifetime:
+            return None
+        return content[self._TIME_BYTES + 1:], CIPHERS[content[self._TIME_BYTES]]
+
 
 class Cryptographer:
     """Functions for encryption. Supports symmetric and asymmetric keys.
@@ -26,12 +129,24 @@ class Cryptographer:
     :ivar _public_key: Needed to exchange the communication key.
     :ivar _private_key: Needed to exchange the communication key.
     :ivar _fernet: Decrypts and encrypts messages.
+    :ivar cipher: One of :data:`CIPHERS`.
+    :ivar _aead: Decrypts and encrypts messages, if the cipher is an AEAD cipher.
     """
     def __init__(self):
         self._communication_key = None
         self._public_key = None
         self._private_key = None
+        self._x25519_private_key: Optional[X25519PrivateKey] = None
+        self._resumption: Optional[Tuple[SessionTicket, bytes]] = None
+        self.session_ticket: Optional[SessionTicket] = None
         self._fernet = None
+        self.cipher = FERNET
+        self._aead: Optional[Union[AESGCM, ChaCha20Poly1305]] = None
+        self._crypts_into = False
+        self._send_nonce_prefix = _CLIENT_NONCE_PREFIX
+        self._recv_nonce_prefix = _SERVER_NONCE_PREFIX
+        self._send_counter = 0
+        self._recv_counter = 0
         self.is_encrypted_communication = False
 
     @property
@@ -41,20 +156,203 @@ class Cryptographer:
     @communication_key.setter
     def communication_key(self, key):
         """Sets the communication key, is_encrypted_communication and fernet"""
-        if self.communication_key is None:
-            self.is_encrypted_communication = True
+        self.set_communication_key(key)
+
+    def set_communication_key(self, key: bytes, cipher: str = FERNET, is_server: bool = False) -> None:
+        """Sets the communication key and the cipher. All following messages are encrypted. The server must pass
+        `is_server`, so both sides use different nonces for the AEAD ciphers."""
+        if self.communication_key is not None:
+            return
+        if cipher not in CIPHERS:
+            raise ValueError(f"Unknown cipher: {cipher}. Cipher must be one of {CIPHERS}")
+        if cipher == FERNET:
             self._fernet = Fernet(key)
-            self._communication_key = key
+        else:
+            self._aead = _AEAD_CLASSES[cipher](key)
+            # encrypt_into and decrypt_into are only available in newer versions of cryptography.
+            self._crypts_into = hasattr(self._aead, "encrypt_into")
+            if is_server:
+                self._send_nonce_prefix, self._recv_nonce_prefix = _SERVER_NONCE_PREFIX, _CLIENT_NONCE_PREFIX
+        self.cipher = cipher
+        self._communication_key = key
+        self.is_encrypted_communication = True
 
-    def encrypt(self, byte_string: bytes) -> bytes:
+    def encrypt(self, byte_string: Union[bytes, memoryview]) -> bytes:
+        """Encrypts one message. With an AEAD cipher, the messages must be decrypted in the same order as they are
+        encrypted."""
         if not self.is_encrypted_communication:
             return byte_string
-        return self._fernet.encrypt(byte_string)
+        if self._aead is None:
+            return self._fernet.encrypt(bytes(byte_string))
+        nonce = self._next_nonce(self._send_nonce_prefix, self._send_counter)
+        self._send_counter += 1
+        return self._aead.encrypt(nonce, byte_string, None)
 
-    def decrypt(self, byte_string: bytes) -> bytes:
+    def decrypt(self, byte_string: Union[bytes, memoryview]) -> bytes:
         if not self.is_encrypted_communication:
             return byte_string
-        return self._fernet.decrypt(byte_string)
+        if self._aead is None:
+            return self._fernet.decrypt(bytes(byte_string))
+        nonce = self._next_nonce(self._recv_nonce_prefix, self._recv_counter)
+        self._recv_counter += 1
+        return self._aead.decrypt(nonce, byte_string, None)
+
+    def encrypt_into(self, byte_string: Union[bytes, memoryview],
+                     buffer: Union[bytearray, memoryview]) -> Union[bytes, memoryview]:
+        """Encrypts one message like :func:`encrypt` and returns the encrypted message. With an AEAD cipher it is
+        written into the `buffer`, that must hold at least :data:`AEAD_TAG_SIZE` bytes more than the message.
+        Otherwise new bytes are returned."""
+        if not self._crypts_into:
+            return self.encrypt(byte_string)
+        nonce = self._next_nonce(self._send_nonce_prefix, self._send_counter)
+        self._send_counter += 1
+        out = memoryview(buffer)[:len(byte_string) + AEAD_TAG_SIZE]
+        self._aead.encrypt_into(nonce, byte_string, None, out)
+        return out
+
+    def decrypted_length(self, record: Union[bytes, memoryview]) -> Optional[int]:
+        """Number of bytes, that :func:`decrypt_into` writes. None, if the message can only be decrypted with
+        :func:`decrypt`."""
+        if not self._crypts_into:
+            return None
+        return len(record) - AEAD_TAG_SIZE
+
+    def decrypt_into(self, record: Union[bytes, memoryview], buffer: memoryview) -> None:
+        """Decrypts one message into the `buffer`, that must have exactly the :func:`decrypted_length`. Raises
+        :class:`cryptography.exceptions.InvalidTag`, if the message was modified."""
+        nonce = self._next_nonce(self._recv_nonce_prefix, self._recv_counter)
+        self._recv_counter += 1
+        self._aead.decrypt_into(nonce, record, None, buffer)
+
+    @staticmethod
+    def _next_nonce(prefix: bytes, counter: int) -> bytes:
+        if counter > MAX_NONCE_COUNTER:
+            raise OverflowError("Too many messages were encrypted with this communication key")
+        return prefix + counter.to_bytes(NONCE_COUNTER_BYTES, "big")
+
+    def client_hello(self, key_exchange: str, ciphers: list, session_ticket: Optional[SessionTicket] = None) -> dict:
+        """Returns the data of the first message of the key exchange, that is sent by the client. With a
+        `session_ticket` the previous session is resumed."""
+        if session_ticket is not None:
+            client_random = os.urandom(RESUMPTION_RANDOM_SIZE)
+            self._resumption = session_ticket, client_random
+            return {"ticket": session_ticket.ticket, "client_random": client_random}
+        self._resumption = None
+        if key_exchange == X25519:
+            return {"x25519_public_key": self.generate_x25519_key_pair(), "ciphers": ciphers}
+        if key_exchange != RSA:
+            raise ValueError(f"Unknown key exchange: {key_exchange}. Key exchange must be one of {KEY_EXCHANGES}")
+        self.generate_key_pair()
+        return {"public_key": self.get_serialized_public_key(), "ciphers": ciphers}
+
+    def server_hello(self, client_hello: dict, accepted_ciphers: list,
+                     session_tickets: Optional[SessionTickets] = None) -> Tuple[dict, Optional[bytes], Optional[str]]:
+        """Answers the :func:`client_hello`. Returns the data of the answer and the communication key and cipher, that
+        must be set after the answer is sent. If a session ticket is rejected, the key and cipher are None and the
+        client sends a new :func:`client_hello`."""
+        if "ticket" in client_hello:
+            redeemed = session_tickets.redeem(client_hello["ticket"]) if session_tickets is not None else None
+            if redeemed is None or redeemed[1] not in accepted_ciphers:
+                return {"resumed": False}, None, None
+            resumption_secret, cipher = redeemed
+            server_random = os.urandom(RESUMPTION_RANDOM_SIZE)
+            communication_key = self.derive_resumed_key(resumption_secret, client_hello["client_random"],
+                                                        server_random, cipher)
+            return {"resumed": True, "server_random": server_random, "cipher": cipher}, communication_key, cipher
+
+        cipher = self.choose_cipher(client_hello.get("ciphers"), accepted_ciphers)
+        if "x25519_public_key" in client_hello:
+            public_key = self.generate_x25519_key_pair()
+            communication_key = self.derive_communication_key(client_hello["x25519_public_key"], public_key, cipher)
+            server_hello = {"x25519_public_key": public_key, "cipher": cipher}
+        else:
+            self.public_key_from_serialized_key(client_hello["public_key"])
+            communication_key = self.generate_communication_key(cipher)
+            encrypted_communication_key = self.encrypt_with_public_key(communication_key)
+            server_hello = {"communication_key": encrypted_communication_key, "cipher": cipher}
+        if session_tickets is not None:
+            server_hello["ticket"] = session_tickets.issue(self.derive_resumption_secret(communication_key), cipher)
+        return server_hello, communication_key, cipher
+
+    def key_from_server_hello(self, server_hello: dict) -> Optional[Tuple[bytes, str]]:
+        """Returns the communication key and the cipher of the :func:`server_hello`. Returns None if the server
+        rejected the session ticket. The :attr:`session_ticket` is set, if the server sent one."""
+        if self._resumption is not None:
+            session_ticket, client_random = self._resumption
+            if not server_hello.get("resumed", False):
+                self.session_ticket = None
+                return None
+            self.session_ticket = session_ticket
+            return self.derive_resumed_key(session_ticket.resumption_secret, client_random,
+                                           server_hello["server_random"], session_ticket.cipher), session_ticket.cipher
+
+        cipher = server_hello.get("cipher", FERNET)
+        if "x25519_public_key" in server_hello:
+            client_public_key = self._x25519_private_key.public_key().public_bytes(
+                encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+            communication_key = self.derive_communication_key(server_hello["x25519_public_key"], client_public_key,
+                                                              cipher, is_server=False)
+        else:
+            communication_key = self.decrypt_with_private_key(server_hello["communication_key"])
+        if "ticket" in server_hello:
+            self.session_ticket = SessionTicket(server_hello["ticket"],
+                                                self.derive_resumption_secret(communication_key), cipher)
+        return communication_key, cipher
+
+    def generate_x25519_key_pair(self) -> bytes:
+        """Generates an ephemeral X25519 key pair and returns the raw public key."""
+        self._x25519_private_key = X25519PrivateKey.generate()
+        return self._x25519_private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+
+    def derive_communication_key(self, peer_public_key: bytes, own_public_key: bytes, cipher: str,
+                                 is_server: bool = True) -> bytes:
+        """Derives the communication key for the cipher from the X25519 shared secret. Both public keys and the
+        cipher are bound to the key."""
+        shared_key = self._x25519_private_key.exchange(X25519PublicKey.from_public_bytes(peer_public_key))
+        client_public_key, server_public_key = (peer_public_key, own_public_key) if is_server else \
+            (own_public_key, peer_public_key)
+        key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=AEAD_KEY_SIZE,
+            salt=None,
+            info=b"pynetworking " + cipher.encode() + client_public_key + server_public_key,
+            backend=crypto_default_backend()
+        ).derive(shared_key)
+        return self._to_communication_key(key, cipher)
+
+    @staticmethod
+    def derive_resumption_secret(communication_key: bytes) -> bytes:
+        """The secret of a session ticket. It is derived from the communication key of the full key exchange."""
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=AEAD_KEY_SIZE,
+            salt=None,
+            info=b"pynetworking resumption",
+            backend=crypto_default_backend()
+        ).derive(communication_key)
+
+    @classmethod
+    def derive_resumed_key(cls, resumption_secret: bytes, client_random: bytes, server_random: bytes,
+                           cipher: str) -> bytes:
+        """Every resumed session gets a new communication key, so the AEAD nonces are never reused with a key. Both
+        peers add randomness, so a replayed resumption of the client gets a different key than the recorded one."""
+        key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=AEAD_KEY_SIZE,
+            salt=client_random + server_random,
+            info=b"pynetworking resumed " + cipher.encode(),
+            backend=crypto_default_backend()
+        ).derive(resumption_secret)
+        return cls._to_communication_key(key, cipher)
+
+    @staticmethod
+    def _to_communication_key(key: bytes, cipher: str) -> bytes:
+        if cipher == FERNET:
+            return base64.urlsafe_b64encode(key)
+        return key
 
     def generate_key_pair(self) -> tuple:
         self._private_key = rsa.generate_private_key(
@@ -66,9 +364,20 @@ class Cryptographer:
         return self._private_key, self._public_key
 
     @staticmethod
-    def generate_communication_key():
-        """Generates a symmetric key"""
-        return Fernet.generate_key()
+    def generate_communication_key(cipher: str = FERNET) -> bytes:
+        """Generates a symmetric key for the cipher"""
+        if cipher == FERNET:
+            return Fernet.generate_key()
+        return os.urandom(AEAD_KEY_SIZE)
+
+    @staticmethod
+    def choose_cipher(offered_ciphers: Optional[list], accepted_ciphers: list) -> str:
+        """Returns the first accepted cipher, that is also offered. Peers, that offer no ciphers only know
+        :data:`FERNET`."""
+        for cipher in accepted_ciphers:
+            if cipher in (offered_ciphers or (FERNET,)):
+                return cipher
+        return FERNET
 
     def get_serialized_public_key(self) -> bytes:
         return self._public_key.public_bytes(
@@ -10,12 +10,53 @@ public functions
 
 .. autofunction:: general_unpack
 
+Codecs
+------
+
+:func:`general_pack` packs with one of :data:`CODECS`. :data:`DILL` can pack nearly everything. :data:`BINARY` is a
+tagged binary format for the :data:`types`. Every value is a one byte tag (its code in :data:`types`), followed by
+the value: a 8 byte float, one byte for bool, nothing for None, or the length and the content of int (signed, big
+endian), str, bytes, list, tuple and dict. Lengths up to 254 take one byte, longer ones 0xFF and 4 bytes. Values of
+other types are embedded as dill bytes with the tag :data:`FALLBACK_TYPE`. The binary bytes start with
+:data:`BINARY_MARKER`, dill (pickle) bytes always start with 0x80, so :func:`general_unpack` accepts both.
+
+Out-of-band buffers
+-------------------
+
+bytes, bytearray and memoryview values with at least :data:`OUT_OF_BAND_THRESHOLD` bytes are not copied into the
+packed bytes. They are pickled as out-of-band buffers (pickle protocol 5) with both codecs, and
+:func:`general_pack_segments` returns them as separate segments, that are written to the socket as they are. The
+packed bytes are then:
+
+<OUT_OF_BAND_MARKER><num_buffers><buffer_len>*num_buffers<packed_bytes><buffer>*num_buffers
+
+At unpacking the buffers are memoryviews of the received bytes. memoryview values stay such views, bytes and
+bytearray values are copied once out of them.
+
+Python 3.7 has no pickle protocol 5, there all values are packed in-band.
+
+.. autofunction:: general_pack_segments
+
 .. autofunction:: pack_int_type
 
 .. autofunction:: unpack_int_type
 
 .. autofunction:: pack_int
 
+.. autofunction:: pack_record
+
+.. autofunction:: send_segments
+
+.. autofunction:: iter_file_records
+
+.. autofunction:: open_source_file
+
+.. autofunction:: read_file_into
+
+.. autofunction:: file_version
+
+.. autofunction:: copy_file_range
+
 public classes
 --------------
 
@@ -23,12 +64,49 @@ public classes
     :members:
     :undoc-members:
 
+.. autoclass:: ReceiveBuffer
+    :members:
+    :undoc-members:
+
 .. autoclass:: File
     :members:
     :undoc-members:
 
+.. autoclass:: Directory
+    :members:
+
+.. autoclass:: FileWriters
+    :members:
+
+.. autoclass:: FileManifest
+    :members:
+
+.. autoclass:: FileTransfer
+    :members:
+
+.. autoclass:: ResumableFiles
+    :members:
+
+.. autoclass:: FileSignature
+    :members:
+
 """
+import collections
+import concurrent.futures
+import hashlib
+import io
+import math
+import mmap
 import os
+import pickle
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Union, Optional, List, Iterator, Tuple, Dict, Set
+
 import dill
 
 from pynetworking.utils import Ddict
@@ -38,6 +116,7 @@ NUM_TYPE_BYTES = 3
 ENCODING = "utf-8"
 BYTEORDER = "big"
 NUM_INT_BYTES = 4
+PARTIAL_SUFFIX = ".part"
 
 types = Ddict({
     int:    0x001,
@@ -51,21 +130,212 @@ types = Ddict({
     type(None):   0x009,
 })
 
+_INT_TYPE, _FLOAT_TYPE, _STR, _LIST, _DICT, _TUPLE, _BYTES, _BOOL, _NONE = \
+    (types[type_] for type_ in (int, float, str, list, dict, tuple, bytes, bool, type(None)))
+_NONE_TAG = bytes([_NONE])
+_TRUE_TAG = bytes([_BOOL, 1])
+_FALSE_TAG = bytes([_BOOL, 0])
+
+
+DILL = "dill"
+BINARY = "binary"
+CODECS = (DILL, BINARY)
+
+BINARY_MARKER = 0x042
+FALLBACK_TYPE = 0x0FF
+OUT_OF_BAND_MARKER = 0x043
+OUT_OF_BAND_THRESHOLD = 64 * 1024
+_OUT_OF_BAND_SUPPORTED = sys.version_info >= (3, 8)     # pickle protocol 5
+_IOV_MAX = 1024  # Max number of buffers of one sendmsg call on Linux and macOS
+_JOIN_THRESHOLD = 4096
+_MARKER = bytes([BINARY_MARKER])
+
+_LONG_LENGTH = 0xFF
+_LENGTH = struct.Struct(">I")
+_FLOAT = struct.Struct(">d")
+_TAG_FLOAT = struct.Struct(">Bd")
 
-def general_pack(*args) -> bytes:
-    """Converts all args into a bytes string. """
-    return dill.dumps(args)
 
+def general_pack(*args, codec: str = DILL) -> bytes:
+    """Converts all args into a bytes string. The :data:`BINARY` codec is faster and more compact for the
+    :data:`types`, everything else is packed with dill."""
+    return b"".join(general_pack_segments(*args, codec=codec))
 
-def general_unpack(byte_stream: 'ByteStream', num_bytes=None) -> tuple:
+
+def general_pack_segments(*args, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+    """Same as :func:`general_pack`, but large buffers are not copied. The joined segments are the bytes string of
+    :func:`general_pack`."""
+    buffers = []
+    packed = None
+    if codec == BINARY:
+        parts = [_MARKER]
+        try:
+            _binary_encode(args, parts, buffers)
+            packed = b"".join(parts)
+        except RecursionError:
+            # e.g. a list, that contains itself
+            buffers.clear()
+    if packed is None:
+        packed = _dill_dumps(args, buffers)
+    if not buffers:
+        return [packed]
+    buffers = [buffer.raw() for buffer in buffers]
+    head = bytes([OUT_OF_BAND_MARKER]) + pack_int(len(buffers)) + b"".join(pack_int(buffer.nbytes)
+                                                                           for buffer in buffers)
+    return [head + packed, *buffers]
+
+
+def general_unpack(byte_stream: Union['ByteStream', 'ReceiveBuffer'], num_bytes=None) -> tuple:
     """Take in a bytestream, with the bytes string from :func:`general_pack`, and converts it back into a tuple with
-    all args."""
+    all args. The bytes are not copied, if the bytestream is a :class:`ReceiveBuffer`. Both codecs are accepted."""
     num_bytes = byte_stream.remaining_length if num_bytes is None else num_bytes
     bytes_string = byte_stream.next_bytes(num_bytes)
-    data = dill.loads(bytes_string)
+    buffers = iter(())
+    if num_bytes > 0 and bytes_string[0] == OUT_OF_BAND_MARKER:
+        bytes_string, buffers = _split_buffers(memoryview(bytes_string))
+        if isinstance(byte_stream, ReceiveBuffer):
+            # The buffers may end up as memoryviews in the unpacked data.
+            byte_stream.detach()
+    if len(bytes_string) > 0 and bytes_string[0] == BINARY_MARKER:
+        data, _ = _binary_decode(memoryview(bytes_string), 1, buffers)
+        return data
+    data = _dill_loads(bytes_string, buffers)
     return data
 
 
+class _Pickler(dill.Pickler):
+    """Pickles large bytes, bytearray and contiguous memoryview values as out-of-band buffers."""
+
+    def reducer_override(self, obj):
+        obj_type = type(obj)
+        if obj_type is bytes or obj_type is bytearray:
+            if len(obj) >= OUT_OF_BAND_THRESHOLD:
+                return obj_type, (pickle.PickleBuffer(obj),)
+        elif obj_type is memoryview:
+            if obj.nbytes >= OUT_OF_BAND_THRESHOLD and obj.contiguous:
+                return _rebuild_memoryview, (pickle.PickleBuffer(obj), obj.format, obj.shape)
+        return NotImplemented
+
+
+def _rebuild_memoryview(buffer: memoryview, format_: str, shape: tuple) -> memoryview:
+    return memoryview(buffer).cast("B").cast(format_, shape)
+
+
+def _dill_dumps(value, buffers: list) -> bytes:
+    if not _OUT_OF_BAND_SUPPORTED:
+        return dill.dumps(value)
+    file = io.BytesIO()
+    _Pickler(file, protocol=5, buffer_callback=buffers.append).dump(value)
+    return file.getvalue()
+
+
+def _dill_loads(bytes_string: Union[bytes, memoryview], buffers: Iterator[memoryview]):
+    if not _OUT_OF_BAND_SUPPORTED:
+        return dill.loads(bytes_string)
+    return dill.loads(bytes_string, buffers=buffers)
+
+
+def _split_buffers(view: memoryview) -> tuple:
+    """Splits the bytes of :func:`general_pack_segments` into the packed bytes and an iterator over the buffers."""
+    num_buffers = int.from_bytes(view[1: 1 + NUM_INT_BYTES], BYTEORDER, signed=True)
+    idx = 1 + NUM_INT_BYTES
+    lengths = []
+    for _ in range(num_buffers):
+        lengths.append(int.from_bytes(view[idx: idx + NUM_INT_BYTES], BYTEORDER, signed=True))
+        idx += NUM_INT_BYTES
+    buffer_idx = len(view) - sum(lengths)
+    packed = view[idx: buffer_idx]
+    buffers = []
+    for length in lengths:
+        buffers.append(view[buffer_idx: buffer_idx + length])
+        buffer_idx += length
+    return packed, iter(buffers)
+
+
+def _pack_length(tag: int, length: int) -> bytes:
+    """Tag and length in 2 bytes, or in 6 bytes if the length is bigger than 254."""
+    if length < _LONG_LENGTH:
+        return bytes((tag, length))
+    return bytes((tag, _LONG_LENGTH)) + _LENGTH.pack(length)
+
+
+def _unpack_length(view: memoryview, idx: int) -> tuple:
+    length = view[idx]
+    if length < _LONG_LENGTH:
+        return length, idx + 1
+    return _LENGTH.unpack_from(view, idx + 1)[0], idx + 5
+
+
+def _binary_encode(value, parts: list, buffers: list) -> None:
+    """Appends the tagged bytes of the value to parts. Only exact types of :data:`types` are encoded, subclasses (e.g.
+    an IntEnum or a namedtuple) are packed with dill to keep their type. Large bytes are packed with dill too, to
+    append them to the out-of-band buffers."""
+    value_type = type(value)
+    if value_type is str:
+        encoded = value.encode(ENCODING)
+        parts.append(_pack_length(_STR, len(encoded)))
+        parts.append(encoded)
+    elif value_type is int:
+        encoded = value.to_bytes(value.bit_length() // 8 + 1, BYTEORDER, signed=True)
+        parts.append(_pack_length(_INT_TYPE, len(encoded)))
+        parts.append(encoded)
+    elif value_type is tuple or value_type is list:
+        parts.append(_pack_length(_TUPLE if value_type is tuple else _LIST, len(value)))
+        for item in value:
+            _binary_encode(item, parts, buffers)
+    elif value_type is dict:
+        parts.append(_pack_length(_DICT, len(value)))
+        for key, item in value.items():
+            _binary_encode(key, parts, buffers)
+            _binary_encode(item, parts, buffers)
+    elif value is None:
+        parts.append(_NONE_TAG)
+    elif value_type is bool:
+        parts.append(_TRUE_TAG if value else _FALSE_TAG)
+    elif value_type is float:
+        parts.append(_TAG_FLOAT.pack(_FLOAT_TYPE, value))
+    elif value_type is bytes and len(value) < OUT_OF_BAND_THRESHOLD:
+        parts.append(_pack_length(_BYTES, len(value)))
+        parts.append(value)
+    else:
+        pickled = _dill_dumps(value, buffers)
+        parts.append(_pack_length(FALLBACK_TYPE, len(pickled)))
+        parts.append(pickled)
+
+
+def _binary_decode(view: memoryview, idx: int, buffers: Iterator[memoryview]) -> tuple:
+    """Returns the decoded value, that starts at idx, and the idx after it."""
+    tag = view[idx]
+    if tag == _NONE:
+        return None, idx + 1
+    if tag == _BOOL:
+        return view[idx + 1] == 1, idx + 2
+    if tag == _FLOAT_TYPE:
+        return _FLOAT.unpack_from(view, idx + 1)[0], idx + 9
+    length, idx = _unpack_length(view, idx + 1)
+    if tag == _STR:
+        return str(view[idx: idx + length], ENCODING), idx + length
+    if tag == _INT_TYPE:
+        return int.from_bytes(view[idx: idx + length], BYTEORDER, signed=True), idx + length
+    if tag == _TUPLE or tag == _LIST:
+        items = []
+        for _ in range(length):
+            item, idx = _binary_decode(view, idx, buffers)
+            items.append(item)
+        return (tuple(items) if tag == _TUPLE else items), idx
+    if tag == _DICT:
+        dict_ = {}
+        for _ in range(length):
+            key, idx = _binary_decode(view, idx, buffers)
+            dict_[key], idx = _binary_decode(view, idx, buffers)
+        return dict_, idx
+    if tag == _BYTES:
+        return bytes(view[idx: idx + length]), idx + length
+    if tag == FALLBACK_TYPE:
+        return _dill_loads(view[idx: idx + length], buffers), idx + length
+    raise ValueError(f"Unknown type tag: {tag}")
+
+
 class ByteStream:
     """This class utilises the bytes object. Among other things, it stores the bytes string and the idx. All `next`
     functions move the idx."""
@@ -122,13 +392,156 @@ class ByteStream:
         return str(self.byte_string[:self.idx]) + "|" + str(self.byte_string[self.idx:])
 
 
+class ReceiveBuffer:
+    """Growable receive buffer, that replaces the :class:`ByteStream` at receiving. Data is received directly into a
+    preallocated bytearray with :func:`recv_into`. It has the same `next` functions as the :class:`ByteStream`, but
+    they return memoryviews of the buffer instead of copies. These memoryviews are only valid till the next data is
+    written into the buffer.
+
+    Consumed bytes are not removed immediately. When there is not enough free space at the end, the unconsumed bytes
+    are moved to the start or the buffer is replaced by a buffer with double capacity. So receiving n bytes costs
+    O(n), no matter in how many chunks they arrive.
+    """
+    INITIAL_CAPACITY = 64 * 1024
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY) -> None:
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self.idx = 0
+        self._end = 0
+
+    @property
+    def remaining_length(self) -> int:
+        return self._end - self.idx
+
+    @property
+    def length(self) -> int:
+        return self._end
+
+    @property
+    def reached_end(self) -> bool:
+        return self.remaining_length <= 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def next_int(self) -> int:
+        """Converts the next bytes into an integer."""
+        return int.from_bytes(self.next_bytes(NUM_INT_BYTES), BYTEORDER, signed=True)
+
+    def next_bytes(self, num_bytes: int) -> memoryview:
+        assert num_bytes >= 0, f"This function is not meant to be called with negative values ({num_bytes})"
+        if num_bytes > self.remaining_length:
+            raise IndexError(f"Byte string ran out of scope: {self.idx + num_bytes} > {self._end}")
+        view = self._view[self.idx: self.idx + num_bytes]
+        self.idx += num_bytes
+        return view
+
+    def next_all_bytes(self) -> memoryview:
+        return self.next_bytes(self.remaining_length)
+
+    def remove_consumed_bytes(self) -> None:
+        """Marks all bytes before the idx as free. Nothing is copied."""
+        if self.idx == self._end:
+            self.idx = self._end = 0
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        """Returns the position of `sub` relative to the idx or -1. The search begins `start` bytes after the idx."""
+        position = self._buffer.find(sub, self.idx + start, self._end)
+        return -1 if position < 0 else position - self.idx
+
+    def recv_into(self, socket_connection: socket.socket, num_bytes: int) -> int:
+        """Receives at most `num_bytes` from the socket directly into the buffer. Returns the number of received
+        bytes, 0 if the connection is closed."""
+        received = socket_connection.recv_into(self.reserve(num_bytes), num_bytes)
+        self._end += received
+        return received
+
+    def reserve(self, num_bytes: int) -> memoryview:
+        """Returns a writable memoryview of at least `num_bytes` free bytes at the end. Call :func:`commit` after
+        writing into it."""
+        if self._end + num_bytes > len(self._buffer):
+            remaining_length = self.remaining_length
+            if remaining_length + num_bytes <= len(self._buffer) // 2:
+                self._view[:remaining_length] = self._view[self.idx:self._end]
+            else:
+                # A new buffer leaves memoryviews of the old buffer untouched.
+                new_buffer = bytearray(max(2 * len(self._buffer), remaining_length + num_bytes))
+                new_buffer[:remaining_length] = self._view[self.idx:self._end]
+                self._buffer = new_buffer
+                self._view = memoryview(new_buffer)
+            self.idx = 0
+            self._end = remaining_length
+        return self._view[self._end: self._end + num_bytes]
+
+    def commit(self, num_bytes: int) -> None:
+        """Adds `num_bytes`, that were written into the memoryview of :func:`reserve`."""
+        self._end += num_bytes
+
+    def detach(self) -> None:
+        """Leaves the current bytearray to the returned memoryviews, so they stay valid. The unconsumed bytes are
+        moved into a new buffer."""
+        remaining_length = self.remaining_length
+        new_buffer = bytearray(max(self.INITIAL_CAPACITY, remaining_length))
+        new_buffer[:remaining_length] = self._view[self.idx:self._end]
+        self._buffer = new_buffer
+        self._view = memoryview(new_buffer)
+        self.idx = 0
+        self._end = remaining_length
+
+    def pop_last(self, num_bytes: int) -> bytes:
+        """Removes and returns the last `num_bytes` unconsumed bytes."""
+        num_bytes = min(num_bytes, self.remaining_length)
+        self._end -= num_bytes
+        return bytes(self._view[self._end: self._end + num_bytes])
+
+    def next_record(self) -> Optional[memoryview]:
+        """Returns the next record of :func:`pack_record` without its length. Returns None and consumes nothing, if
+        the record is not fully received yet."""
+        if self.remaining_length < NUM_INT_BYTES:
+            return None
+        record_length = int.from_bytes(self._view[self.idx: self.idx + NUM_INT_BYTES], BYTEORDER, signed=True)
+        if self.remaining_length < NUM_INT_BYTES + record_length:
+            return None
+        self.idx += NUM_INT_BYTES
+        return self.next_bytes(record_length)
+
+    def missing_record_bytes(self) -> int:
+        """Number of bytes, that are at least missing to return the next record with :func:`next_record`."""
+        if self.remaining_length < NUM_INT_BYTES:
+            return NUM_INT_BYTES - self.remaining_length
+        record_length = int.from_bytes(self._view[self.idx: self.idx + NUM_INT_BYTES], BYTEORDER, signed=True)
+        return max(0, NUM_INT_BYTES + record_length - self.remaining_length)
+
+    def __iadd__(self, other: Union[bytes, bytearray, memoryview]) -> 'ReceiveBuffer':
+        num_bytes = len(other)
+        self.reserve(num_bytes)[:] = other
+        self._end += num_bytes
+        return self
+
+    def __repr__(self):
+        return f"ReceiveBuffer({self.remaining_length}/{len(self._buffer)} bytes)"
+
+
 class File:
     """This class represents a file that should be sent. If a file is to be sent, an object of this class shall be
-    sent with the proper paths. This internally sends the file."""
+    sent with the proper paths. This internally sends the file. At encrypted connections the file is encrypted in
+    records of `record_size` bytes. By default the `FILE_RECORD_SIZE` of the communicator is used.
+
+    A `resumable` file is sent with a :class:`FileManifest`. The receiver keeps the received blocks, if the transfer
+    is interrupted, and can request the missing blocks later.
+
+    A `delta` file is only offered first. The receiver requests it with the :class:`FileSignature` of the old file at
+    `dst_path` and only the changed parts are sent. It is resumable too."""
 
-    def __init__(self, src_path: str, dst_path: str, size=None) -> None:
+    def __init__(self, src_path: str, dst_path: str, size=None, record_size: Optional[int] = None,
+                 resumable: bool = False, delta: bool = False) -> None:
         self.src_path = src_path
         self.dst_path = dst_path
+        self.record_size = record_size
+        self.resumable = resumable
+        self.delta = delta
         if size is None:
             self.size = os.path.getsize(src_path)
         else:
@@ -139,6 +552,497 @@ class File:
         return cls(file_meta_packet.src_path, file_meta_packet.dst_path, file_meta_packet.file_size)
 
 
+class Directory:
+    """This class represents a directory that should be sent. It is returned like a :class:`File`. All files of the
+    directory are sent in one :class:`pynetworking.Packets.DirectoryPacket`, that lists their relative paths and
+    sizes, followed by their content one after another. Small files are packed together into records of
+    `record_size` bytes (by default the `FILE_RECORD_SIZE` of the communicator) and written by :class:`FileWriters`
+    at the receiver.
+
+    :ivar directories: The relative paths of all sub directories, separated by "/".
+    :ivar files: The relative paths, separated by "/", and sizes of all regular files.
+    """
+
+    def __init__(self, src_path: str, dst_path: str, record_size: Optional[int] = None) -> None:
+        self.src_path = src_path
+        self.dst_path = dst_path
+        self.record_size = record_size
+        self.directories: List[str] = []
+        self.files: List[Tuple[str, int]] = []
+
+    def scan(self) -> None:
+        """Collects the sub directories and files at the source, sorted by their paths."""
+        self.directories, self.files = [], []
+        self._scan(self.src_path, "")
+
+    def _scan(self, path: str, prefix: str) -> None:
+        with os.scandir(path) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                relative_path = prefix + entry.name
+                if entry.is_dir():
+                    self.directories.append(relative_path)
+                    self._scan(entry.path, relative_path + "/")
+                elif entry.is_file():
+                    self.files.append((relative_path, entry.stat().st_size))
+
+    def source(self, relative_path: str) -> str:
+        return os.path.join(self.src_path, *relative_path.split("/"))
+
+    def destination(self, relative_path: str) -> Optional[str]:
+        """The path at the receiver. None if the relative path leads out of the destination."""
+        parts = relative_path.split("/")
+        if any(part in ("", ".", "..") or os.sep in part or (os.altsep and os.altsep in part) for part in parts) \
+                or os.path.isabs(relative_path) or os.path.splitdrive(relative_path)[0]:
+            return None
+        return os.path.join(self.dst_path, *parts)
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size in self.files)
+
+    @classmethod
+    def from_packet(cls, directory_packet) -> 'Directory':
+        directory = cls(directory_packet.src_path, directory_packet.dst_path)
+        directory.directories, directory.files = directory_packet.directories, directory_packet.files
+        return directory
+
+
+class FileWriters:
+    """Writes small files in a pool of threads, so the receiving thread doesn't wait for creating, writing and
+    closing every file. At most `max_pending_bytes` are queued. The first error is kept, the other files are still
+    written."""
+    NUM_THREADS = 4
+    MAX_PENDING_BYTES = 64 * 1024 * 1024
+    MAX_FILE_SIZE = 1024 * 1024
+
+    def __init__(self, num_threads: int = NUM_THREADS, max_pending_bytes: int = MAX_PENDING_BYTES) -> None:
+        self.max_pending_bytes = max_pending_bytes
+        self.pending_bytes = 0
+        self.error: Optional[OSError] = None
+        self._pending: collections.deque = collections.deque()
+        self._executor = concurrent.futures.ThreadPoolExecutor(num_threads, thread_name_prefix="File_writer")
+
+    def submit(self, path: str, data: bytes) -> None:
+        self._pending.append((self._executor.submit(self._write, path, data), len(data)))
+        self.pending_bytes += len(data)
+
+    def is_full(self) -> bool:
+        return self.pending_bytes > self.max_pending_bytes
+
+    def pop_oldest(self) -> concurrent.futures.Future:
+        """The future of the oldest queued file. Its bytes aren't counted as pending anymore."""
+        future, num_bytes = self._pending.popleft()
+        self.pending_bytes -= num_bytes
+        return future
+
+    def write(self, path: str, data: bytes) -> None:
+        """Queues the file and waits, while too many bytes are pending."""
+        self.submit(path, data)
+        while self.is_full():
+            concurrent.futures.wait([self.pop_oldest()])
+
+    def close(self) -> Optional[OSError]:
+        """Waits till all files are written. Returns the first error."""
+        self._executor.shutdown(wait=True)
+        self._pending.clear()
+        self.pending_bytes = 0
+        return self.error
+
+    def _write(self, path: str, data: bytes) -> None:
+        try:
+            with open(path, "wb") as file:
+                file.write(data)
+        except OSError as error:
+            logger.error(f"Could not write file {path}: {error}")
+            if self.error is None:
+                self.error = error
+
+
+def iter_file_records(file, file_size: int, buffer: memoryview) -> Iterator[memoryview]:
+    """Reads exactly `file_size` bytes of the opened file into the buffer and yields the filled part of the buffer.
+    Every record is only valid till the next one is read. A file, that shrank in between, is filled up with zeros."""
+    remaining_bytes = file_size
+    while remaining_bytes > 0:
+        record = buffer[:min(len(buffer), remaining_bytes)]
+        num_bytes = file.readinto(record)
+        if num_bytes < len(record):
+            if num_bytes == 0:
+                logger.error(f"File shrank while reading: {file.name}")
+                record[:] = bytes(len(record))
+            else:
+                record = record[:num_bytes]
+        remaining_bytes -= len(record)
+        yield record
+
+
+def open_source_file(path: str):
+    """Opens a file, that is sent. A file, that can't be opened, is read as empty file, so it is filled up with zeros
+    like a file, that shrank."""
+    try:
+        return open(path, "rb")
+    except OSError as error:
+        logger.error(f"Could not open file: {error}")
+        return open(os.devnull, "rb")
+
+
+def read_file_into(path: str, buffer: memoryview) -> None:
+    """Reads the first `len(buffer)` bytes of the file into the buffer. A file, that shrank, is filled up with
+    zeros."""
+    num_bytes = 0
+    with open_source_file(path) as file:
+        while num_bytes < len(buffer):
+            received = file.readinto(buffer[num_bytes:])
+            if not received:
+                logger.error(f"File shrank while reading: {path}")
+                buffer[num_bytes:] = bytes(len(buffer) - num_bytes)
+                break
+            num_bytes += received
+
+
+def file_version(path: str) -> Optional[Tuple[int, int]]:
+    """Size and modification time of the file, to notice changes. None if the file doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def copy_file_range(src_file, dst_file, src_offset: int, dst_offset: int, length: int) -> int:
+    """Copies `length` bytes between the opened files. On Linux they are copied in the kernel with
+    `os.copy_file_range`. Returns the number of copied bytes, which is smaller, if the source file ends before."""
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        dst_file.flush()
+        try:
+            while copied < length:
+                num_bytes = os.copy_file_range(src_file.fileno(), dst_file.fileno(), length - copied,
+                                               src_offset + copied, dst_offset + copied)
+                if num_bytes == 0:
+                    return copied
+                copied += num_bytes
+            return copied
+        except OSError:
+            pass  # Not supported by the file system. The rest is copied below.
+    src_file.seek(src_offset + copied)
+    dst_file.seek(dst_offset + copied)
+    while copied < length:
+        data = src_file.read(min(length - copied, 1 << 20))
+        if not data:
+            break
+        dst_file.write(data)
+        copied += len(data)
+    return copied
+
+
+class FileManifest:
+    """The hashes of all blocks of a resumable file. It is sent in the :class:`pynetworking.Packets.FileMetaPacket`,
+    so the receiver verifies every received block and requests only the missing blocks, if the transfer was
+    interrupted. The blocks are hashed with BLAKE2b.
+
+    :ivar transfer_id: Identifies the file at the sender, when the missing blocks are requested.
+    :ivar hashes: The joined hashes of all blocks.
+    """
+    BLOCK_SIZE = 1 << 20
+    HASH_SIZE = 16
+    TRANSFER_ID_SIZE = 16
+
+    def __init__(self, transfer_id: bytes, file_size: int, block_size: int, hashes: bytes) -> None:
+        self.transfer_id = transfer_id
+        self.file_size = file_size
+        self.block_size = block_size
+        self.hashes = hashes
+
+    @classmethod
+    def from_file(cls, path: str, file_size: int, block_size: int = BLOCK_SIZE) -> 'FileManifest':
+        """Hashes the first `file_size` bytes of the file. A new transfer_id is generated."""
+        with open(path, "rb") as file:
+            hashes = b"".join(cls.hash(block) for block in iter_file_records(file, file_size,
+                                                                             memoryview(bytearray(block_size))))
+        return cls(os.urandom(cls.TRANSFER_ID_SIZE), file_size, block_size, hashes)
+
+    @classmethod
+    def hash(cls, block: Union[bytes, memoryview]) -> bytes:
+        return hashlib.blake2b(block, digest_size=cls.HASH_SIZE).digest()
+
+    @property
+    def num_blocks(self) -> int:
+        return len(self.hashes) // self.HASH_SIZE
+
+    def block_hash(self, index: int) -> bytes:
+        return self.hashes[index * self.HASH_SIZE: (index + 1) * self.HASH_SIZE]
+
+    def block_range(self, index: int) -> Tuple[int, int]:
+        """Offset and length of the block."""
+        offset = index * self.block_size
+        return offset, min(self.block_size, self.file_size - offset)
+
+    def blocks_of(self, ranges: List[Tuple[int, int]]) -> Iterator[int]:
+        """Indices of the blocks, that are touched by the (offset, length) ranges."""
+        for offset, length in ranges:
+            yield from range(offset // self.block_size, (offset + length + self.block_size - 1) // self.block_size)
+
+    def blocks_within(self, offset: int, length: int) -> range:
+        """Indices of the blocks, that lie completely within the range."""
+        end = offset + length
+        return range((offset + self.block_size - 1) // self.block_size,
+                     self.num_blocks if end >= self.file_size else end // self.block_size)
+
+    def ranges_of(self, blocks: List[int]) -> List[Tuple[int, int]]:
+        """Merges the sorted block indices into as few (offset, length) ranges as possible."""
+        ranges = []
+        for index in blocks:
+            offset, length = self.block_range(index)
+            if ranges and sum(ranges[-1]) == offset:
+                ranges[-1] = (ranges[-1][0], ranges[-1][1] + length)
+            else:
+                ranges.append((offset, length))
+        return ranges
+
+    def to_tuple(self) -> tuple:
+        return self.transfer_id, self.file_size, self.block_size, self.hashes
+
+    @classmethod
+    def from_tuple(cls, values: Optional[tuple]) -> Optional['FileManifest']:
+        return None if values is None else cls(*values)
+
+
+class FileTransfer:
+    """A resumable file at the receiver. The blocks are received into the :attr:`partial_path`. The file is moved to
+    its destination, when all blocks are verified.
+
+    :ivar verified: Indices of the received blocks, whose hashes match the manifest.
+    :ivar old_file_version: The :func:`file_version` of the old file at the destination, when its
+        :class:`FileSignature` was created.
+    """
+
+    def __init__(self, src_path: str, dst_path: str, manifest: FileManifest) -> None:
+        self.src_path = src_path
+        self.dst_path = dst_path
+        self.manifest = manifest
+        self.verified: Set[int] = set()
+        self.old_file_version: Optional[Tuple[int, int]] = None
+
+    @property
+    def partial_path(self) -> str:
+        return self.dst_path + PARTIAL_SUFFIX
+
+    def verify(self, ranges: List[Tuple[int, int]]) -> None:
+        """Reads the blocks of the received ranges from the partial file and compares their hashes."""
+        buffer = memoryview(bytearray(self.manifest.block_size))
+        with open(self.partial_path, "rb") as file:
+            for index in self.manifest.blocks_of(ranges):
+                offset, length = self.manifest.block_range(index)
+                file.seek(offset)
+                if file.readinto(buffer[:length]) == length and \
+                        FileManifest.hash(buffer[:length]) == self.manifest.block_hash(index):
+                    self.verified.add(index)
+                else:
+                    self.verified.discard(index)
+
+    def missing_ranges(self) -> List[Tuple[int, int]]:
+        """The ranges, that must be requested. Everything is missing, if the partial file was removed."""
+        if not os.path.exists(self.partial_path):
+            self.verified.clear()
+        return self.manifest.ranges_of([index for index in range(self.manifest.num_blocks)
+                                        if index not in self.verified])
+
+    def is_complete(self) -> bool:
+        return len(self.verified) == self.manifest.num_blocks
+
+    def copy(self, copies: List[Tuple[int, int, int]]) -> None:
+        """Copies the (offset, source_offset, length) ranges of the old file at the destination into the partial
+        file. The sender matched them with the hashes of the signature, so the blocks, that are copied completely,
+        are verified without reading them again, unless the old file changed since its signature was created."""
+        copied_blocks = set()
+        with open(self.dst_path, "rb") as src_file, \
+                open(self.partial_path, "r+b" if os.path.exists(self.partial_path) else "wb") as dst_file:
+            for offset, source_offset, length in copies:
+                if copy_file_range(src_file, dst_file, source_offset, offset, length) == length:
+                    copied_blocks.update(self.manifest.blocks_within(offset, length))
+        if self.old_file_version is not None and file_version(self.dst_path) == self.old_file_version:
+            self.verified.update(copied_blocks)
+
+    def complete(self) -> File:
+        """Moves the partial file to the destination."""
+        with open(self.partial_path, "ab") as file:
+            file.truncate(self.manifest.file_size)
+        os.replace(self.partial_path, self.dst_path)
+        return File(self.src_path, self.dst_path, self.manifest.file_size)
+
+
+class ResumableFiles:
+    """The resumable files, that were sent. They are found by the transfer_id of their :class:`FileManifest`, when
+    the receiver requests missing blocks. At most `max_files` files are kept, each at most `lifetime` seconds. A file,
+    that changed since its manifest was created, can't be resumed."""
+    LIFETIME = 24 * 60 * 60
+    MAX_FILES = 1000
+
+    def __init__(self, lifetime: float = LIFETIME, max_files: int = MAX_FILES) -> None:
+        self.lifetime = lifetime
+        self.max_files = max_files
+        self._files: Dict[bytes, Tuple[File, FileManifest, float, Tuple[int, int]]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, file: File) -> FileManifest:
+        """Creates the manifest of the file and keeps the file."""
+        version = file_version(file.src_path)
+        manifest = FileManifest.from_file(file.src_path, file.size)
+        with self._lock:
+            self._files[manifest.transfer_id] = file, manifest, time.monotonic(), version
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+        return manifest
+
+    def get(self, transfer_id: bytes) -> Optional[Tuple[File, FileManifest]]:
+        """Returns None, if the file is unknown, expired or changed."""
+        with self._lock:
+            entry = self._files.get(transfer_id)
+        if entry is None:
+            return None
+        file, manifest, created, version = entry
+        if time.monotonic() - created > self.lifetime or file_version(file.src_path) != version:
+            return None
+        return file, manifest
+
+
+class FileSignature:
+    """The weak and strong checksums of the full blocks of the old file, that the receiver already has. The sender of
+    a delta file compares them with every block of the new file and sends only the bytes, that match no block, as
+    rsync does. The weak checksum is Adler-32, which can be rolled one byte further in constant time. Only windows
+    with a known weak checksum are hashed with BLAKE2b, like the blocks of :class:`FileManifest`.
+
+    The block size is about the square root of the file size, so the signature and the bytes sent per changed block
+    grow equally. After a window, that didn't match, the windows of the next block are rolled through. If no window
+    matches there either, the next blocks are only compared at their offset and the number of these blocks doubles
+    every time, so a fully changed file isn't rolled through byte by byte.
+    """
+    MIN_BLOCK_SIZE = 4 * 1024
+    MAX_BLOCK_SIZE = 128 * 1024
+    _ADLER_MOD = 65521
+
+    def __init__(self, file_size: int, block_size: int, weak_checksums: bytes, hashes: bytes) -> None:
+        self.file_size = file_size
+        self.block_size = block_size
+        self.weak_checksums = weak_checksums
+        self.hashes = hashes
+
+    @classmethod
+    def from_file(cls, path: str, block_size: Optional[int] = None) -> 'FileSignature':
+        file_size = os.path.getsize(path)
+        if block_size is None:
+            block_size = cls.block_size_for(file_size)
+        weak_checksums = []
+        hashes = []
+        with open(path, "rb") as file:
+            for block in iter_file_records(file, file_size - file_size % block_size,
+                                           memoryview(bytearray(block_size))):
+                weak_checksums.append(zlib.adler32(block))
+                hashes.append(FileManifest.hash(block))
+        return cls(file_size, block_size, struct.pack(f">{len(weak_checksums)}I", *weak_checksums), b"".join(hashes))
+
+    @classmethod
+    def block_size_for(cls, file_size: int) -> int:
+        """About the square root of the file size, rounded down to KiB."""
+        return min(max(int(math.sqrt(file_size)) & ~1023, cls.MIN_BLOCK_SIZE), cls.MAX_BLOCK_SIZE)
+
+    @property
+    def num_blocks(self) -> int:
+        return len(self.hashes) // FileManifest.HASH_SIZE
+
+    def delta(self, path: str, ranges: List[Tuple[int, int]]) \
+            -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+        """Matches the (offset, length) ranges of the new file against the blocks. Returns the (offset,
+        source_offset, length) ranges, that the receiver copies from its old file, and the (offset, length) ranges,
+        that must be sent."""
+        copies: List[Tuple[int, int, int]] = []
+        literals: List[Tuple[int, int]] = []
+        file_size = os.path.getsize(path)
+        if self.num_blocks == 0 or file_size < self.block_size:
+            return copies, [(offset, length) for offset, length in ranges if length > 0]
+        hash_size = FileManifest.HASH_SIZE
+        blocks = {self.hashes[i * hash_size: (i + 1) * hash_size]: i for i in reversed(range(self.num_blocks))}
+        weak_checksums = set(struct.unpack(f">{self.num_blocks}I", self.weak_checksums))
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                for offset, length in ranges:
+                    self._match(view, offset, offset + length, blocks, weak_checksums, copies, literals)
+            finally:
+                view.release()
+        return copies, literals
+
+    def _match(self, view: memoryview, start: int, end: int, blocks: Dict[bytes, int], weak_checksums: Set[int],
+               copies: List[Tuple[int, int, int]], literals: List[Tuple[int, int]]) -> None:
+        block_size = self.block_size
+        last_window = min(end, len(view)) - block_size
+        pos = literal_start = start
+        unrolled_blocks = 0
+        backoff = 1
+        while pos <= last_window:
+            index = blocks.get(FileManifest.hash(view[pos:pos + block_size]))
+            if index is not None:
+                _add_range(literals, literal_start, pos - literal_start)
+                _add_copy(copies, pos, index * block_size, block_size)
+                pos = literal_start = pos + block_size
+                unrolled_blocks = 0
+                backoff = 1
+            elif unrolled_blocks > 0:
+                unrolled_blocks -= 1
+                pos += block_size
+            else:
+                stop = min(pos + block_size, last_window + 1)
+                match = self._roll(view, pos, stop, blocks, weak_checksums)
+                if match is None:
+                    pos = stop
+                    unrolled_blocks = backoff
+                    backoff *= 2
+                else:
+                    pos = match
+        _add_range(literals, literal_start, end - literal_start)
+
+    def _roll(self, view: memoryview, pos: int, stop: int, blocks: Dict[bytes, int],
+              weak_checksums: Set[int]) -> Optional[int]:
+        """Returns the first offset after pos and before stop, where a window matches a block."""
+        block_size = self.block_size
+        mod = self._ADLER_MOD
+        weak_checksum = zlib.adler32(view[pos:pos + block_size])
+        a = weak_checksum & 0xFFFF
+        b = weak_checksum >> 16
+        for out_pos in range(pos, stop - 1):
+            out_byte = view[out_pos]
+            a = (a - out_byte + view[out_pos + block_size]) % mod
+            b = (b - block_size * out_byte + a - 1) % mod
+            if (b << 16 | a) in weak_checksums:
+                window = out_pos + 1
+                if FileManifest.hash(view[window:window + block_size]) in blocks:
+                    return window
+        return None
+
+    def to_tuple(self) -> tuple:
+        return self.file_size, self.block_size, self.weak_checksums, self.hashes
+
+    @classmethod
+    def from_tuple(cls, values: Optional[tuple]) -> Optional['FileSignature']:
+        return None if values is None else cls(*values)
+
+
+def _add_range(ranges: List[Tuple[int, int]], offset: int, length: int) -> None:
+    if length <= 0:
+        return
+    if ranges and sum(ranges[-1]) == offset:
+        ranges[-1] = (ranges[-1][0], ranges[-1][1] + length)
+    else:
+        ranges.append((offset, length))
+
+
+def _add_copy(copies: List[Tuple[int, int, int]], offset: int, source_offset: int, length: int) -> None:
+    if copies and copies[-1][0] + copies[-1][2] == offset and copies[-1][1] + copies[-1][2] == source_offset:
+        copies[-1] = (copies[-1][0], copies[-1][1], copies[-1][2] + length)
+    else:
+        copies.append((offset, source_offset, length))
+
+
 def pack_int_type(int_type: int) -> bytes:
     """Packs a type described as an integer into bytes"""
     return int.to_bytes(int_type, NUM_TYPE_BYTES, BYTEORDER)
@@ -152,3 +1056,32 @@ def unpack_int_type(full_byte_string: bytes) -> int:
 def pack_int(num: int) -> bytes:
     """Packs any integer number into bytes"""
     return int.to_bytes(num, NUM_INT_BYTES, BYTEORDER, signed=True)
+
+
+def pack_record(byte_string: bytes) -> bytes:
+    """Prefixes the bytes with their length. The record is read with :func:`ReceiveBuffer.next_record`."""
+    return pack_int(len(byte_string)) + byte_string
+
+
+def send_segments(socket_connection: socket.socket, segments: List[Union[bytes, memoryview]]) -> None:
+    """Sends all segments (bytes or byte memoryviews) with vectored writes (`sendmsg`), so they are never joined into
+    one bytes string. Small segments are joined instead, because copying a few bytes is cheaper than building the
+    buffer list of `sendmsg`. Falls back to `sendall` for every segment, if the platform has no `sendmsg`."""
+    if len(segments) == 1 or sum(map(len, segments)) < _JOIN_THRESHOLD:
+        socket_connection.sendall(b"".join(segments))
+        return
+    if not hasattr(socket_connection, "sendmsg"):
+        for segment in segments:
+            socket_connection.sendall(segment)
+        return
+    idx = 0
+    while idx < len(segments):
+        sent = socket_connection.sendmsg(segments if idx == 0 and len(segments) <= _IOV_MAX
+                                         else segments[idx: idx + _IOV_MAX])
+        while idx < len(segments) and sent >= len(segments[idx]):
+            sent -= len(segments[idx])
+            idx += 1
+        if sent > 0:
+            # Only partial sends allocate.
+            segments = [memoryview(segments[idx])[sent:], *segments[idx + 1:]]
+            idx = 0
@@ -8,11 +8,16 @@ Each packet has 2 ids: function_id - global_id
 
 - function_id: increased for each new function. FunctionPacket and DataPacket have the same function_id
 
-        Which data_packet belongs to which function
+        Which data_packet belongs to which function. Multiple functions may be pending at the same time and their
+        data_packets may arrive in any order. The answering side passes the function_id of the received
+        FunctionPacket explicitly to :func:`IDManager.set_ids_of_packet`.
+
+        Stream packets and stream credit packets have the function_id of the call, whose returned stream they belong
+        to. They don't change the pending functions.
 
 - global_id: increased for each new packet.
 
-        See which packet is next. Watch packet loss
+        Informative only. Concurrent calls of both sides make it impossible to predict the next global_id.
 
 External use
 -------------
@@ -45,14 +50,17 @@ private classes
     :members:
 
 """
+import threading
 from typing import List, Optional, Dict, Tuple
 
-from pynetworking.Data import NUM_INT_BYTES, NUM_TYPE_BYTES, pack_int
 from pynetworking.Logging import logger
-from pynetworking.Packets import FunctionPacket, DataPacket, FileMetaPacket, Packet
+from pynetworking.Packets import FunctionPacket, OneWayFunctionPacket, DataPacket, FileMetaPacket, DirectoryPacket, \
+    StreamPacket, StreamCreditPacket, Packet, IDContainer
 
 __all__ = ["IDManager", "remove_manager", "IDContainer"]
 
+DUMMY_FUNCTION_ID = -2
+
 
 class MetaIDManager(type):
     """MetaIDManager is a metaclass to deliver multiple IDManagers for multiple Communicators. Each Communicator has
@@ -78,31 +86,48 @@ class IDManager(metaclass=MetaIDManager):
         self._next_function_id = 0
         self._next_global_id = 0
         self._function_stack: List[int] = []
-
-    def set_ids_of_packet(self, packet: Packet) -> Optional[Packet]:
-        """Set ids of packet and adjust internal state"""
-        global_id = self._next_global_id
-        if isinstance(packet, FunctionPacket):
-            func_id = self._is_function_packet()
-        elif isinstance(packet, DataPacket) or isinstance(packet, FileMetaPacket):
-            func_id = self._is_data_packet()
-        else:
-            logger.error("Unknown packet_class (%s)", type(packet).__name__)
-            return None
-
-        packet.set_ids(func_id, global_id)
-        self._next_global_id += 1
-        return packet
+        self._early_dummy_answers = 0
+        self._lock = threading.RLock()
+
+    def set_ids_of_packet(self, packet: Packet, function_id: Optional[int] = None) -> Optional[Packet]:
+        """Set ids of packet and adjust internal state. A data packet, that answers a specific function packet,
+        must pass the `function_id` of this function packet. Otherwise the last pending function is answered."""
+        with self._lock:
+            global_id = self._next_global_id
+            if isinstance(packet, OneWayFunctionPacket):
+                # Gets a function_id, but is not pending, because it is never answered.
+                func_id = self._next_function_id
+                self._next_function_id += 1
+            elif isinstance(packet, FunctionPacket):
+                func_id = self._is_function_packet()
+            elif isinstance(packet, (DataPacket, FileMetaPacket, DirectoryPacket)):
+                func_id = self._is_data_packet(function_id)
+            elif isinstance(packet, (StreamPacket, StreamCreditPacket)):
+                func_id = function_id
+            else:
+                logger.error("Unknown packet_class (%s)", type(packet).__name__)
+                return None
+
+            packet.set_ids(func_id, global_id)
+            self._next_global_id += 1
+            return packet
 
     def update_ids_by_packet(self, packet: Packet) -> None:
         """Called every time a new packet arrives."""
-        self._next_global_id = packet.header.id_container.global_id + 1
-        if isinstance(packet, FunctionPacket):
-            self._is_function_packet()
-        elif isinstance(packet, DataPacket) or isinstance(packet, FileMetaPacket):
-            self._is_data_packet()
-        else:
-            logger.error("Unknown packet_class (%s)", type(packet).__name__)
+        function_id, global_id = packet.header.id_container.get_ids()
+        with self._lock:
+            self._next_global_id = max(self._next_global_id, global_id + 1)
+            if isinstance(packet, OneWayFunctionPacket):
+                self._next_function_id = max(self._next_function_id, function_id + 1)
+            elif isinstance(packet, FunctionPacket):
+                self._function_stack.append(function_id)
+                self._next_function_id = max(self._next_function_id, function_id + 1)
+            elif isinstance(packet, (DataPacket, FileMetaPacket, DirectoryPacket)):
+                self._is_data_packet(function_id)
+            elif isinstance(packet, (StreamPacket, StreamCreditPacket)):
+                pass
+            else:
+                logger.error("Unknown packet_class (%s)", type(packet).__name__)
 
     def get_next_outer_id(self) -> int:
         return self._next_global_id
@@ -114,13 +139,25 @@ class IDManager(metaclass=MetaIDManager):
         self._next_function_id += 1
         return function_id
 
-    def _is_data_packet(self) -> int:
+    def _is_data_packet(self, function_id: Optional[int] = None) -> int:
+        if function_id is None:
+            try:
+                function_id = self._function_stack.pop()
+                return function_id
+            except IndexError:
+                logger.error("Trying to pop a empty function stack")
+                return -1
         try:
-            function_id = self._function_stack.pop()
-            return function_id
-        except IndexError:
-            logger.error("Trying to pop a empty function stack")
-            return -1
+            # Remove the latest occurrence. Both sides may use the same function_id at the same time.
+            idx = len(self._function_stack) - 1 - self._function_stack[::-1].index(function_id)
+            del self._function_stack[idx]
+        except ValueError:
+            if function_id == DUMMY_FUNCTION_ID:
+                # The other side may answer, before the dummy functions are appended (e.g. at the key exchange).
+                self._early_dummy_answers += 1
+            else:
+                logger.warning(f"Function id ({function_id}) is not pending at IDManager_{self.id}")
+        return function_id
 
     def get_next_ids(self) -> Tuple[int, int]:
         return self._next_function_id, self._next_global_id
@@ -129,8 +166,12 @@ class IDManager(metaclass=MetaIDManager):
         return self._function_stack
 
     def append_dummy_functions(self, num=1):
-        for i in range(num):
-            self._function_stack.append(-2)
+        with self._lock:
+            for i in range(num):
+                if self._early_dummy_answers > 0:
+                    self._early_dummy_answers -= 1
+                else:
+                    self._function_stack.append(DUMMY_FUNCTION_ID)
 
     def __repr__(self):
         return f"IDManager_{self.id}({self._next_function_id, self._next_global_id})"
@@ -142,49 +183,3 @@ def remove_manager(id_: int) -> None:
         MetaIDManager.remove(id_)
     except KeyError:
         pass
-
-
-class IDContainer:
-    """Stores the id`s of a packet. Packs and unpacks itself at the send process.
-
-    Every packet has 2 id`s. A :attr:`function_id`. This one stores the function it belongs to. This way return
-    packets can be unambiguously matched to the proper function. The second id is the :attr:`global_id`. It is
-    incremented for each packet. This way packet loss can be detected and packets are handled in the correct order.
-    """
-    TOTAL_BYTE_LENGTH = 3 * NUM_INT_BYTES + 3 * NUM_TYPE_BYTES
-
-    def __init__(self, function_id: int, outer_id: int) -> None:
-        self.function_id = function_id
-        self.global_id = outer_id
-
-    @classmethod
-    def default_init(cls):
-        """Set id`s that must be changed at sending."""
-        return cls.__call__(-1, -1)
-
-    def pack(self) -> bytes:
-        byte_string = pack_int(self.function_id)
-        byte_string += pack_int(self.global_id)
-        return byte_string
-
-    @classmethod
-    def from_bytes(cls, byte_stream: 'ByteStream') -> 'IDContainer':
-        function_id = byte_stream.next_int()
-        outer_id = byte_stream.next_int()
-        return cls.__call__(function_id, outer_id)
-
-    def set_ids(self, function_id: int, outer_id: int):
-        self.function_id = function_id
-        self.global_id = outer_id
-
-    def get_ids(self) -> Tuple[int, int]:
-        return self.function_id, self.global_id
-
-    def __repr__(self):
-        return f"IDContainer({str(self.function_id)}, {str(self.global_id)})"
-
-    def __eq__(self, other):
-        if not isinstance(other, IDContainer):
-            return False
-        return (self.function_id == other.function_id and
-                self.global_id == other.global_id)
@@ -7,8 +7,15 @@ Packets:
 *********
 
 - `FunctionPacket`: Sends function calls
+- `OneWayFunctionPacket`: Sends function calls, that are not answered
+- `BatchFunctionPacket`: Sends many function calls, that are answered with one data packet
+- `FileRequestPacket`: Requests the missing blocks of a resumable file or the changes of a delta file, that are
+  answered with a file meta packet
 - `DataPacket`: Sends return messages
+- `StreamPacket`: Sends a chunk of the items of a returned generator or iterator
+- `StreamCreditPacket`: Allows the other side to send more chunks of a stream
 - `FileMetaPacket`: Sends file meta data that is needed, when files are transmitted
+- `DirectoryPacket`: Sends the paths and sizes of all files of a directory, whose content follows
 
 Every packet class can convert its data to bytes, that can be send over the socket and can convert it back.
 
@@ -41,6 +48,10 @@ External_use:
 public classes
 -----------------
 
+.. autoclass:: IDContainer
+    :members:
+    :undoc-members:
+
 .. autoclass:: Header
     :members:
     :undoc-members:
@@ -54,6 +65,17 @@ public classes
     :undoc-members:
     :show-inheritance:
 
+.. autoclass:: OneWayFunctionPacket
+    :show-inheritance:
+
+.. autoclass:: BatchFunctionPacket
+    :members:
+    :show-inheritance:
+
+.. autoclass:: FileRequestPacket
+    :members:
+    :show-inheritance:
+
 .. autoclass:: DataPacket
     :members:
     :undoc-members:
@@ -64,6 +86,18 @@ public classes
     :undoc-members:
     :show-inheritance:
 
+.. autoclass:: DirectoryPacket
+    :members:
+    :show-inheritance:
+
+.. autoclass:: StreamPacket
+    :members:
+    :show-inheritance:
+
+.. autoclass:: StreamCreditPacket
+    :members:
+    :show-inheritance:
+
 private constants
 --------------------
 
@@ -71,31 +105,81 @@ private constants
 
     Ddict that have for every Packetclass a unique id
 """
-from typing import Union, Dict, Any, Callable, Optional
+import struct
+from typing import Union, Dict, Any, Callable, Optional, List, Tuple
 
 from pynetworking.utils import Ddict
 from pynetworking.Logging import logger
-from pynetworking.Data import pack_int_type, unpack_int_type, NUM_TYPE_BYTES, \
-    general_unpack, general_pack, ByteStream, pack_int
+from pynetworking.Data import general_unpack, general_pack_segments, ByteStream, File, Directory, FileManifest, \
+    FileSignature, DILL
+
+_IDS = struct.Struct(">ii")
+_HEADER = struct.Struct(">iiBHi")
+"""function_id, global_id, packet_type (3 bytes), specific_data_size"""
+_CREDITS = struct.Struct(">i")
+
+
+class IDContainer:
+    """Stores the id`s of a packet. Packs and unpacks itself at the send process.
+
+    Every packet has 2 id`s. A :attr:`function_id`. This one stores the function it belongs to. This way return
+    packets can be unambiguously matched to the proper function. The second id is the :attr:`global_id`. It is
+    incremented for each packet. This way packet loss can be detected and packets are handled in the correct order.
+    """
+    __slots__ = ("function_id", "global_id")
+    TOTAL_BYTE_LENGTH = _IDS.size
+
+    def __init__(self, function_id: int, outer_id: int) -> None:
+        self.function_id = function_id
+        self.global_id = outer_id
+
+    @classmethod
+    def default_init(cls):
+        """Set id`s that must be changed at sending."""
+        return cls.__call__(-1, -1)
+
+    def pack(self) -> bytes:
+        return _IDS.pack(self.function_id, self.global_id)
+
+    @classmethod
+    def from_bytes(cls, byte_stream: 'ByteStream') -> 'IDContainer':
+        return cls.__call__(*_IDS.unpack(byte_stream.next_bytes(_IDS.size)))
+
+    def set_ids(self, function_id: int, outer_id: int):
+        self.function_id = function_id
+        self.global_id = outer_id
+
+    def get_ids(self) -> Tuple[int, int]:
+        return self.function_id, self.global_id
+
+    def __repr__(self):
+        return f"IDContainer({str(self.function_id)}, {str(self.global_id)})"
+
+    def __eq__(self, other):
+        if not isinstance(other, IDContainer):
+            return False
+        return (self.function_id == other.function_id and
+                self.global_id == other.global_id)
 
 
 class Header:
     """Every packet has a header. Defines meta data for each packet, that is necessary for network communication.
+    The header is packed and unpacked with one precompiled struct.
 
     :ivar id_container:
     :ivar packet_type:
     :ivar specific_data_size:
     """
-    LENGTH_BYTES = 19
+    __slots__ = ("id_container", "packet_type", "specific_data_size")
+    LENGTH_BYTES = _HEADER.size
 
-    def __init__(self, id_container: 'IDContainer', packet_type: int, specific_data_size: int) -> None:
+    def __init__(self, id_container: IDContainer, packet_type: int, specific_data_size: int) -> None:
         self.id_container = id_container
         self.packet_type = packet_type
         self.specific_data_size = specific_data_size
 
     @classmethod
     def from_packet(cls, packet: 'Packet') -> 'Header':
-        from pynetworking.ID_management import IDContainer
         packet_type = packets[packet.__class__]
         id_container = IDContainer.default_init()
         specific_data_size = 0
@@ -103,20 +187,15 @@ class Header:
 
     @classmethod
     def from_bytes(cls, byte_stream: ByteStream) -> 'Header':
-        from pynetworking.ID_management import IDContainer
-        id_container = IDContainer.from_bytes(byte_stream)
-        packet_type = unpack_int_type(byte_stream.next_bytes(NUM_TYPE_BYTES))
-        specific_data_size = byte_stream.next_int()
-        return cls.__call__(id_container, packet_type, specific_data_size)
+        function_id, global_id, type_high, type_low, specific_data_size = \
+            _HEADER.unpack(byte_stream.next_bytes(_HEADER.size))
+        return cls.__call__(IDContainer(function_id, global_id), type_high << 16 | type_low, specific_data_size)
 
     def pack(self, len_packet_data: int) -> bytes:
         """id's + packet_type + len_packet_data"""
         self.specific_data_size = len_packet_data
-        byte_string = b""
-        byte_string += self.id_container.pack()
-        byte_string += pack_int_type(self.packet_type)
-        byte_string += pack_int(len_packet_data)
-        return byte_string
+        return _HEADER.pack(self.id_container.function_id, self.id_container.global_id, self.packet_type >> 16,
+                            self.packet_type & 0xFFFF, len_packet_data)
 
     def __eq__(self, other):
         if not isinstance(other, Header):
@@ -135,29 +214,33 @@ class Packet:
     tcp-connection.
     :ivar header:
     """
+    __slots__ = ("header",)
 
     def __init__(self, packet: Union['FunctionPacket', 'DataPacket', 'FileMetaPacket']) -> None:
         self.header = Header.from_packet(packet)
 
-    def pack(self) -> bytes:
+    def pack(self, codec: str = DILL) -> bytes:
+        return b"".join(self.pack_segments(codec))
+
+    def pack_segments(self, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+        """Packs the packet without copying large buffers (see :func:`pynetworking.Data.general_pack_segments`). The
+        joined segments are the bytes of :func:`pack`."""
         raise NotImplementedError()
 
-    def _pack_all(self, specific_data_bytes: bytes) -> bytes:
-        """Takes in the packed data from the child-class and creates a fully packed packet from it. Adds header."""
-        byte_string = b""
-        data_length = len(specific_data_bytes)
-        byte_string += self.header.pack(data_length)
-        byte_string += specific_data_bytes
-        return byte_string
+    def _pack_all(self, specific_data_segments: List[Union[bytes, memoryview]]) -> List[Union[bytes, memoryview]]:
+        """Takes in the packed data from the child-class and creates a fully packed packet from it. Adds the header as
+        first segment."""
+        data_length = sum(len(segment) for segment in specific_data_segments)
+        return [self.header.pack(data_length), *specific_data_segments]
 
     @classmethod
     def from_bytes(cls, header: Header, byte_stream: ByteStream) -> \
             Union['FunctionPacket', 'DataPacket', 'FileMetaPacket']:
-        if header.packet_type not in packets.values():
+        try:
+            packet_cls = packets.inverse[header.packet_type]
+        except KeyError:
             raise ValueError("Unknown packet ID: (" + str(header.packet_type) + ")")
-        packet = packets[header.packet_type].from_bytes(header, byte_stream)
-        packet.header = header
-        return packet
+        return packet_cls.from_bytes(header, byte_stream)
 
     def set_ids(self, function_id: int, outer_id: int) -> None:
         assert isinstance(function_id, int) and isinstance(outer_id, int), f"Ids must be int: ({function_id, outer_id}"
@@ -177,6 +260,7 @@ class DataPacket(Packet):
     """Packet to send named data.
 
     :ivar data: dict with all data."""
+    __slots__ = ("data",)
 
     def __init__(self, **kwargs) -> None:
         super().__init__(self)
@@ -185,12 +269,14 @@ class DataPacket(Packet):
     @classmethod
     def from_bytes(cls, header: Header, byte_stream: ByteStream) -> 'DataPacket':
         num_bytes = header.specific_data_size
-        data = general_unpack(byte_stream, num_bytes)[0]
-        return cls.__call__(**data)
+        packet = cls.__new__(cls)
+        packet.header = header
+        packet.data = general_unpack(byte_stream, num_bytes)[0]
+        return packet
 
-    def pack(self) -> bytes:
-        specific_byte_string = general_pack(self.data)
-        return super()._pack_all(specific_byte_string)
+    def pack_segments(self, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+        specific_segments = general_pack_segments(self.data, codec=codec)
+        return super()._pack_all(specific_segments)
 
     def __eq__(self, other):
         if super().__eq__(other) and isinstance(other, DataPacket):
@@ -205,12 +291,15 @@ class DataPacket(Packet):
 
 
 class FunctionPacket(Packet):
-    """Packet, that stores the function name, and its args. Used to transmit function calls over the network.
+    """Packet, that stores the function name, and its args. Used to transmit function calls over the network. The
+    content of every :class:`pynetworking.Data.File` argument (see :attr:`files`) directly follows the packet.
 
     :ivar function_name:
     :ivar args:
     :ivar kwargs:
     """
+    __slots__ = ("function_name", "args", "kwargs")
+
     def __init__(self, func: Union[Callable, str], *args, **kwargs) -> None:
         super().__init__(self)
         if type(func) is str:
@@ -220,18 +309,22 @@ class FunctionPacket(Packet):
         self.args: tuple = args
         self.kwargs: Dict[str, Any] = kwargs
 
+    @property
+    def files(self) -> List[File]:
+        """All args and kwargs, that are files, in the order their contents are sent."""
+        return [arg for arg in (*self.args, *self.kwargs.values()) if isinstance(arg, File)]
+
     @classmethod
     def from_bytes(cls, header: Header, byte_stream: ByteStream) -> 'FunctionPacket':
         num_bytes = header.specific_data_size
-        all_data = general_unpack(byte_stream, num_bytes)
-        function_name: str = all_data[0]
-        args: tuple = all_data[1]
-        kwargs: dict = all_data[2]
-        return cls.__call__(function_name, *args, **kwargs)
+        packet = cls.__new__(cls)
+        packet.header = header
+        packet.function_name, packet.args, packet.kwargs = general_unpack(byte_stream, num_bytes)
+        return packet
 
-    def pack(self) -> bytes:
-        specific_byte_string = general_pack(self.function_name, self.args, self.kwargs)
-        return super()._pack_all(specific_byte_string)
+    def pack_segments(self, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+        specific_segments = general_pack_segments(self.function_name, self.args, self.kwargs, codec=codec)
+        return super()._pack_all(specific_segments)
 
     def __eq__(self, other):
         if super().__eq__(other) and isinstance(other, FunctionPacket):
@@ -244,6 +337,54 @@ class FunctionPacket(Packet):
             f"{str(self.args)}, {str(self.kwargs)})"
 
 
+class OneWayFunctionPacket(FunctionPacket):
+    """Function call, that is not answered. The caller doesn't wait for a data-packet and the callee doesn't send
+    one."""
+    __slots__ = ()
+
+
+class BatchFunctionPacket(FunctionPacket):
+    """Many function calls in one packet. The calls are executed in order and answered by one data-packet, whose
+    return value is the list of all return values. The calls are stored as args.
+
+    :ivar calls: list of (function_name, args, kwargs)
+    """
+    __slots__ = ()
+    FUNCTION_NAME = "batch"
+
+    def __init__(self, calls: List[Tuple[str, tuple, dict]]) -> None:
+        super().__init__(self.FUNCTION_NAME, *calls)
+
+    @property
+    def calls(self) -> Tuple[Tuple[str, tuple, dict], ...]:
+        return self.args
+
+
+class FileRequestPacket(FunctionPacket):
+    """Requests the (offset, length) ranges of a resumable file, that was sent before with the transfer_id of its
+    :class:`pynetworking.Data.FileManifest`. It is answered with a file meta packet, that is followed by the
+    content of the ranges. With the :class:`pynetworking.Data.FileSignature` of the old file at the destination, the
+    parts of the ranges, that the old file contains, are copied from there instead."""
+    __slots__ = ()
+    FUNCTION_NAME = "request_file"
+
+    def __init__(self, transfer_id: bytes, ranges: List[Tuple[int, int]],
+                 signature: Optional[FileSignature] = None) -> None:
+        super().__init__(self.FUNCTION_NAME, transfer_id, ranges, None if signature is None else signature.to_tuple())
+
+    @property
+    def transfer_id(self) -> bytes:
+        return self.args[0]
+
+    @property
+    def ranges(self) -> List[Tuple[int, int]]:
+        return self.args[1]
+
+    @property
+    def signature(self) -> Optional[FileSignature]:
+        return FileSignature.from_tuple(self.args[2])
+
+
 class FileMetaPacket(Packet):
     """Packet that is necessary when files should be sent over the network. Because files may be very big they dont
     want to be packed in one data packet. So to send a file there is the FileMetaClass necessary.
@@ -251,30 +392,54 @@ class FileMetaPacket(Packet):
     :ivar src_path: Path where the file is currently located at the sender.
     :ivar dst_path: Path where the file shall be copied to at the receiver.
     :ivar file_size:
+    :ivar manifest: The hashes of the blocks, if the file is resumable.
+    :ivar ranges: The (offset, length) ranges, that follow the packet. None if the whole file follows.
+    :ivar copies: The (offset, source_offset, length) ranges, that the receiver copies from the old file at the
+        destination, before the ranges are received.
+
+    A packet with a manifest and no ranges and copies only offers a delta file. The receiver requests it with a
+    :class:`FileRequestPacket`.
     """
-    def __init__(self, src_path: str, size: int, dst_path: Optional[str] = None):
+    __slots__ = ("src_path", "dst_path", "file_size", "manifest", "ranges", "copies")
+
+    def __init__(self, src_path: str, size: int, dst_path: Optional[str] = None,
+                 manifest: Optional[FileManifest] = None, ranges: Optional[List[Tuple[int, int]]] = None,
+                 copies: Optional[List[Tuple[int, int, int]]] = None):
         super().__init__(self)
         self.src_path = src_path
         self.dst_path = dst_path
         self.file_size = size
+        self.manifest = manifest
+        self.ranges = ranges
+        self.copies = copies
+
+    @property
+    def is_offer(self) -> bool:
+        return self.manifest is not None and self.ranges == [] and self.copies is None
 
     @classmethod
     def from_bytes(cls, header: Header, byte_stream: ByteStream) -> 'FileMetaPacket':
         num_bytes = header.specific_data_size
-        all_data = general_unpack(byte_stream, num_bytes)
-        src_path: str = all_data[0]
-        dst_path: Optional[str] = all_data[1]
-        size: int = all_data[2]
-        return cls.__call__(src_path, size, dst_path)
+        packet = cls.__new__(cls)
+        packet.header = header
+        packet.src_path, packet.dst_path, packet.file_size, manifest, packet.ranges, packet.copies = \
+            general_unpack(byte_stream, num_bytes)
+        packet.manifest = FileManifest.from_tuple(manifest)
+        return packet
 
-    def pack(self) -> bytes:
-        specific_byte_string = general_pack(self.src_path, self.dst_path, self.file_size)
-        return super()._pack_all(specific_byte_string)
+    def pack_segments(self, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+        manifest = None if self.manifest is None else self.manifest.to_tuple()
+        specific_segments = general_pack_segments(self.src_path, self.dst_path, self.file_size, manifest, self.ranges,
+                                                  self.copies, codec=codec)
+        return super()._pack_all(specific_segments)
 
     def __eq__(self, other):
         if super().__eq__(other) and isinstance(other, FileMetaPacket):
             return self.src_path == other.src_path and self.dst_path == other.dst_path \
-                   and self.file_size == other.file_size
+                   and self.file_size == other.file_size and self.ranges == other.ranges \
+                   and self.copies == other.copies \
+                   and (self.manifest is None) == (other.manifest is None) \
+                   and (self.manifest is None or self.manifest.to_tuple() == other.manifest.to_tuple())
         else:
             return False
 
@@ -282,8 +447,123 @@ class FileMetaPacket(Packet):
         return f"{super().__repr__()} => FileMetaPacket({self.src_path}, {self.file_size}, {str(self.dst_path)})"
 
 
+class DirectoryPacket(Packet):
+    """Sends a directory, that a function returned. The content of all files follows the packet, in the order of
+    `files`, like the content of a file follows a file meta packet.
+
+    :ivar src_path: Path of the directory at the sender.
+    :ivar dst_path: Path of the directory at the receiver.
+    :ivar directories: Relative paths of all sub directories, separated by "/".
+    :ivar files: (relative path, size) of all files.
+    """
+    __slots__ = ("src_path", "dst_path", "directories", "files")
+
+    def __init__(self, directory: Directory) -> None:
+        super().__init__(self)
+        self.src_path = directory.src_path
+        self.dst_path = directory.dst_path
+        self.directories = directory.directories
+        self.files = directory.files
+
+    @classmethod
+    def from_bytes(cls, header: Header, byte_stream: ByteStream) -> 'DirectoryPacket':
+        num_bytes = header.specific_data_size
+        packet = cls.__new__(cls)
+        packet.header = header
+        packet.src_path, packet.dst_path, packet.directories, packet.files = general_unpack(byte_stream, num_bytes)
+        return packet
+
+    def pack_segments(self, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+        specific_segments = general_pack_segments(self.src_path, self.dst_path, self.directories, self.files,
+                                                  codec=codec)
+        return super()._pack_all(specific_segments)
+
+    def __eq__(self, other):
+        if super().__eq__(other) and isinstance(other, DirectoryPacket):
+            return self.src_path == other.src_path and self.dst_path == other.dst_path \
+                   and self.directories == other.directories and self.files == other.files
+        else:
+            return False
+
+    def __repr__(self):
+        return f"{super().__repr__()} => DirectoryPacket({self.src_path}, {len(self.files)} files, {self.dst_path})"
+
+
+class StreamPacket(Packet):
+    """A chunk of the items of a generator or iterator, that a function returned. All chunks of a stream have the
+    function_id of the function-packet. The stream is ended by a data-packet with the same function_id.
+
+    :ivar items: list of the next items
+    """
+    __slots__ = ("items",)
+
+    def __init__(self, items: list) -> None:
+        super().__init__(self)
+        self.items = items
+
+    @classmethod
+    def from_bytes(cls, header: Header, byte_stream: ByteStream) -> 'StreamPacket':
+        num_bytes = header.specific_data_size
+        packet = cls.__new__(cls)
+        packet.header = header
+        packet.items = general_unpack(byte_stream, num_bytes)[0]
+        return packet
+
+    def pack_segments(self, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+        specific_segments = general_pack_segments(self.items, codec=codec)
+        return super()._pack_all(specific_segments)
+
+    def __eq__(self, other):
+        if super().__eq__(other) and isinstance(other, StreamPacket):
+            return self.items == other.items
+        else:
+            return False
+
+    def __repr__(self):
+        return f"{super().__repr__()} => StreamPacket({len(self.items)} items)"
+
+
+class StreamCreditPacket(Packet):
+    """Sent by the receiver of a stream, when it took chunks. The sender may send `credits` more chunks.
+    :attr:`CANCEL` stops the stream.
+
+    :ivar credits:
+    """
+    __slots__ = ("credits",)
+    CANCEL = -1
+
+    def __init__(self, credits: int) -> None:
+        super().__init__(self)
+        self.credits = credits
+
+    @classmethod
+    def from_bytes(cls, header: Header, byte_stream: ByteStream) -> 'StreamCreditPacket':
+        packet = cls.__new__(cls)
+        packet.header = header
+        packet.credits = _CREDITS.unpack(byte_stream.next_bytes(header.specific_data_size))[0]
+        return packet
+
+    def pack_segments(self, codec: str = DILL) -> List[Union[bytes, memoryview]]:
+        return super()._pack_all([_CREDITS.pack(self.credits)])
+
+    def __eq__(self, other):
+        if super().__eq__(other) and isinstance(other, StreamCreditPacket):
+            return self.credits == other.credits
+        else:
+            return False
+
+    def __repr__(self):
+        return f"{super().__repr__()} => StreamCreditPacket({self.credits})"
+
+
 packets = Ddict({
     FunctionPacket: 0x101,
+    OneWayFunctionPacket: 0x102,
     DataPacket: 0x103,
-    FileMetaPacket: 0x104
+    FileMetaPacket: 0x104,
+    BatchFunctionPacket: 0x105,
+    StreamPacket: 0x106,
+    StreamCreditPacket: 0x107,
+    FileRequestPacket: 0x108,
+    DirectoryPacket: 0x109,
 })
@@ -7,8 +7,11 @@ Functions may be called with parameters and may return values.
 
 """
 from pynetworking.Communication_client import ServerCommunicator, ServerFunctions, MultiServerCommunicator
-from pynetworking.Communication_server import ClientCommunicator, ClientFunctions, ClientManager
-from pynetworking.Data import File
+from pynetworking.Communication_server import ClientCommunicator, ClientFunctions, ClientManager, PreforkServer
+from pynetworking.Communication_async import AsyncServerCommunicator, AsyncClientCommunicator, AsyncClientManager, \
+    AsyncBatch, async_resume_file
+from pynetworking.Communication_general import one_way, Batch, resume_file, IncompleteFileError
+from pynetworking.Data import File, Directory
 import pynetworking.utils
 import pynetworking.Logging
 
@@ -7,6 +7,8 @@
 
 @internal_use:
 """
+import time
+
 import pynetworking as net
 
 from pynetworking.Logging import logger
@@ -63,8 +65,37 @@ class _DummyServerFunctions(net.ServerFunctions):
         return client_faculty(number)
 
     @staticmethod
-    def get_file(file_path: str, destination_path: str) -> net.File:
-        return get_file(file_path, destination_path)
+    def get_file(file_path: str, destination_path: str, resumable: bool = False, delta: bool = False) -> net.File:
+        return get_file(file_path, destination_path, resumable, delta)
+
+    @staticmethod
+    def get_directory(directory_path: str, destination_path: str) -> net.Directory:
+        return get_directory(directory_path, destination_path)
+
+    @staticmethod
+    def delayed_echo(delay: float, value):
+        return delayed_echo(delay, value)
+
+    @staticmethod
+    @net.one_way
+    def notify(value) -> None:
+        return notify(value)
+
+    @staticmethod
+    def get_notifications() -> list:
+        return get_notifications()
+
+    @staticmethod
+    def read_files(*files: net.File, **kw_files: net.File) -> list:
+        return read_files(*files, **kw_files)
+
+    @staticmethod
+    def count(stop: int, raise_at: int = -1):
+        return count(stop, raise_at)
+
+    @staticmethod
+    def get_stream_state() -> dict:
+        return stream_state
 
 
 class _DummyClientFunctions(net.ServerFunctions):
@@ -191,6 +222,48 @@ def client_faculty(number: int) -> int:
     return number * DummyServerCommunicator.remote_functions.server_faculty(number - 1)
 
 
-def get_file(file_path: str, destination_path: str) -> net.File:
-    return net.File(file_path, destination_path)
+def get_file(file_path: str, destination_path: str, resumable: bool = False, delta: bool = False) -> net.File:
+    return net.File(file_path, destination_path, resumable=resumable, delta=delta)
+
+
+def get_directory(directory_path: str, destination_path: str) -> net.Directory:
+    return net.Directory(directory_path, destination_path)
+
+
+def delayed_echo(delay: float, value):
+    time.sleep(delay)
+    return value
+
+
+notifications = []
+
+
+def notify(value) -> None:
+    notifications.append(value)
+
+
+def get_notifications() -> list:
+    return notifications
+
+
+def read_files(*files: net.File, **kw_files: net.File) -> list:
+    contents = []
+    for file in (*files, *kw_files.values()):
+        with open(file.dst_path, "rb") as f:
+            contents.append(f.read())
+    return contents
+
+
+stream_state = {"produced": 0, "closed": False}
+
 
+def count(stop: int, raise_at: int = -1):
+    stream_state.update(produced=0, closed=False)
+    try:
+        for i in range(stop):
+            if i == raise_at:
+                raise ValueError(f"Raised at {i}")
+            stream_state["produced"] += 1
+            yield i
+    finally:
+        stream_state["closed"] = True
@@ -2,12 +2,18 @@ import unittest
 import sys
 import os
 import time
+import tempfile
+import threading
+import socket
+import signal
 
 from thread_testing import get_num_non_dummy_threads, wait_till_joined, wait_till_condition
 
 from pynetworking.Communication_client import ServerCommunicator, MultiServerCommunicator, ServerFunctions
-from pynetworking.Communication_server import ClientManager, ClientFunctions, ClientCommunicator, MetaClientManager
-from pynetworking.Communication_general import to_server_id
+from pynetworking.Communication_server import ClientManager, ClientFunctions, ClientCommunicator, MetaClientManager, \
+    PreforkServer
+from pynetworking.Communication_general import to_server_id, resume_file, IncompleteFileError, Communicator
+from pynetworking.Data import File, FileManifest
 import pynetworking.Communication_general
 from pynetworking.Logging import logger
 
@@ -51,6 +57,30 @@ class StdOutEqualizer:
             self.test_case.assertEqual(self.expected, std_out.read().strip())
 
 
+def write_directory(path: str) -> dict:
+    """Writes many small files, an empty file, a large file and an empty directory. Returns the contents of the
+    files by their relative paths."""
+    contents = {f"small/{i // 100}/{i}.txt": os.urandom(i % 5000) for i in range(500)}
+    contents["large.bin"] = os.urandom(3 * 1000 * 1000)
+    contents["small/empty.txt"] = b""
+    for relative_path, content in contents.items():
+        file_path = os.path.join(path, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as f:
+            f.write(content)
+    os.makedirs(os.path.join(path, "empty"))
+    return contents
+
+
+def read_directory(path: str) -> dict:
+    contents = {}
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            with open(os.path.join(dir_path, file_name), "rb") as f:
+                contents[os.path.relpath(os.path.join(dir_path, file_name), path).replace(os.sep, "/")] = f.read()
+    return contents
+
+
 class TestConnecting(CommunicationTestCase):
 
     def setUp(self):
@@ -254,6 +284,475 @@ class TestCommunicating(CommunicationTestCase):
                               tuple(),
                               120)
 
+    def test_parallel_calls(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ClientManager(server_address, DummyClientCommunicator):
+            DummyServerCommunicator.connect(dummy_address)
+            server = DummyServerCommunicator.remote_functions(timeout=5)
+            with ThreadPoolExecutor(max_workers=50) as executor:
+                results = list(executor.map(lambda i: server.delayed_echo(0.01, i), range(200)))
+            self.assertEqual(list(range(200)), results)
+
+    def test_aead_ciphers(self):
+        from pynetworking.Cryptography import AES_GCM, CHACHA20_POLY1305
+        for cipher in (AES_GCM, CHACHA20_POLY1305):
+            pynetworking.Communication_general.set_ciphers([cipher])
+            try:
+                with ClientManager(server_address, DummyClientCommunicator):
+                    DummyServerCommunicator.connect(dummy_address)
+                    server = DummyServerCommunicator.remote_functions(timeout=5)
+                    self.assertEqual(cipher, DummyServerCommunicator.communicator.cryptographer.cipher)
+                    self.assertEqual(b"x" * 100000, server.delayed_echo(0, b"x" * 100000))
+                    self.assertEqual(list(range(50)), [server.delayed_echo(0, i) for i in range(50)])
+                    DummyServerCommunicator.close_connection()
+                MetaClientManager.tear_down()
+            finally:
+                pynetworking.Communication_general.set_ciphers([pynetworking.Communication_general.FERNET])
+
+    def test_one_way_functions(self):
+        from pynetworking.ID_management import IDManager
+        from pynetworking.tests import example_functions
+        for reactor_workers in (None, 2):
+            example_functions.notifications.clear()
+            with ClientManager(server_address, DummyClientCommunicator, reactor_workers=reactor_workers) as manager:
+                DummyServerCommunicator.connect(dummy_address)
+                server = DummyServerCommunicator.remote_functions(timeout=5)
+                self.assertIsNone(server.notify("marked"))
+                self.assertIsNone(server.delayed_echo.one_way(0, "call site"))
+                self.assertIsNone(server.incrementer.one_way("raises at the server"))
+                self.assertIsNone(server.notify.one_way("call site"))
+                wait_till_condition(lambda: len(server.get_notifications()) == 2, timeout=2)
+                self.assertEqual(["call site", "marked"], sorted(server.get_notifications()))
+                self.assertEqual(3, server.incrementer(2))
+                client_communicator = manager.clients[to_server_id(0)]
+                self.assertEqual([], IDManager(DummyServerCommunicator._id).get_function_stack())
+                wait_till_condition(lambda: IDManager(client_communicator.id).get_function_stack() == [], timeout=1)
+                self.assertEqual([], IDManager(client_communicator.id).get_function_stack())
+                DummyServerCommunicator.close_connection()
+            MetaClientManager.tear_down()
+
+    def test_batch(self):
+        from pynetworking.ID_management import IDManager
+        from pynetworking.Communication_general import ExceptionObject
+        with ClientManager(server_address, DummyClientCommunicator):
+            DummyServerCommunicator.connect(dummy_address)
+            with pynetworking.Communication_general.Batch(DummyServerCommunicator.remote_functions) as batch:
+                futures = [batch.incrementer(i) for i in range(10)]
+                failing = batch.incrementer("no number")
+                last = batch.call("delayed_echo", 0, value="last")
+            self.assertEqual(list(range(1, 11)), [future.result() for future in futures])
+            self.assertRaises(TypeError, failing.result)
+            self.assertEqual("last", last.result())
+            self.assertIsInstance(batch.results[10], ExceptionObject)
+            self.assertEqual([], batch.send())
+            self.assertEqual([], IDManager(DummyServerCommunicator._id).get_function_stack())
+
+    def test_file_arguments(self):
+        with tempfile.TemporaryDirectory() as directory:
+            content = os.urandom(3 * 1000 * 1000)
+            with open(os.path.join(directory, "src.bin"), "wb") as f:
+                f.write(content)
+            with open(os.path.join(directory, "empty.bin"), "wb"):
+                pass
+            for encrypted in (False, True):
+                pynetworking.Communication_general.set_encrypted_communication(encrypted)
+                try:
+                    with ClientManager(server_address, DummyClientCommunicator):
+                        DummyServerCommunicator.connect(dummy_address)
+                        server = DummyServerCommunicator.remote_functions(timeout=5)
+                        files = [File(os.path.join(directory, src), os.path.join(directory, dst))
+                                 for src, dst in (("src.bin", "dst.bin"), ("empty.bin", "dst_empty.bin"))]
+                        self.assertEqual([content, b""], server.read_files(files[0], empty=files[1]))
+                        server.get_file(os.path.join(directory, "src.bin"), os.path.join(directory, "returned.bin"))
+                        with open(os.path.join(directory, "returned.bin"), "rb") as f:
+                            self.assertEqual(content, f.read())
+                        self.assertEqual(3, server.incrementer(2))
+                        DummyServerCommunicator.close_connection()
+                    MetaClientManager.tear_down()
+                finally:
+                    pynetworking.Communication_general.set_encrypted_communication(True)
+
+    def test_encrypted_file_records(self):
+        from pynetworking.Cryptography import FERNET, AES_GCM, CHACHA20_POLY1305
+        with tempfile.TemporaryDirectory() as directory:
+            content = os.urandom(3 * 1000 * 1000)
+            with open(os.path.join(directory, "src.bin"), "wb") as f:
+                f.write(content)
+            for cipher in (FERNET, AES_GCM, CHACHA20_POLY1305):
+                pynetworking.Communication_general.set_ciphers([cipher])
+                try:
+                    with ClientManager(server_address, DummyClientCommunicator):
+                        DummyServerCommunicator.connect(dummy_address)
+                        DummyServerCommunicator.communicator.file_record_size = 1000 * 1000
+                        server = DummyServerCommunicator.remote_functions(timeout=5)
+                        for record_size in (None, 4096, 1024 * 1024 + 1):
+                            file = File(os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin"),
+                                        record_size=record_size)
+                            self.assertEqual([content], server.read_files(file))
+                        server.get_file(os.path.join(directory, "src.bin"), os.path.join(directory, "returned.bin"))
+                        with open(os.path.join(directory, "returned.bin"), "rb") as f:
+                            self.assertEqual(content, f.read())
+                        DummyServerCommunicator.close_connection()
+                    MetaClientManager.tear_down()
+                finally:
+                    pynetworking.Communication_general.set_ciphers([FERNET])
+
+    def test_resumable_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            content = os.urandom(3 * 1000 * 1000)
+            src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+            with open(src_path, "wb") as f:
+                f.write(content)
+            with ClientManager(server_address, DummyClientCommunicator):
+                DummyServerCommunicator.connect(dummy_address)
+                server = DummyServerCommunicator.remote_functions(timeout=5)
+                self.assertEqual(dst_path, server.get_file(src_path, dst_path, resumable=True).dst_path)
+                with open(dst_path, "rb") as f:
+                    self.assertEqual(content, f.read())
+                self.assertFalse(os.path.exists(dst_path + ".part"))
+                os.remove(dst_path)
+
+                # The connection is closed after the first block
+                send_file_content = Communicator._send_file_content
+                sent_ranges = []
+
+                def interrupted_send(communicator, file, ranges=None):
+                    send_file_content(communicator, file, [(0, FileManifest.BLOCK_SIZE)])
+                    communicator._socket_connection.shutdown(socket.SHUT_RDWR)
+                    return False
+
+                def recorded_send(communicator, file, ranges=None):
+                    sent_ranges.append(ranges)
+                    return send_file_content(communicator, file, ranges)
+
+                Communicator._send_file_content = interrupted_send
+                try:
+                    with self.assertRaises(IncompleteFileError) as context:
+                        server.get_file(src_path, dst_path, resumable=True)
+                finally:
+                    Communicator._send_file_content = recorded_send
+                transfer = context.exception.transfer
+                self.assertEqual({0}, transfer.verified)
+                self.assertFalse(os.path.exists(dst_path))
+
+                try:
+                    DummyServerCommunicator.close_connection()
+                    DummyServerCommunicator.connect(dummy_address)
+                    file = resume_file(DummyServerCommunicator.remote_functions, transfer)
+                finally:
+                    Communicator._send_file_content = send_file_content
+                self.assertEqual(dst_path, file.dst_path)
+                self.assertEqual([[(FileManifest.BLOCK_SIZE, len(content) - FileManifest.BLOCK_SIZE)]], sent_ranges)
+                with open(dst_path, "rb") as f:
+                    self.assertEqual(content, f.read())
+                self.assertFalse(os.path.exists(dst_path + ".part"))
+
+                # A changed file can't be resumed
+                os.utime(src_path, (time.time() + 10, time.time() + 10))
+                self.assertRaises(ValueError, resume_file, DummyServerCommunicator.remote_functions, transfer)
+                DummyServerCommunicator.close_connection()
+
+    def test_delta_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            content = os.urandom(3 * 1000 * 1000)
+            src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+            with open(src_path, "wb") as f:
+                f.write(content)
+            send_file_content = Communicator._send_file_content
+            sent_ranges = []
+
+            def recorded_send(communicator, file, ranges=None):
+                sent_ranges.append(ranges)
+                return send_file_content(communicator, file, ranges)
+
+            with ClientManager(server_address, DummyClientCommunicator):
+                DummyServerCommunicator.connect(dummy_address)
+                server = DummyServerCommunicator.remote_functions(timeout=5)
+                Communicator._send_file_content = recorded_send
+                try:
+                    # Without an old file, everything is sent
+                    self.assertEqual(dst_path, server.get_file(src_path, dst_path, delta=True).dst_path)
+                    self.assertEqual([[], [(0, len(content))]], sent_ranges)
+
+                    content = content[:1000000] + b"changed" + content[1000000:2000000] + content[2000100:]
+                    with open(src_path, "wb") as f:
+                        f.write(content)
+                    sent_ranges.clear()
+                    self.assertEqual(dst_path, server.get_file(src_path, dst_path, delta=True).dst_path)
+                finally:
+                    Communicator._send_file_content = send_file_content
+                DummyServerCommunicator.close_connection()
+            with open(dst_path, "rb") as f:
+                self.assertEqual(content, f.read())
+            self.assertFalse(os.path.exists(dst_path + ".part"))
+            self.assertEqual([], sent_ranges[0])
+            self.assertLess(sum(length for _, length in sent_ranges[1]), 50000)
+
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            src_path = os.path.join(directory, "src")
+            contents = write_directory(src_path)
+            for encrypted in (False, True):
+                dst_path = os.path.join(directory, f"dst_{encrypted}")
+                pynetworking.Communication_general.set_encrypted_communication(encrypted)
+                try:
+                    with ClientManager(server_address, DummyClientCommunicator):
+                        DummyServerCommunicator.connect(dummy_address)
+                        server = DummyServerCommunicator.remote_functions(timeout=5)
+                        received = server.get_directory(src_path, dst_path)
+                        self.assertEqual(dst_path, received.dst_path)
+                        self.assertEqual(sorted(contents), [relative_path for relative_path, _ in received.files])
+                        # The connection is still usable after the packed content
+                        self.assertEqual(4, server.incrementer(3))
+                        DummyServerCommunicator.close_connection()
+                    MetaClientManager.tear_down()
+                finally:
+                    pynetworking.Communication_general.set_encrypted_communication(True)
+                self.assertEqual(contents, read_directory(dst_path))
+                self.assertTrue(os.path.isdir(os.path.join(dst_path, "empty")))
+
+    def test_streams(self):
+        from pynetworking.ID_management import IDManager
+        from pynetworking.tests import example_functions
+        for reactor_workers in (None, 2):
+            with ClientManager(server_address, DummyClientCommunicator, reactor_workers=reactor_workers) as manager:
+                DummyServerCommunicator.connect(dummy_address)
+                server = DummyServerCommunicator.remote_functions(timeout=5)
+                self.assertEqual(list(range(10000)), list(server.count(10000)))
+                self.assertEqual([], list(server.count(0)))
+                stream = server.count(100, 50)
+                self.assertEqual(list(range(50)), [next(stream) for _ in range(50)])
+                self.assertRaises(ValueError, next, stream)
+
+                # The server waits, till the client takes the chunks
+                stream = server.count(10 ** 9)
+                self.assertEqual(0, next(stream))
+                time.sleep(0.2)
+                self.assertLess(example_functions.stream_state["produced"], 10000)
+                del stream
+                wait_till_condition(lambda: example_functions.stream_state["closed"], timeout=2)
+                self.assertTrue(example_functions.stream_state["closed"])
+
+                with server.count(10 ** 9) as stream:
+                    self.assertEqual([0, 1, 2], [next(stream) for _ in range(3)])
+                wait_till_condition(lambda: server.get_stream_state()["closed"], timeout=2)
+                self.assertEqual(3, server.incrementer(2))
+                client_communicator = manager.clients[to_server_id(0)]
+                self.assertEqual([], IDManager(DummyServerCommunicator._id).get_function_stack())
+                wait_till_condition(lambda: IDManager(client_communicator.id).get_function_stack() == [], timeout=1)
+                self.assertEqual([], IDManager(client_communicator.id).get_function_stack())
+                DummyServerCommunicator.close_connection()
+            MetaClientManager.tear_down()
+
+    def test_out_of_band_buffers(self):
+        from pynetworking.Data import OUT_OF_BAND_THRESHOLD
+        value = [b"x" * OUT_OF_BAND_THRESHOLD, bytearray(b"y" * 3 * OUT_OF_BAND_THRESHOLD)]
+        for encrypted in (False, True):
+            pynetworking.Communication_general.set_encrypted_communication(encrypted)
+            try:
+                with ClientManager(server_address, DummyClientCommunicator):
+                    DummyServerCommunicator.connect(dummy_address)
+                    server = DummyServerCommunicator.remote_functions(timeout=5)
+                    self.assertEqual([value] * 5, [server.delayed_echo(0, value) for _ in range(5)])
+                    DummyServerCommunicator.close_connection()
+                MetaClientManager.tear_down()
+            finally:
+                pynetworking.Communication_general.set_encrypted_communication(True)
+
+    def test_codec_negotiation(self):
+        from pynetworking.Data import BINARY, DILL
+        for client_codecs, codec in (([BINARY, DILL], BINARY), ([DILL], DILL)):
+            with ClientManager(server_address, DummyClientCommunicator):
+                pynetworking.Communication_general.set_codecs(client_codecs)
+                try:
+                    DummyServerCommunicator.connect(dummy_address)
+                finally:
+                    pynetworking.Communication_general.set_codecs([BINARY, DILL])
+                server = DummyServerCommunicator.remote_functions(timeout=5)
+                self.assertEqual(codec, DummyServerCommunicator.communicator.codec)
+                self.assertEqual({"a": [1, 2.5, None]}, server.delayed_echo(0, {"a": [1, 2.5, None]}))
+                DummyServerCommunicator.close_connection()
+            MetaClientManager.tear_down()
+
+    def test_compression_negotiation(self):
+        from pynetworking.Compression import ZLIB
+        log_lines = {"lines": [f"INFO request {i} took {i % 7} ms" for i in range(20000)]}
+        with tempfile.TemporaryDirectory() as directory:
+            src_path, dst_path = os.path.join(directory, "src.log"), os.path.join(directory, "dst.log")
+            content = "\n".join(log_lines["lines"]).encode() * 20 + os.urandom(3 * 1000 * 1000)
+            with open(src_path, "wb") as f:
+                f.write(content)
+            for compressions, compressed in (([ZLIB], True), ([], False)):
+                pynetworking.Communication_general.set_compressions(compressions)
+                try:
+                    with ClientManager(server_address, DummyClientCommunicator):
+                        DummyServerCommunicator.connect(dummy_address)
+                        server = DummyServerCommunicator.remote_functions(timeout=5)
+                        self.assertEqual(compressed, DummyServerCommunicator.communicator.compressor is not None)
+                        self.assertEqual(list(range(20)), [server.delayed_echo(0, i) for i in range(20)])
+                        self.assertEqual(log_lines, server.delayed_echo(0, log_lines))
+                        server.get_file(src_path, dst_path)
+                        with open(dst_path, "rb") as f:
+                            self.assertEqual(content, f.read())
+                        DummyServerCommunicator.close_connection()
+                    MetaClientManager.tear_down()
+                finally:
+                    pynetworking.Communication_general.set_compressions([])
+        self.assertRaises(ValueError, pynetworking.Communication_general.set_compressions, ["lzma"])
+
+    def test_x25519_key_exchange(self):
+        from pynetworking.Cryptography import X25519, RSA
+        pynetworking.Communication_general.set_key_exchange(X25519)
+        try:
+            with ClientManager(server_address, DummyClientCommunicator):
+                DummyServerCommunicator.connect(dummy_address)
+                server = DummyServerCommunicator.remote_functions(timeout=5)
+                self.assertEqual(list(range(20)), [server.delayed_echo(0, i) for i in range(20)])
+        finally:
+            pynetworking.Communication_general.set_key_exchange(RSA)
+
+    def test_session_resumption(self):
+        for reactor_workers in (None, 2):
+            with ClientManager(server_address, DummyClientCommunicator, reactor_workers=reactor_workers):
+                DummyServerCommunicator.connect(dummy_address)
+                session_ticket = DummyServerCommunicator._session_ticket
+                self.assertIsNotNone(session_ticket)
+                DummyServerCommunicator.close_connection()
+                DummyServerCommunicator.connect(dummy_address)
+                # No RSA key pair was generated.
+                self.assertIsNone(DummyServerCommunicator.communicator.cryptographer._private_key)
+                self.assertEqual(session_ticket, DummyServerCommunicator._session_ticket)
+                self.assertEqual(5, DummyServerCommunicator.remote_functions(timeout=5).delayed_echo(0, 5))
+                DummyServerCommunicator.close_connection()
+            MetaClientManager.tear_down()
+            # A restarted server rejects the ticket.
+            with ClientManager(server_address, DummyClientCommunicator, reactor_workers=reactor_workers):
+                DummyServerCommunicator.connect(dummy_address)
+                self.assertNotEqual(session_ticket, DummyServerCommunicator._session_ticket)
+                self.assertEqual(5, DummyServerCommunicator.remote_functions(timeout=5).delayed_echo(0, 5))
+                DummyServerCommunicator.close_connection()
+            MetaClientManager.tear_down()
+
+    def test_rejected_functions(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from pynetworking.Communication_general import FunctionExecutor, ExecutionRejectedError
+        executor = FunctionExecutor(max_workers=1, max_queue_size=1, rejection_policy=FunctionExecutor.REJECT)
+        with ClientManager(server_address, DummyClientCommunicator, executor):
+            DummyServerCommunicator.connect(dummy_address)
+            server = DummyServerCommunicator.remote_functions(timeout=5)
+
+            def call(i):
+                try:
+                    return server.delayed_echo(0.2, i)
+                except ExecutionRejectedError:
+                    return None
+
+            with ThreadPoolExecutor(max_workers=5) as pool:
+                results = list(pool.map(call, range(5)))
+            self.assertEqual(2, len([r for r in results if r is not None]))
+            self.assertEqual(4, server.delayed_echo(0, 4))
+        executor.shutdown()
+
+    def test_shared_function_executor(self):
+        from pynetworking.Communication_general import FunctionExecutor
+        executor = FunctionExecutor(max_workers=4)
+        second_address = ("0.0.0.0", 5001)
+        with ClientManager(second_address, DummyClientCommunicator, executor):
+            with ClientManager(server_address, DummyClientCommunicator, executor):
+                DummyMultiServerCommunicator(0).connect(dummy_address)
+                DummyMultiServerCommunicator(1).connect(("localhost", 5001))
+                self.assertEqual(0, DummyMultiServerCommunicator(0).remote_functions(timeout=5).delayed_echo(0, 0))
+            # The executor is still used by the other ClientManager
+            server = DummyMultiServerCommunicator(1).remote_functions(timeout=5)
+            self.assertEqual(1, server.delayed_echo(0, 1))
+            executor.shutdown()
+            self.assertRaises(RuntimeError, server.delayed_echo, 0, 2)
+
+    def test_out_of_order_responses(self):
+        finished = []
+        with ClientManager(server_address, DummyClientCommunicator):
+            DummyServerCommunicator.connect(dummy_address)
+            server = DummyServerCommunicator.remote_functions(timeout=5)
+            slow = threading.Thread(target=lambda: finished.append(server.delayed_echo(0.5, "slow")))
+            slow.start()
+            time.sleep(0.1)
+            finished.append(server.delayed_echo(0, "fast"))
+            slow.join()
+        self.assertEqual(["fast", "slow"], finished)
+
+
+class TestReactor(CommunicationTestCase):
+
+    def test_reactor(self):
+        file_path = os.path.join(os.path.split(__file__)[0], "std_out.txt")
+        for encrypted in (True, False):
+            pynetworking.Communication_general.set_encrypted_communication(encrypted)
+            try:
+                with tempfile.TemporaryDirectory() as directory:
+                    with ClientManager(server_address, DummyClientCommunicator, reactor_workers=2) as manager:
+                        for i in range(3):
+                            DummyMultiServerCommunicator(i).connect(dummy_address)
+                        wait_till_condition(lambda: len(manager.clients) == 3, timeout=2)
+                        # Main, reactor, at most 2 reactor workers, 3 * server_communicator. No thread per client.
+                        self.assertLessEqual(get_num_non_dummy_threads(), 7)
+                        for i in range(3):
+                            server = DummyMultiServerCommunicator(i).remote_functions(timeout=5)
+                            self.assertEqual(i, server.delayed_echo(0, i))
+                            self.assertEqual(2, server.func_in_func(0))
+                            self.assertEqual("Text" * 1200, server.huge_args_huge_ret("Text" * 1200)[0])
+                            destination_path = os.path.join(directory, str(i))
+                            server.get_file(file_path, destination_path)
+                            self.assertEqual(os.path.getsize(file_path), os.path.getsize(destination_path))
+                            sent_file = File(file_path, os.path.join(directory, f"sent_{i}"))
+                            self.assertEqual([os.path.getsize(file_path)],
+                                             [len(content) for content in server.read_files(sent_file)])
+                        DummyMultiServerCommunicator(1).close_connection()
+                        wait_till_condition(lambda: len(manager.clients) == 2, timeout=2)
+                        self.assertEqual(2, len(manager.clients))
+                        server = DummyMultiServerCommunicator(0).remote_functions(timeout=5)
+                        self.assertEqual(0, server.delayed_echo(0, 0))
+                    MultiServerCommunicator.close_all_connections()
+                    wait_till_joined(manager, timeout=2)
+                    MetaClientManager.tear_down()
+                self.assertEqual(1, get_num_non_dummy_threads())
+            finally:
+                pynetworking.Communication_general.set_encrypted_communication(True)
+
+
+class TestPreforkServer(CommunicationTestCase):
+
+    def test_prefork_server(self):
+        with PreforkServer(server_address, DummyClientCommunicator, num_processes=2) as prefork_server:
+            pids = [process.pid for process in prefork_server.processes]
+            self.assertNotIn(os.getpid(), pids)
+            for i in range(4):
+                DummyMultiServerCommunicator(i).connect(dummy_address)
+                server = DummyMultiServerCommunicator(i).remote_functions(timeout=5)
+                self.assertEqual(i, server.delayed_echo(0, i))
+                self.assertEqual(2, server.func_in_func(0))
+                # Every worker has its own ClientManager, which numbers its clients
+                self.assertLessEqual(to_server_id(0), server.return_client_id())
+            MultiServerCommunicator.close_all_connections()
+
+            # All workers redeem the session tickets
+            DummyServerCommunicator.connect(dummy_address)
+            for _ in range(4):
+                DummyServerCommunicator.close_connection()
+                DummyServerCommunicator.connect(dummy_address)
+                self.assertIsNone(DummyServerCommunicator.communicator.cryptographer._private_key)
+                self.assertEqual(5, DummyServerCommunicator.remote_functions(timeout=5).delayed_echo(0, 5))
+            DummyServerCommunicator.close_connection()
+
+            # A crashed worker is restarted
+            os.kill(pids[0], signal.SIGKILL)
+            wait_till_condition(lambda: prefork_server.processes[0].pid != pids[0], timeout=5)
+            self.assertNotEqual(pids[0], prefork_server.processes[0].pid)
+            for _ in range(4):
+                DummyServerCommunicator.connect(dummy_address)
+                self.assertEqual(5, DummyServerCommunicator.remote_functions(timeout=5).delayed_echo(0, 5))
+                DummyServerCommunicator.close_connection()
+        self.assertEqual([0, 0], [process.exitcode for process in prefork_server.processes])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,385 @@
+"""
+@author: Julian Sobott
+@brief: Tests the asyncio communicators and their interoperability with the threaded communicators.
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+import pynetworking as net
+from pynetworking.Communication_server import MetaClientManager
+from pynetworking.Logging import logger
+
+from pynetworking.tests.example_functions import DummyPerson, DummyServerCommunicator, DummyClientCommunicator, \
+    _DummyServerFunctions, _DummyClientFunctions
+
+address = ("127.0.0.1", 5001)
+
+logger.setLevel(30)
+
+
+class _AsyncDummyServerFunctions(_DummyServerFunctions):
+
+    @staticmethod
+    async def async_echo(value):
+        await asyncio.sleep(0)
+        return value
+
+    @staticmethod
+    async def async_func_in_func(start: int) -> int:
+        ret = await net.AsyncClientCommunicator.get().remote_functions.incrementer(start)
+        return ret + 1
+
+    @staticmethod
+    async def async_count(stop: int):
+        for i in range(stop):
+            await asyncio.sleep(0)
+            yield i
+
+
+class DummyAsyncClientCommunicator(net.AsyncClientCommunicator):
+    remote_functions = _DummyClientFunctions
+    local_functions = _AsyncDummyServerFunctions
+
+
+class DummyAsyncServerCommunicator(net.AsyncServerCommunicator):
+    remote_functions = _DummyServerFunctions
+    local_functions = _DummyClientFunctions
+
+
+class EventLoopThread(threading.Thread):
+    """Runs an event loop in the background, so threaded communicators can talk to it."""
+
+    def __init__(self):
+        super().__init__(name="EventLoopThread")
+        self.loop = asyncio.new_event_loop()
+
+    def run(self):
+        self.loop.run_forever()
+
+    def run_coroutine(self, coroutine, timeout=5):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+        self.loop.close()
+
+
+class TestAsyncCommunication(unittest.TestCase):
+
+    def run_async(self, coroutine):
+        return asyncio.new_event_loop().run_until_complete(coroutine)
+
+    def test_async_client_async_server(self):
+        async def main():
+            async with net.AsyncClientManager(address, DummyAsyncClientCommunicator) as manager:
+                async with DummyAsyncServerCommunicator() as server:
+                    self.assertTrue(await server.connect(address, timeout=2))
+                    remote = server.remote_functions(timeout=5)
+                    self.assertEqual(True, await remote.no_arg_ret())
+                    self.assertEqual(DummyPerson("Anne", 78), await remote.args_ret_object("Anne", 78))
+                    self.assertEqual("async", await remote.async_echo("async"))
+                    self.assertEqual(2, await remote.async_func_in_func(0))
+                    self.assertEqual(list(range(100)),
+                                     list(await asyncio.gather(*(remote.async_echo(i) for i in range(100)))))
+                    self.assertEqual(1, len(manager.clients))
+                await asyncio.sleep(0.1)
+                self.assertEqual(0, len(manager.clients))
+        self.run_async(main())
+
+    def test_remote_exception(self):
+        async def main():
+            async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                async with DummyAsyncServerCommunicator() as server:
+                    await server.connect(address, timeout=2)
+                    with self.assertRaises(TypeError):
+                        await server.remote_functions(timeout=5).incrementer("1")
+        self.run_async(main())
+
+    def test_one_way_functions(self):
+        from pynetworking.tests import example_functions
+        example_functions.notifications.clear()
+
+        async def main():
+            async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                async with DummyAsyncServerCommunicator() as server:
+                    await server.connect(address, timeout=2)
+                    remote = server.remote_functions(timeout=5)
+                    self.assertIsNone(await remote.notify("marked"))
+                    self.assertIsNone(await remote.incrementer.one_way("raises at the server"))
+                    self.assertIsNone(await remote.async_echo.one_way("call site"))
+                    self.assertEqual(3, await remote.incrementer(2))
+                    for _ in range(50):
+                        if await remote.get_notifications():
+                            break
+                        await asyncio.sleep(0.02)
+                    self.assertEqual(["marked"], await remote.get_notifications())
+        self.run_async(main())
+
+    def test_batch(self):
+        async def main():
+            async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                async with DummyAsyncServerCommunicator() as server:
+                    await server.connect(address, timeout=2)
+                    async with net.AsyncBatch(server.remote_functions) as batch:
+                        futures = [batch.incrementer(i) for i in range(10)]
+                        failing = batch.incrementer("no number")
+                        echo = batch.async_echo("coroutine")
+                    self.assertEqual(list(range(1, 11)), [future.result() for future in futures])
+                    self.assertRaises(TypeError, failing.result)
+                    self.assertEqual("coroutine", echo.result())
+        self.run_async(main())
+
+    def test_file_arguments(self):
+        async def main():
+            with tempfile.TemporaryDirectory() as directory:
+                src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+                content = os.urandom(3 * 1000 * 1000)
+                with open(src_path, "wb") as f:
+                    f.write(content)
+                for encrypted in (False, True):
+                    net.Communication_general.set_encrypted_communication(encrypted)
+                    try:
+                        async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                            async with DummyAsyncServerCommunicator() as server:
+                                await server.connect(address, timeout=2)
+                                remote = server.remote_functions(timeout=5)
+                                self.assertEqual([content], await remote.read_files(file=net.File(src_path, dst_path)))
+                                returned_path = os.path.join(directory, "returned.bin")
+                                await remote.get_file(src_path, returned_path)
+                                with open(returned_path, "rb") as f:
+                                    self.assertEqual(content, f.read())
+                                self.assertEqual(3, await remote.incrementer(2))
+                    finally:
+                        net.Communication_general.set_encrypted_communication(True)
+        self.run_async(main())
+
+    def test_encrypted_file_records(self):
+        from pynetworking.Cryptography import FERNET, AES_GCM
+
+        async def main():
+            with tempfile.TemporaryDirectory() as directory:
+                src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+                content = os.urandom(3 * 1000 * 1000)
+                with open(src_path, "wb") as f:
+                    f.write(content)
+                for cipher in (FERNET, AES_GCM):
+                    net.Communication_general.set_ciphers([cipher])
+                    try:
+                        async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                            async with DummyAsyncServerCommunicator() as server:
+                                await server.connect(address, timeout=2)
+                                self.assertEqual(cipher, server.communicator.cryptographer.cipher)
+                                server.communicator.file_record_size = 1000 * 1000
+                                remote = server.remote_functions(timeout=5)
+                                for record_size in (None, 4096, 1024 * 1024 + 1):
+                                    file = net.File(src_path, dst_path, record_size=record_size)
+                                    self.assertEqual([content], await remote.read_files(file))
+                                returned_path = os.path.join(directory, "returned.bin")
+                                await remote.get_file(src_path, returned_path)
+                                with open(returned_path, "rb") as f:
+                                    self.assertEqual(content, f.read())
+                    finally:
+                        net.Communication_general.set_ciphers([FERNET])
+        self.run_async(main())
+
+    def test_resumable_file(self):
+        from pynetworking.Communication_async import AsyncCommunicator
+        from pynetworking.Data import FileManifest
+
+        async def main():
+            with tempfile.TemporaryDirectory() as directory:
+                src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+                content = os.urandom(3 * 1000 * 1000)
+                with open(src_path, "wb") as f:
+                    f.write(content)
+                send_file_content = AsyncCommunicator._send_file_content
+
+                async def interrupted_send(communicator, file, ranges=None):
+                    await send_file_content(communicator, file, [(0, FileManifest.BLOCK_SIZE)])
+                    communicator._writer.close()
+
+                async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                    async with DummyAsyncServerCommunicator() as server:
+                        await server.connect(address, timeout=2)
+                        remote = server.remote_functions(timeout=5)
+                        AsyncCommunicator._send_file_content = interrupted_send
+                        try:
+                            with self.assertRaises(net.IncompleteFileError) as context:
+                                await remote.get_file(src_path, dst_path, resumable=True)
+                        finally:
+                            AsyncCommunicator._send_file_content = send_file_content
+                        self.assertEqual({0}, context.exception.transfer.verified)
+                        self.assertFalse(os.path.exists(dst_path))
+
+                        await server.close_connection()
+                        await server.connect(address, timeout=2)
+                        file = await net.async_resume_file(server.remote_functions, context.exception.transfer)
+                        self.assertEqual(dst_path, file.dst_path)
+                        with open(dst_path, "rb") as f:
+                            self.assertEqual(content, f.read())
+                        self.assertFalse(os.path.exists(dst_path + ".part"))
+        self.run_async(main())
+
+    def test_delta_file(self):
+        from pynetworking.Communication_async import AsyncCommunicator
+
+        async def main():
+            with tempfile.TemporaryDirectory() as directory:
+                src_path, dst_path = os.path.join(directory, "src.bin"), os.path.join(directory, "dst.bin")
+                content = os.urandom(3 * 1000 * 1000)
+                with open(dst_path, "wb") as f:
+                    f.write(content)
+                content = content[:1000000] + b"changed" + content[1000100:]
+                with open(src_path, "wb") as f:
+                    f.write(content)
+                send_file_content = AsyncCommunicator._send_file_content
+                sent_ranges = []
+
+                async def recorded_send(communicator, file, ranges=None):
+                    sent_ranges.append(ranges)
+                    await send_file_content(communicator, file, ranges)
+
+                async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                    async with DummyAsyncServerCommunicator() as server:
+                        await server.connect(address, timeout=2)
+                        remote = server.remote_functions(timeout=5)
+                        AsyncCommunicator._send_file_content = recorded_send
+                        try:
+                            file = await remote.get_file(src_path, dst_path, delta=True)
+                        finally:
+                            AsyncCommunicator._send_file_content = send_file_content
+                        self.assertEqual(dst_path, file.dst_path)
+                with open(dst_path, "rb") as f:
+                    self.assertEqual(content, f.read())
+                self.assertFalse(os.path.exists(dst_path + ".part"))
+                self.assertEqual([], sent_ranges[0])
+                self.assertLess(sum(length for _, length in sent_ranges[1]), 50000)
+        self.run_async(main())
+
+    def test_compression(self):
+        from pynetworking.Compression import ZLIB
+
+        async def main():
+            with tempfile.TemporaryDirectory() as directory:
+                src_path, dst_path = os.path.join(directory, "src.log"), os.path.join(directory, "dst.log")
+                content = b"INFO request took 3 ms\n" * 200000 + os.urandom(3 * 1000 * 1000)
+                with open(src_path, "wb") as f:
+                    f.write(content)
+                net.Communication_general.set_compressions([ZLIB])
+                try:
+                    async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                        async with DummyAsyncServerCommunicator() as server:
+                            await server.connect(address, timeout=2)
+                            self.assertIsNotNone(server.communicator.compressor)
+                            remote = server.remote_functions(timeout=5)
+                            self.assertEqual([{"a": i} for i in range(20)],
+                                             [await remote.delayed_echo(0, {"a": i}) for i in range(20)])
+                            await remote.get_file(src_path, dst_path)
+                            with open(dst_path, "rb") as f:
+                                self.assertEqual(content, f.read())
+                            self.assertEqual(3, await remote.incrementer(2))
+                finally:
+                    net.Communication_general.set_compressions([])
+        self.run_async(main())
+
+    def test_directory(self):
+        from pynetworking.tests.test_Communication import write_directory, read_directory
+
+        async def main():
+            with tempfile.TemporaryDirectory() as directory:
+                src_path = os.path.join(directory, "src")
+                contents = write_directory(src_path)
+                for encrypted in (False, True):
+                    dst_path = os.path.join(directory, f"dst_{encrypted}")
+                    net.Communication_general.set_encrypted_communication(encrypted)
+                    try:
+                        async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                            async with DummyAsyncServerCommunicator() as server:
+                                await server.connect(address, timeout=2)
+                                remote = server.remote_functions(timeout=5)
+                                received = await remote.get_directory(src_path, dst_path)
+                                self.assertEqual(dst_path, received.dst_path)
+                                self.assertEqual(3, await remote.incrementer(2))
+                    finally:
+                        net.Communication_general.set_encrypted_communication(True)
+                    self.assertEqual(contents, read_directory(dst_path))
+                    self.assertTrue(os.path.isdir(os.path.join(dst_path, "empty")))
+        self.run_async(main())
+
+    def test_streams(self):
+        from pynetworking.tests import example_functions
+
+        async def main():
+            async with net.AsyncClientManager(address, DummyAsyncClientCommunicator):
+                async with DummyAsyncServerCommunicator() as server:
+                    await server.connect(address, timeout=2)
+                    remote = server.remote_functions(timeout=5)
+                    self.assertEqual(list(range(1000)), [i async for i in await remote.count(1000)])
+                    self.assertEqual(list(range(1000)), [i async for i in await remote.async_count(1000)])
+                    self.assertEqual([], [i async for i in await remote.async_count(0)])
+                    received = []
+                    with self.assertRaises(ValueError):
+                        async for i in await remote.count(100, 50):
+                            received.append(i)
+                    self.assertEqual(list(range(50)), received)
+
+                    stream = await remote.count(10 ** 9)
+                    self.assertEqual(0, await stream.__anext__())
+                    await asyncio.sleep(0.2)
+                    self.assertLess(example_functions.stream_state["produced"], 10000)
+                    await stream.aclose()
+                    for _ in range(50):
+                        if example_functions.stream_state["closed"]:
+                            break
+                        await asyncio.sleep(0.02)
+                    self.assertTrue(example_functions.stream_state["closed"])
+                    self.assertEqual(3, await remote.incrementer(2))
+        self.run_async(main())
+
+    def test_not_connected(self):
+        async def main():
+            server = DummyAsyncServerCommunicator()
+            self.assertFalse(await server.connect(address, timeout=1))
+            with self.assertRaises(ConnectionError):
+                await server.remote_functions.no_arg_ret()
+        self.run_async(main())
+
+    def test_threaded_client_async_server(self):
+        loop_thread = EventLoopThread()
+        loop_thread.start()
+        manager = net.AsyncClientManager(address, DummyAsyncClientCommunicator)
+        try:
+            loop_thread.run_coroutine(manager.start())
+            DummyServerCommunicator.connect(address, timeout=2)
+            remote = DummyServerCommunicator.remote_functions(timeout=5)
+            self.assertEqual(("Anne", 78), remote.class_args_ret(DummyPerson("Anne", 78)))
+            self.assertEqual(2, remote.async_func_in_func(0))
+        finally:
+            DummyServerCommunicator.close_connection()
+            loop_thread.run_coroutine(manager.stop())
+            loop_thread.stop()
+
+    def test_async_client_threaded_server(self):
+        async def main():
+            async with DummyAsyncServerCommunicator() as server:
+                self.assertTrue(await server.connect(address, timeout=2))
+                remote = server.remote_functions(timeout=5)
+                self.assertEqual(3, await remote.incrementer(2))
+                self.assertEqual("Text" * 1200, (await remote.huge_args_huge_ret("Text" * 1200))[0])
+
+        with net.ClientManager(address, DummyClientCommunicator):
+            self.run_async(main())
+        MetaClientManager._instances.pop(address, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
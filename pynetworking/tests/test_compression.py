@@ -0,0 +1,66 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import os
+from unittest import TestCase
+
+from pynetworking.Compression import Compressor, ZLIB
+from pynetworking.Communication_general import choose_compression, set_compressions
+
+
+class TestCompressor(TestCase):
+
+    def setUp(self) -> None:
+        self.sender = Compressor()
+        self.receiver = Compressor()
+
+    def transmit(self, message: bytes) -> bytes:
+        compressed = self.sender.compress(message)
+        self.assertEqual(message, bytes(self.receiver.decompress(compressed)))
+        return compressed
+
+    def test_small_messages(self):
+        self.assertEqual(b"\x00abc", self.transmit(b"abc"))
+        self.assertEqual(b"\x00", self.transmit(b""))
+
+    def test_repetitive_messages(self):
+        message = b'{"user": "john.miller", "action": "login", "success": true, "client": "pynetworking", ' \
+                  b'"address": "192.168.178.20", "duration": 12, "session": "%d"}'
+        later = [self.transmit(message % i) for i in range(100)][1:]
+        # The later messages refer to the previous ones. Alone they don't compress that well
+        self.assertLess(max(len(compressed) for compressed in later), len(message) / 4)
+        self.assertGreater(len(Compressor().compress(message % 1)), len(message) / 2)
+
+    def test_large_messages(self):
+        message = b"INFO request took 3 ms\n" * 100000
+        self.assertLess(len(self.transmit(message)), len(message) / 10)
+        self.assertLess(len(self.transmit(memoryview(message))), len(message) / 10)
+
+    def test_incompressible_messages(self):
+        for message in (os.urandom(Compressor.SAMPLE_SIZE + 1), os.urandom(1 << 20),
+                        os.urandom(1 << 20) + bytes(Compressor.SAMPLE_SIZE)):
+            self.assertEqual(b"\x00" + message, self.transmit(message))
+        # Messages with a compressible sample, but incompressible rest
+        message = bytes(Compressor.SAMPLE_SIZE) + os.urandom(1 << 20)
+        self.assertEqual(b"\x00" + message, self.transmit(message))
+        self.assertEqual(b"abc" * 100, self.receiver.decompress(self.sender.compress(b"abc" * 100)))
+
+    def test_invalid_messages(self):
+        self.assertRaises(ValueError, self.receiver.decompress, b"\x09abc")
+        self.assertRaises(ValueError, Compressor, "lzma")
+
+    def test_negotiation(self):
+        self.assertIsNone(choose_compression([ZLIB]))
+        self.assertIsNone(choose_compression(None))
+        set_compressions([ZLIB])
+        try:
+            self.assertEqual(ZLIB, choose_compression([ZLIB]))
+            self.assertIsNone(choose_compression([]))
+        finally:
+            set_compressions([])
@@ -0,0 +1,162 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import unittest
+
+from cryptography.exceptions import InvalidTag
+
+from pynetworking.Cryptography import Cryptographer, SessionTickets, FERNET, AES_GCM, CHACHA20_POLY1305, RSA, X25519
+
+
+def connected_cryptographers(cipher: str):
+    client, server = Cryptographer(), Cryptographer()
+    key = Cryptographer.generate_communication_key(cipher)
+    client.set_communication_key(key, cipher)
+    server.set_communication_key(key, cipher, is_server=True)
+    return client, server
+
+
+class TestCryptographer(unittest.TestCase):
+
+    def test_round_trip(self):
+        for cipher in (FERNET, AES_GCM, CHACHA20_POLY1305):
+            client, server = connected_cryptographers(cipher)
+            for message in (b"", b"Hello", bytes(range(256)) * 100):
+                self.assertEqual(message, server.decrypt(client.encrypt(message)))
+                self.assertEqual(message, client.decrypt(memoryview(server.encrypt(message))))
+
+    def test_aead_overhead(self):
+        client, server = connected_cryptographers(AES_GCM)
+        self.assertEqual(1000 + 16, len(client.encrypt(b"x" * 1000)))
+
+    def test_aead_counter_nonces(self):
+        client, server = connected_cryptographers(AES_GCM)
+        first, second = client.encrypt(b"same"), client.encrypt(b"same")
+        self.assertNotEqual(first, second)
+        # The server sends with other nonces than the client.
+        self.assertNotEqual(first, server.encrypt(b"same"))
+        # Messages must be decrypted in order.
+        self.assertRaises(InvalidTag, server.decrypt, second)
+
+    def test_aead_tampered(self):
+        client, server = connected_cryptographers(CHACHA20_POLY1305)
+        cipher_text = bytearray(client.encrypt(b"Hello"))
+        cipher_text[0] ^= 1
+        self.assertRaises(InvalidTag, server.decrypt, bytes(cipher_text))
+
+    def test_crypt_into_buffers(self):
+        for cipher in (FERNET, AES_GCM, CHACHA20_POLY1305):
+            client, server = connected_cryptographers(cipher)
+            buffer = bytearray(1000 + 16)
+            for message in (b"Hello", bytes(range(200)) * 5):
+                record = client.encrypt_into(memoryview(message), buffer)
+                decrypted_length = server.decrypted_length(record)
+                if decrypted_length is None:
+                    self.assertEqual(FERNET, cipher)
+                    self.assertEqual(message, server.decrypt(record))
+                    continue
+                decrypted = bytearray(decrypted_length)
+                server.decrypt_into(record, memoryview(decrypted))
+                self.assertEqual(message, decrypted)
+
+    def test_crypt_into_tampered(self):
+        client, server = connected_cryptographers(AES_GCM)
+        record = client.encrypt_into(b"Hello", bytearray(100))
+        record[0] ^= 1
+        self.assertRaises(InvalidTag, server.decrypt_into, record, memoryview(bytearray(5)))
+
+    def test_choose_cipher(self):
+        self.assertEqual(AES_GCM, Cryptographer.choose_cipher([CHACHA20_POLY1305, AES_GCM], [AES_GCM, FERNET]))
+        self.assertEqual(FERNET, Cryptographer.choose_cipher(None, [AES_GCM, FERNET]))
+        self.assertEqual(FERNET, Cryptographer.choose_cipher([CHACHA20_POLY1305], [AES_GCM]))
+
+    def test_unknown_cipher(self):
+        self.assertRaises(ValueError, Cryptographer().set_communication_key, b"key", "rot13")
+
+    def test_handshakes(self):
+        for key_exchange in (RSA, X25519):
+            for ciphers in ([FERNET], [AES_GCM]):
+                client, server = Cryptographer(), Cryptographer()
+                client_hello = client.client_hello(key_exchange, ciphers)
+                server_hello, server_key, server_cipher = server.server_hello(client_hello, [AES_GCM, FERNET])
+                client_key, client_cipher = client.key_from_server_hello(server_hello)
+                self.assertEqual(server_key, client_key)
+                self.assertEqual(ciphers[0], client_cipher)
+                self.assertEqual(server_cipher, client_cipher)
+                client.set_communication_key(client_key, client_cipher)
+                server.set_communication_key(server_key, server_cipher, is_server=True)
+                self.assertEqual(b"Hello", server.decrypt(client.encrypt(b"Hello")))
+
+    def test_x25519_keys_differ(self):
+        keys = set()
+        for _ in range(3):
+            client, server = Cryptographer(), Cryptographer()
+            server_hello, key, cipher = server.server_hello(client.client_hello(X25519, [AES_GCM]), [AES_GCM])
+            keys.add(key)
+        self.assertEqual(3, len(keys))
+
+    def test_unknown_key_exchange(self):
+        self.assertRaises(ValueError, Cryptographer().client_hello, "diffie-hellman", [FERNET])
+
+    def full_handshake(self, session_tickets: SessionTickets, cipher: str = AES_GCM):
+        client, server = Cryptographer(), Cryptographer()
+        server_hello, key, cipher = server.server_hello(client.client_hello(X25519, [cipher]), [cipher],
+                                                        session_tickets)
+        self.assertEqual((key, cipher), client.key_from_server_hello(server_hello))
+        return client.session_ticket
+
+    def test_session_resumption(self):
+        session_tickets = SessionTickets()
+        for cipher in (FERNET, AES_GCM):
+            session_ticket = self.full_handshake(session_tickets, cipher)
+            self.assertIsNotNone(session_ticket)
+            keys = set()
+            for _ in range(2):
+                client, server = Cryptographer(), Cryptographer()
+                client_hello = client.client_hello(X25519, [cipher], session_ticket)
+                self.assertNotIn("x25519_public_key", client_hello)
+                server_hello, server_key, server_cipher = server.server_hello(client_hello, [cipher], session_tickets)
+                self.assertEqual((server_key, server_cipher), client.key_from_server_hello(server_hello))
+                self.assertEqual(session_ticket, client.session_ticket)
+                client.set_communication_key(server_key, server_cipher)
+                server.set_communication_key(server_key, server_cipher, is_server=True)
+                self.assertEqual(b"Hello", server.decrypt(client.encrypt(b"Hello")))
+                keys.add(server_key)
+            # Every resumed session has its own key.
+            self.assertEqual(2, len(keys))
+
+    def test_replayed_session_resumption(self):
+        session_tickets = SessionTickets()
+        session_ticket = self.full_handshake(session_tickets)
+        client_hello = Cryptographer().client_hello(X25519, [AES_GCM], session_ticket)
+        # The same client hello is sent twice, e.g. recorded and replayed by an attacker
+        first_key = Cryptographer().server_hello(client_hello, [AES_GCM], session_tickets)[1]
+        second_key = Cryptographer().server_hello(client_hello, [AES_GCM], session_tickets)[1]
+        self.assertIsNotNone(first_key)
+        self.assertNotEqual(first_key, second_key)
+
+    def test_rejected_session_ticket(self):
+        session_ticket = self.full_handshake(SessionTickets())
+        expired_ticket = self.full_handshake(SessionTickets(lifetime=-1))
+        for session_tickets, ticket in ((SessionTickets(), session_ticket), (None, session_ticket),
+                                        (SessionTickets(lifetime=-1), expired_ticket)):
+            client, server = Cryptographer(), Cryptographer()
+            server_hello, key, cipher = server.server_hello(client.client_hello(X25519, [AES_GCM], ticket), [AES_GCM],
+                                                            session_tickets)
+            self.assertIsNone(key)
+            self.assertIsNone(client.key_from_server_hello(server_hello))
+            self.assertIsNone(client.session_ticket)
+
+    def test_tampered_session_ticket(self):
+        session_tickets = SessionTickets()
+        session_ticket = self.full_handshake(session_tickets)
+        ticket = bytearray(session_ticket.ticket)
+        ticket[-1] ^= 1
+        self.assertIsNone(session_tickets.redeem(bytes(ticket)))
+        self.assertIsNone(session_tickets.redeem(b"short"))
@@ -0,0 +1,73 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import os
+import tempfile
+from unittest import TestCase
+
+from pynetworking.Data import Directory, FileWriters, read_file_into
+
+
+class TestDirectory(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.src_path = os.path.join(self.directory.name, "src")
+        os.makedirs(os.path.join(self.src_path, "b", "c"))
+        os.makedirs(os.path.join(self.src_path, "a"))
+        for relative_path, content in (("z.txt", b"z"), ("b/c/deep.bin", b"deep" * 100), ("b/empty", b"")):
+            with open(os.path.join(self.src_path, *relative_path.split("/")), "wb") as f:
+                f.write(content)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_scan(self):
+        directory = Directory(self.src_path, "dst")
+        directory.scan()
+        self.assertEqual(["a", "b", "b/c"], directory.directories)
+        self.assertEqual([("b/c/deep.bin", 400), ("b/empty", 0), ("z.txt", 1)], directory.files)
+        self.assertEqual(401, directory.size)
+        self.assertEqual(os.path.join(self.src_path, "b", "c", "deep.bin"), directory.source("b/c/deep.bin"))
+
+    def test_destination(self):
+        directory = Directory("src", "dst")
+        self.assertEqual(os.path.join("dst", "a", "b.txt"), directory.destination("a/b.txt"))
+        for relative_path in ("", "/etc/passwd", "../outside", "a/../../outside", "a//b", "./a", "a/"):
+            self.assertIsNone(directory.destination(relative_path), relative_path)
+
+    def test_read_file_into(self):
+        buffer = bytearray(b"x" * 1000)
+        read_file_into(os.path.join(self.src_path, "z.txt"), memoryview(buffer)[10:11])
+        self.assertEqual(b"x" * 10 + b"z" + b"x" * 989, buffer)
+        # A file that shrank is filled up with zeros
+        read_file_into(os.path.join(self.src_path, "z.txt"), memoryview(buffer)[:5])
+        self.assertEqual(b"z" + bytes(4) + b"x" * 5, buffer[:10])
+
+
+class TestFileWriters(TestCase):
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            writers = FileWriters(max_pending_bytes=1000)
+            for i in range(100):
+                writers.write(os.path.join(directory, str(i)), bytes([i]) * 100)
+                self.assertLessEqual(writers.pending_bytes, 1000)
+            self.assertIsNone(writers.close())
+            for i in range(100):
+                with open(os.path.join(directory, str(i)), "rb") as f:
+                    self.assertEqual(bytes([i]) * 100, f.read())
+
+    def test_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            writers = FileWriters()
+            writers.write(os.path.join(directory, "missing", "file"), b"data")
+            writers.write(os.path.join(directory, "file"), b"data")
+            self.assertIsInstance(writers.close(), OSError)
+            self.assertTrue(os.path.exists(os.path.join(directory, "file")))
@@ -0,0 +1,113 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import os
+import tempfile
+import zlib
+from unittest import TestCase
+
+from pynetworking.Data import FileSignature, FileManifest, FileTransfer, file_version
+
+
+def apply_delta(old: bytes, new: bytes, copies: list, literals: list) -> bytes:
+    result = bytearray(len(new))
+    for offset, source_offset, length in copies:
+        result[offset:offset + length] = old[source_offset:source_offset + length]
+    for offset, length in literals:
+        result[offset:offset + length] = new[offset:offset + length]
+    return bytes(result)
+
+
+class TestFileSignature(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.old_path = os.path.join(self.directory.name, "old.bin")
+        self.new_path = os.path.join(self.directory.name, "new.bin")
+        self.old = os.urandom(4 << 20)
+        with open(self.old_path, "wb") as f:
+            f.write(self.old)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def delta(self, new: bytes, ranges=None) -> tuple:
+        with open(self.new_path, "wb") as f:
+            f.write(new)
+        signature = FileSignature.from_file(self.old_path)
+        copies, literals = signature.delta(self.new_path, ranges or [(0, len(new))])
+        return signature, copies, literals
+
+    def test_block_size(self):
+        self.assertEqual(FileSignature.MIN_BLOCK_SIZE, FileSignature.block_size_for(0))
+        self.assertEqual(97 * 1024, FileSignature.block_size_for(100000 * 100000))
+        self.assertEqual(FileSignature.MAX_BLOCK_SIZE, FileSignature.block_size_for(1 << 40))
+
+    def test_unchanged(self):
+        signature, copies, literals = self.delta(self.old)
+        self.assertEqual([(0, 0, len(self.old))], copies)
+        self.assertEqual([], literals)
+
+    def test_edits(self):
+        new = bytearray(self.old)
+        new[3000000:3000010] = b"x" * 10
+        new[1000000:1000000] = os.urandom(100)
+        del new[2000000:2005000]
+        new = bytes(new)
+        signature, copies, literals = self.delta(new)
+        self.assertEqual(new, apply_delta(self.old, new, copies, literals))
+        # Every edit costs at most two blocks
+        self.assertLessEqual(sum(length for _, length in literals), 6 * signature.block_size)
+
+    def test_large_insertion(self):
+        insertion = os.urandom(1 << 20)
+        new = self.old[:500000] + insertion + self.old[500000:]
+        signature, copies, literals = self.delta(new)
+        self.assertEqual(new, apply_delta(self.old, new, copies, literals))
+        self.assertLessEqual(sum(length for _, length in literals), 2 * len(insertion))
+
+    def test_changed_file(self):
+        new = os.urandom(len(self.old) + 1000)
+        signature, copies, literals = self.delta(new)
+        self.assertEqual([], copies)
+        self.assertEqual([(0, len(new))], literals)
+
+    def test_ranges(self):
+        new = self.old[:1000] + b"new" + self.old[1000:]
+        ranges = [(1 << 20, 1 << 20), (3 << 20, len(new) - (3 << 20))]
+        signature, copies, literals = self.delta(new, ranges)
+        result = apply_delta(self.old, new, copies, literals)
+        for offset, length in ranges:
+            self.assertEqual(new[offset:offset + length], result[offset:offset + length])
+        self.assertEqual(sum(length for _, length in ranges),
+                         sum(length for _, _, length in copies) + sum(length for _, length in literals))
+
+    def test_rolled_checksum(self):
+        signature = FileSignature.from_file(self.old_path, 4096)
+        self.assertEqual(len(self.old) // 4096, signature.num_blocks)
+        self.assertEqual(zlib.adler32(self.old[4096:8192]), int.from_bytes(signature.weak_checksums[4:8], "big"))
+
+    def test_copied_blocks(self):
+        new = self.old[:1000] + b"new" + self.old[1000:]
+        signature, copies, literals = self.delta(new)
+        for changed in (False, True):
+            transfer = FileTransfer(self.new_path, self.old_path, FileManifest.from_file(self.new_path, len(new)))
+            transfer.old_file_version = file_version(self.old_path)
+            if changed:
+                os.utime(self.old_path, ns=(0, 0))
+            transfer.copy(copies)
+            # The first block contains the literal bytes, the others are copied completely
+            self.assertEqual(set() if changed else set(range(1, transfer.manifest.num_blocks)), transfer.verified)
+            with open(transfer.partial_path, "r+b") as f:
+                for offset, length in literals:
+                    f.seek(offset)
+                    f.write(new[offset:offset + length])
+            transfer.verify(literals)
+            self.assertEqual(not changed, transfer.is_complete())
+            os.remove(transfer.partial_path)
@@ -0,0 +1,76 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import threading
+import time
+import unittest
+
+from pynetworking.Communication_general import FunctionExecutor, ExecutionRejectedError
+
+
+class TestFunctionExecutor(unittest.TestCase):
+
+    def test_results(self):
+        executor = FunctionExecutor(max_workers=4)
+        futures = [executor.submit(pow, i, 2) for i in range(20)]
+        self.assertEqual([i ** 2 for i in range(20)], [f.result(2) for f in futures])
+        executor.shutdown()
+
+    def test_max_workers(self):
+        executor = FunctionExecutor(max_workers=3)
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+        futures = [executor.submit(work) for _ in range(12)]
+        [f.result(5) for f in futures]
+        self.assertEqual(3, max(max_running))
+        self.assertEqual(3, len(executor._workers))
+        executor.shutdown()
+
+    def test_reject(self):
+        executor = FunctionExecutor(max_workers=1, max_queue_size=1, rejection_policy=FunctionExecutor.REJECT)
+        event = threading.Event()
+        executor.submit(event.wait, 5)
+        time.sleep(0.05)
+        executor.submit(event.wait, 5)
+        self.assertRaises(ExecutionRejectedError, executor.submit, event.wait, 5)
+        event.set()
+        executor.shutdown()
+
+    def test_block(self):
+        executor = FunctionExecutor(max_workers=1, max_queue_size=1, rejection_policy=FunctionExecutor.BLOCK)
+        start = time.time()
+        futures = [executor.submit(time.sleep, 0.1) for _ in range(3)]
+        self.assertGreaterEqual(time.time() - start, 0.1)
+        [f.result(5) for f in futures]
+        executor.shutdown()
+
+    def test_shutdown(self):
+        executor = FunctionExecutor(max_workers=2)
+        futures = [executor.submit(time.sleep, 0.05) for _ in range(4)]
+        executor.shutdown(wait=True)
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertRaises(RuntimeError, executor.submit, time.sleep, 0)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, FunctionExecutor, 0)
+        self.assertRaises(ValueError, FunctionExecutor, 1, 0, "drop")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,7 +12,7 @@
 from unittest import TestCase
 
 from pynetworking.ID_management import *
-from pynetworking.Packets import FunctionPacket, DataPacket, Packet, Header
+from pynetworking.Packets import FunctionPacket, OneWayFunctionPacket, DataPacket, Packet, Header
 from pynetworking.Data import ByteStream
 from pynetworking.Logging import logger
 
@@ -82,6 +82,43 @@ class TestIDManager(TestCase):
         self.assertEqual((0, 3), data_packet_0.header.id_container.get_ids())
         self.assertEqual([], IDManager(0).get_function_stack())
 
+    def test_func_func_data_data_out_of_order(self):
+        func_packet_0 = FunctionPacket("dummy")
+        IDManager(0).set_ids_of_packet(func_packet_0)
+        func_packet_1 = FunctionPacket("Dummy")
+        IDManager(0).set_ids_of_packet(func_packet_1)
+        self.assertEqual([0, 1], IDManager(0).get_function_stack())
+
+        data_packet_0 = DataPacket(ret="Nothing")
+        IDManager(0).set_ids_of_packet(data_packet_0, function_id=0)
+        self.assertEqual((0, 2), data_packet_0.header.id_container.get_ids())
+        self.assertEqual([1], IDManager(0).get_function_stack())
+
+        data_packet_1 = DataPacket(ret="Nothing")
+        IDManager(0).set_ids_of_packet(data_packet_1, function_id=1)
+        self.assertEqual((1, 3), data_packet_1.header.id_container.get_ids())
+        self.assertEqual([], IDManager(0).get_function_stack())
+
+    def test_early_dummy_answer(self):
+        data_packet = DataPacket(public_key="key")
+        data_packet.set_ids(-2, 0)
+        IDManager(0).update_ids_by_packet(data_packet)
+        self.assertEqual([], IDManager(0).get_function_stack())
+        IDManager(0).append_dummy_functions(2)
+        self.assertEqual([-2], IDManager(0).get_function_stack())
+
+    def test_one_way_func_packet(self):
+        one_way_packet = OneWayFunctionPacket("notify")
+        IDManager(0).set_ids_of_packet(one_way_packet)
+        self.assertEqual((0, 0), one_way_packet.header.id_container.get_ids())
+        self.assertEqual([], IDManager(0).get_function_stack())
+
+        IDManager(1).update_ids_by_packet(one_way_packet)
+        self.assertEqual([], IDManager(1).get_function_stack())
+        func_packet = FunctionPacket("func")
+        IDManager(1).set_ids_of_packet(func_packet)
+        self.assertEqual((1, 1), func_packet.header.id_container.get_ids())
+
     def test_packing(self):
         """
         client        -    server
@@ -10,8 +10,9 @@
 """
 import unittest
 
-from pynetworking.Packets import Header, Packet, DataPacket, FunctionPacket, FileMetaPacket
-from pynetworking.Data import ByteStream
+from pynetworking.Packets import Header, Packet, DataPacket, FunctionPacket, FileMetaPacket, StreamPacket, \
+    StreamCreditPacket, FileRequestPacket, DirectoryPacket, packets
+from pynetworking.Data import ByteStream, FileManifest, FileSignature, Directory
 from pynetworking.Logging import logger
 
 from pynetworking.tests.example_functions import DummyPerson
@@ -55,6 +56,43 @@ class TestPackets(unittest.TestCase):
         packet = FileMetaPacket(r"C:\Hello\World\src.txt", 0)
         self.helper_packet_tests(packet)
 
+        manifest = FileManifest(b"t" * 16, 3 << 20, 1 << 20, bytes(range(48)))
+        packet = FileMetaPacket("src", 3 << 20, "dst", manifest, [(1 << 20, 2 << 20)])
+        self.helper_packet_tests(packet)
+        self.assertFalse(packet.is_offer)
+
+        packet = FileMetaPacket("src", 3 << 20, "dst", manifest, [(0, 4096)], [(4096, 0, (3 << 20) - 4096)])
+        self.helper_packet_tests(packet)
+        self.assertTrue(FileMetaPacket("src", 3 << 20, "dst", manifest, []).is_offer)
+
+    def test_file_request_packet(self):
+        packet = FileRequestPacket(b"t" * 16, [(0, 1 << 20), (2 << 20, 1000)])
+        self.helper_packet_tests(packet)
+        self.assertIsNone(packet.signature)
+
+        signature = FileSignature(3 << 20, 4096, bytes(range(12)), bytes(range(48)))
+        packet = FileRequestPacket(b"t" * 16, [(0, 3 << 20)], signature)
+        self.helper_packet_tests(packet)
+        self.assertEqual(signature.to_tuple(), packet.signature.to_tuple())
+
+    def test_directory_packet(self):
+        directory = Directory("src", "dst")
+        directory.directories = ["a", "a/b", "empty"]
+        directory.files = [("a/b/one.txt", 10), ("a/two.bin", 3 << 20), ("three", 0)]
+        packet = DirectoryPacket(directory)
+        self.helper_packet_tests(packet)
+        received = Directory.from_packet(packet)
+        self.assertEqual(directory.files, received.files)
+        self.assertEqual((3 << 20) + 10, received.size)
+
+        self.helper_packet_tests(DirectoryPacket(Directory("src", "dst")))
+
+    def test_stream_packets(self):
+        self.helper_packet_tests(StreamPacket([1, "two", b"three", DummyPerson("He", 12)]))
+        self.helper_packet_tests(StreamPacket([]))
+        self.helper_packet_tests(StreamCreditPacket(4))
+        self.helper_packet_tests(StreamCreditPacket(StreamCreditPacket.CANCEL))
+
 
 class TestHeader(unittest.TestCase):
 
@@ -66,6 +104,26 @@ class TestHeader(unittest.TestCase):
         header1_1 = Header.from_bytes(byte_stream)
         self.assertEqual(header1_0, header1_1)
 
+    def test_length(self):
+        packet = FileMetaPacket("src", 2**31 - 1, "dst")
+        packet.set_ids(-2, 2**31 - 1)
+        byte_stream = ByteStream(packet.pack())
+        header = Header.from_bytes(byte_stream)
+        self.assertEqual(Header.LENGTH_BYTES, byte_stream.idx)
+        self.assertEqual((-2, 2**31 - 1), header.id_container.get_ids())
+        self.assertEqual(packets[FileMetaPacket], header.packet_type)
+
+    def test_unknown_packet_type(self):
+        header = Header.from_packet(DataPacket())
+        header.packet_type = 0x1FFFF
+        with self.assertRaises(ValueError):
+            Packet.from_bytes(header, ByteStream(b""))
+
+    def test_packet_type_lookup(self):
+        for packet_cls, packet_type in packets.items():
+            self.assertIs(packet_cls, packets[packet_type])
+            self.assertIs(packet_cls, packets.inverse[packet_type])
+
 
 def example_function(name, second_name="Miller", tup=()):
     print("Hello: " + str(name) + " " + str(second_name) + " --> " + str(tup))
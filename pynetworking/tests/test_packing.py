@@ -7,21 +7,26 @@
 
 @internal_use:
 """
-from unittest import TestCase
+import array
+import sys
+from enum import IntEnum
+from unittest import TestCase, skipUnless
 
-from pynetworking.Data import general_pack, general_unpack, ByteStream
+from pynetworking.Data import general_pack, general_unpack, ByteStream, DILL, BINARY, general_pack_segments, \
+    OUT_OF_BAND_THRESHOLD, ReceiveBuffer
 
 from pynetworking.tests.example_functions import DummyPerson
 
 
 def single_value(test_self, value):
-    byte_string = general_pack(value)
+    byte_string = general_pack(value, codec=test_self.codec)
     byte_stream = ByteStream(byte_string)
     new_value = general_unpack(byte_stream)[0]
     test_self.assertEqual(value, new_value)
 
 
 class TestPacking(TestCase):
+    codec = DILL
 
     def test_int(self):
         single_value(self, -890)
@@ -63,10 +68,69 @@ class TestPacking(TestCase):
         single_value(self, DummyPerson("John", 90))
 
     def test_lambda(self):
-        byte_string = general_pack(lambda x, y: x + y)
+        byte_string = general_pack(lambda x, y: x + y, codec=self.codec)
         byte_stream = ByteStream(byte_string)
         new_value = general_unpack(byte_stream)[0]
         self.assertEqual(10, new_value(5, 5))
 
-
-
+    @skipUnless(sys.version_info >= (3, 8), "Out-of-band buffers need pickle protocol 5")
+    def test_out_of_band_buffers(self):
+        large = b"x" * OUT_OF_BAND_THRESHOLD
+        value = [large, bytearray(large), "small", {"nested": b"y" * OUT_OF_BAND_THRESHOLD}]
+        segments = general_pack_segments(value, codec=self.codec)
+        self.assertGreaterEqual(len(segments), 4)
+        self.assertIs(large, segments[1].obj)
+        new_value = general_unpack(ByteStream(b"".join(segments)))[0]
+        self.assertEqual(value, new_value)
+        self.assertIs(bytes, type(new_value[0]))
+        self.assertIs(bytearray, type(new_value[1]))
+
+    @skipUnless(sys.version_info >= (3, 8), "Out-of-band buffers need pickle protocol 5")
+    def test_out_of_band_memoryview(self):
+        value = memoryview(array.array("i", range(OUT_OF_BAND_THRESHOLD)))
+        receive_buffer = ReceiveBuffer()
+        receive_buffer += general_pack(value, codec=self.codec)
+        receive_buffer += b"next"
+        new_value = general_unpack(receive_buffer, receive_buffer.remaining_length - 4)[0]
+        # The view must stay valid, when new data is received.
+        receive_buffer += b"x" * 2 * ReceiveBuffer.INITIAL_CAPACITY
+        self.assertEqual("i", new_value.format)
+        self.assertEqual(value.tolist(), new_value.tolist())
+        self.assertEqual(b"next", bytes(receive_buffer.next_bytes(4)))
+
+    def test_small_buffers_in_band(self):
+        self.assertEqual(1, len(general_pack_segments(b"x" * (OUT_OF_BAND_THRESHOLD - 1), codec=self.codec)))
+
+
+class Color(IntEnum):
+    RED = 1
+
+
+class TestBinaryPacking(TestPacking):
+    codec = BINARY
+
+    def test_big_int(self):
+        for value in (0, -1, 127, 128, -128, -129, 2**63, -2**100):
+            single_value(self, value)
+
+    def test_long_container(self):
+        single_value(self, list(range(1000)))
+        single_value(self, {str(i): i for i in range(300)})
+
+    def test_subclass_keeps_type(self):
+        value = general_unpack(ByteStream(general_pack(Color.RED, codec=BINARY)))[0]
+        self.assertIs(Color.RED, value)
+
+    def test_recursive_list(self):
+        value = [1]
+        value.append(value)
+        new_value = general_unpack(ByteStream(general_pack(value, codec=BINARY)))[0]
+        self.assertIs(new_value, new_value[1])
+
+    def test_smaller_than_dill(self):
+        args = ("function_name", (1, 2.5, "text"), {"key": None})
+        self.assertLess(len(general_pack(*args, codec=BINARY)), len(general_pack(*args, codec=DILL)))
+
+    def test_unpack_both_codecs(self):
+        for codec in (DILL, BINARY):
+            self.assertEqual((1, "a"), general_unpack(ByteStream(general_pack(1, "a", codec=codec))))
@@ -0,0 +1,81 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import queue
+import socket
+import threading
+import unittest
+
+from pynetworking.Communication_general import Reactor
+
+
+class TestReactor(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.reactor = Reactor(num_workers=2)
+        self.listening_socket = socket.socket()
+        self.listening_socket.bind(("127.0.0.1", 0))
+        self.listening_socket.listen()
+        self.accepted = threading.Event()
+        self.thread = threading.Thread(target=self.reactor.run, args=(self.listening_socket, self.accepted.set))
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.reactor.close()
+        self.thread.join(2)
+        self.listening_socket.close()
+
+    def test_readable(self):
+        received = queue.Queue()
+        receiver, sender = socket.socketpair()
+
+        def on_readable():
+            data = receiver.recv(100)
+            received.put((data, threading.current_thread().name))
+            return data != b"last"
+
+        self.reactor.register(receiver, on_readable)
+        for data in (b"first", b"second", b"last"):
+            sender.send(data)
+            self.assertEqual(data, received.get(timeout=2)[0])
+        # Not registered again after the last data
+        sender.send(b"ignored")
+        self.assertRaises(queue.Empty, received.get, timeout=0.2)
+        self.reactor.register(receiver, on_readable)
+        data, thread_name = received.get(timeout=2)
+        self.assertEqual(b"ignored", data)
+        self.assertTrue(thread_name.startswith("Reactor_worker"))
+        receiver.close()
+        sender.close()
+
+    def test_acceptable(self):
+        client = socket.create_connection(self.listening_socket.getsockname())
+        self.assertTrue(self.accepted.wait(2))
+        client.close()
+
+    def test_reused_file_descriptor(self):
+        received = queue.Queue()
+        receiver, sender = socket.socketpair()
+        self.reactor.register(receiver, lambda: received.put(receiver.recv(100)))
+        file_descriptor = receiver.fileno()
+        # Closed without unregistering, the next socket gets the same file descriptor
+        receiver.close()
+        sender.close()
+        receiver, sender = socket.socketpair()
+        self.assertEqual(file_descriptor, receiver.fileno())
+        self.reactor.register(receiver, lambda: received.put(receiver.recv(100)))
+        sender.send(b"new")
+        self.assertEqual(b"new", received.get(timeout=2))
+        self.reactor.unregister(receiver)
+        receiver.close()
+        sender.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import socket
+from unittest import TestCase
+
+from pynetworking.Data import ReceiveBuffer, pack_int, pack_record
+
+
+class TestReceiveBuffer(TestCase):
+
+    def test_init(self):
+        receive_buffer = ReceiveBuffer()
+        self.assertEqual(receive_buffer.idx, 0)
+        self.assertEqual(receive_buffer.remaining_length, 0)
+        self.assertEqual(receive_buffer.reached_end, True)
+
+    def test_next_int(self):
+        receive_buffer = ReceiveBuffer()
+        receive_buffer += pack_int(102) + pack_int(-2089)
+        self.assertEqual(receive_buffer.next_int(), 102)
+        self.assertEqual(receive_buffer.next_int(), -2089)
+        self.assertEqual(receive_buffer.reached_end, True)
+
+    def test_next_bytes(self):
+        receive_buffer = ReceiveBuffer()
+        receive_buffer += b"Hello World"
+        self.assertEqual(b"Hello", receive_buffer.next_bytes(5))
+        self.assertEqual(b" World", receive_buffer.next_all_bytes())
+
+    def test_next_bytes_error(self):
+        receive_buffer = ReceiveBuffer()
+        receive_buffer += b"H"
+        self.assertRaises(IndexError, receive_buffer.next_bytes, 5)
+        self.assertRaises(AssertionError, receive_buffer.next_bytes, -2)
+
+    def test_find(self):
+        receive_buffer = ReceiveBuffer()
+        receive_buffer += b"abc%%def%%"
+        receive_buffer.next_bytes(2)
+        self.assertEqual(receive_buffer.find(b"%%"), 1)
+        self.assertEqual(receive_buffer.find(b"%%", 3), 6)
+        self.assertEqual(receive_buffer.find(b"xyz"), -1)
+
+    def test_compact(self):
+        receive_buffer = ReceiveBuffer(16)
+        receive_buffer += b"0123456789ab"
+        receive_buffer.next_bytes(10)
+        receive_buffer += b"cdef"
+        self.assertEqual(receive_buffer.capacity, 16)
+        self.assertEqual(b"abcdef", receive_buffer.next_all_bytes())
+
+    def test_grow_keeps_views(self):
+        receive_buffer = ReceiveBuffer(16)
+        receive_buffer += b"0123456789"
+        view = receive_buffer.next_bytes(4)
+        receive_buffer += b"x" * 100
+        self.assertEqual(b"0123", view)
+        self.assertGreaterEqual(receive_buffer.capacity, 106)
+        self.assertEqual(b"456789" + b"x" * 100, receive_buffer.next_all_bytes())
+
+    def test_many_chunks(self):
+        receive_buffer = ReceiveBuffer(64)
+        expected = b"".join(bytes([i % 256]) * 7 for i in range(1000))
+        received = bytearray()
+        for i in range(1000):
+            receive_buffer += bytes([i % 256]) * 7
+            if i % 3 == 0:
+                received += receive_buffer.next_bytes(receive_buffer.remaining_length // 2)
+                receive_buffer.remove_consumed_bytes()
+        received += receive_buffer.next_all_bytes()
+        self.assertEqual(expected, bytes(received))
+
+    def test_pop_last(self):
+        receive_buffer = ReceiveBuffer()
+        receive_buffer += b"Hello World"
+        self.assertEqual(b"World", receive_buffer.pop_last(5))
+        self.assertEqual(b"Hello ", receive_buffer.next_all_bytes())
+
+    def test_next_record(self):
+        receive_buffer = ReceiveBuffer()
+        records = pack_record(b"Hello") + pack_record(b"") + pack_record(b"World")
+        receive_buffer += records[:2]
+        self.assertEqual(receive_buffer.missing_record_bytes(), 2)
+        self.assertIsNone(receive_buffer.next_record())
+        receive_buffer += records[2:7]
+        self.assertEqual(receive_buffer.missing_record_bytes(), 2)
+        self.assertIsNone(receive_buffer.next_record())
+        self.assertEqual(receive_buffer.remaining_length, 7)
+        receive_buffer += records[7:]
+        self.assertEqual(b"Hello", receive_buffer.next_record())
+        self.assertEqual(b"", receive_buffer.next_record())
+        self.assertEqual(b"World", receive_buffer.next_record())
+        self.assertIsNone(receive_buffer.next_record())
+
+    def test_detach(self):
+        receive_buffer = ReceiveBuffer(8)
+        receive_buffer += b"Hello World"
+        hello = receive_buffer.next_bytes(6)
+        receive_buffer.detach()
+        receive_buffer += b"!" * 100
+        self.assertEqual(b"Hello ", hello)
+        self.assertEqual(b"World" + b"!" * 100, receive_buffer.next_all_bytes())
+
+    def test_recv_into(self):
+        sender, receiver = socket.socketpair()
+        with sender, receiver:
+            sender.sendall(b"Hello World")
+            receive_buffer = ReceiveBuffer(4)
+            received = 0
+            while received < 11:
+                received += receive_buffer.recv_into(receiver, 4)
+            self.assertEqual(b"Hello World", receive_buffer.next_all_bytes())
+            sender.close()
+            self.assertEqual(0, receive_buffer.recv_into(receiver, 4))
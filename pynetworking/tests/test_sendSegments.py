@@ -0,0 +1,46 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import socket
+import threading
+from unittest import TestCase
+
+from pynetworking.Data import send_segments
+
+
+def receive_all(receiver: socket.socket, num_bytes: int, received: bytearray) -> None:
+    while len(received) < num_bytes:
+        chunk = receiver.recv(num_bytes - len(received))
+        if not chunk:
+            break
+        received += chunk
+
+
+class TestSendSegments(TestCase):
+
+    def test_small_segments(self):
+        sender, receiver = socket.socketpair()
+        with sender, receiver:
+            send_segments(sender, [b"Hello", b"", memoryview(b" World")])
+            received = bytearray()
+            receive_all(receiver, 11, received)
+            self.assertEqual(b"Hello World", received)
+
+    def test_partial_sends(self):
+        # More data, than fits into the socket buffers, and more segments than one sendmsg call accepts.
+        segments = [bytes([i % 256]) * 1000 for i in range(3000)] + [b"x" * 10 * 1000 * 1000]
+        expected = b"".join(segments)
+        sender, receiver = socket.socketpair()
+        with sender, receiver:
+            received = bytearray()
+            receive_thread = threading.Thread(target=receive_all, args=(receiver, len(expected), received))
+            receive_thread.start()
+            send_segments(sender, segments)
+            receive_thread.join(timeout=10)
+            self.assertEqual(expected, received)
@@ -0,0 +1,42 @@
+"""
+@author: Julian Sobott
+@brief:
+@description:
+
+@external_use:
+
+@internal_use:
+"""
+import unittest
+
+from pynetworking.utils import Ddict
+
+
+class TestDdict(unittest.TestCase):
+
+    def test_lookup(self):
+        ddict = Ddict({"a": 1, "b": 2})
+        self.assertEqual(1, ddict["a"])
+        self.assertEqual("b", ddict[2])
+        self.assertRaises(KeyError, ddict.__getitem__, "c")
+
+    def test_inverse_in_sync(self):
+        ddict = Ddict({"a": 1, "b": 2, "c": 3, "d": 4})
+        ddict["a"] = 5
+        del ddict["b"]
+        self.assertEqual(3, ddict.pop("c"))
+        self.assertEqual("default", ddict.pop("c", "default"))
+        self.assertEqual(4, ddict.setdefault("d", 6))
+        self.assertEqual(7, ddict.setdefault("e", 7))
+        ddict.update(f=8)
+        ddict |= {"g": 9}
+        self.assertEqual({value: key for key, value in ddict.items()}, ddict.inverse)
+        self.assertEqual(("g", 9), ddict.popitem())
+        self.assertEqual({value: key for key, value in ddict.items()}, ddict.inverse)
+        ddict.clear()
+        self.assertEqual({}, ddict.inverse)
+        self.assertRaises(KeyError, ddict.__getitem__, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
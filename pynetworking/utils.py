@@ -15,13 +15,60 @@ import time
 
 class Ddict(dict):
     """
-    Dict object where value by key and key by value is possible
+    Dict object where value by key and key by value is possible. The :attr:`inverse` dict maps the values to the keys
+    and is kept up to date, so both lookups are O(1). Values must be unique and hashable.
     """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.inverse = {value: key for key, value in self.items()}
+
     def __getitem__(self, item):
         try:
             return super().__getitem__(item)
         except KeyError:
-            return list(self.keys())[list(self.values()).index(item)]
+            return self.inverse[item]
+
+    def __setitem__(self, key, value):
+        if key in self:
+            del self.inverse[super().__getitem__(key)]
+        super().__setitem__(key, value)
+        self.inverse[value] = key
+
+    def __delitem__(self, key):
+        del self.inverse[super().__getitem__(key)]
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        value = super().pop(key)
+        del self.inverse[value]
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        del self.inverse[value]
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def clear(self):
+        super().clear()
+        self.inverse.clear()
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
 
 
 class _DictEncoder(json.JSONEncoder):
@@ -10,9 +10,9 @@ Features:
 - call functions with arguments (server->client and client->server)
 - get return values
 - get Exceptions
+- return generators, whose items are streamed
 
 What cannot be returned by a function:
-- generator
 - frame
 - traceback
 """
@@ -47,6 +47,11 @@ def main():
             print(e)
             print("Error successfully transmitted")
 
+        print(f"\n\n{'=' * 7} Calling a function that returns a generator {'=' * 7}\n")
+        # The items are received, while they are iterated. Only some of them are buffered at the client.
+        for square in server.squares(5):
+            print(square)
+
         print(f"\n\n{'=' * 7} Calling a function that calls a function at the client {'=' * 7}\n")
         server.start_communication()
 
@@ -79,6 +84,11 @@ class ServerFunctions(net.ServerFunctions):
     def risky_function():
         raise NotImplementedError("You successfully raised an error!")
 
+    @staticmethod
+    def squares(stop: int):
+        for i in range(stop):
+            yield i * i
+
     @staticmethod
     def start_communication():
         client: ClientCommunicator = net.ClientManager().get()
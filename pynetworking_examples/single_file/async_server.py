@@ -0,0 +1,68 @@
+"""
+:synopsis: The asyncio variant of the client and server
+:author: Julian Sobott
+
+Server and client run in one event loop. Remote functions are awaited. Server functions can be coroutine functions,
+which are executed in the event loop, or normal functions, which are executed in a thread pool.
+Asyncio and threaded clients and servers can be mixed.
+
+"""
+import asyncio
+
+import pynetworking as net
+
+# define the address at which the server listen and the clients connect to
+server_address = "127.0.0.1", 5000
+
+# Only log errors
+net.Logging.logger.setLevel(40)
+
+
+async def main():
+    async with net.AsyncClientManager(server_address, ClientCommunicator):
+        async with ServerCommunicator() as server_communicator:
+            await server_communicator.connect(server_address, timeout=2)
+            server = server_communicator.remote_functions
+
+            # Many calls can be pending at the same time
+            results = await asyncio.gather(*(server.slow_square(i) for i in range(10)))
+            print(results)
+
+            print(await server.greet_client())
+
+
+class ClientFunctions(net.ClientFunctions):
+    # A class that defines every method that can be called at a client from the server
+    @staticmethod
+    def get_name() -> str:
+        return "async client"
+
+
+class ServerFunctions(net.ServerFunctions):
+    # A class that defines every method that can be called at the server from a client
+    @staticmethod
+    async def slow_square(number: int) -> int:
+        await asyncio.sleep(0.5)
+        return number ** 2
+
+    @staticmethod
+    async def greet_client() -> str:
+        # Only coroutine functions can call functions at the client
+        client = net.AsyncClientCommunicator.get()
+        return f"Hello {await client.remote_functions.get_name()}"
+
+
+class ClientCommunicator(net.AsyncClientCommunicator):
+    # Server-side class that sets the available functions and make them available for communication
+    local_functions = ServerFunctions
+    remote_functions = ClientFunctions
+
+
+class ServerCommunicator(net.AsyncServerCommunicator):
+    # Client-side class that sets the available functions and make them available for communication
+    local_functions = ClientFunctions
+    remote_functions = ServerFunctions
+
+
+if __name__ == '__main__':
+    asyncio.run(main())